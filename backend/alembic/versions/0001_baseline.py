@@ -0,0 +1,100 @@
+"""Baseline schema: users, sessions, recordings and surveys
+
+Creates the tables the application started with (``alembic upgrade head``
+works on an empty database) and adds the columns that older versions of
+``init_db`` added ad hoc, so databases created before migrations existed
+reach the same schema. Every statement is a no-op where the table, column
+or index already exists.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR NOT NULL,
+            password_hash VARCHAR NOT NULL,
+            rol VARCHAR NOT NULL,
+            is_active BOOLEAN NOT NULL DEFAULT TRUE,
+            must_change_password BOOLEAN NOT NULL DEFAULT FALSE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id SERIAL PRIMARY KEY,
+            session_code VARCHAR NOT NULL,
+            datos_participante JSON NOT NULL,
+            texto_seleccionado JSON NOT NULL,
+            estado VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS recordings (
+            id SERIAL PRIMARY KEY,
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            storage_key VARCHAR NOT NULL,
+            duracion_segundos FLOAT,
+            formato VARCHAR,
+            metadata_carga JSON,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS surveys (
+            id SERIAL PRIMARY KEY,
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            respuestas_json JSON NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    # Same names as SQLAlchemy's ``index=True`` / ``unique=True``
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+    op.create_index("ix_sessions_id", "sessions", ["id"], if_not_exists=True)
+    op.create_index("ix_sessions_session_code", "sessions", ["session_code"], unique=True, if_not_exists=True)
+    op.create_index("ix_recordings_id", "recordings", ["id"], if_not_exists=True)
+    op.create_index("ix_surveys_id", "surveys", ["id"], if_not_exists=True)
+
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE")
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS must_change_password BOOLEAN NOT NULL DEFAULT FALSE")
+    op.execute("ALTER TABLE recordings ADD COLUMN IF NOT EXISTS sample_rate INTEGER")
+    op.execute("ALTER TABLE recordings ADD COLUMN IF NOT EXISTS channels INTEGER")
+    op.execute("ALTER TABLE recordings ADD COLUMN IF NOT EXISTS codec VARCHAR")
+    op.execute("ALTER TABLE recordings ADD COLUMN IF NOT EXISTS probed_at TIMESTAMP WITH TIME ZONE")
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'recordings'
+                  AND column_name = 'audio_url'
+            ) AND NOT EXISTS (
+                SELECT 1
+                FROM information_schema.columns
+                WHERE table_name = 'recordings'
+                  AND column_name = 'storage_key'
+            ) THEN
+                ALTER TABLE recordings RENAME COLUMN audio_url TO storage_key;
+            END IF;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    for table in ("surveys", "recordings", "sessions", "users"):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,31 @@
+"""Index foreign keys and session state/date filters
+
+Revision ID: 0002_lookup_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002_lookup_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# (index name, table, column) — names match SQLAlchemy's ``index=True`` so
+# databases created by ``create_all`` already have them.
+INDEXES = [
+    ("ix_recordings_session_id", "recordings", "session_id"),
+    ("ix_surveys_session_id", "surveys", "session_id"),
+    ("ix_sessions_estado", "sessions", "estado"),
+    ("ix_sessions_created_at", "sessions", "created_at"),
+]
+
+
+def upgrade() -> None:
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [column], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
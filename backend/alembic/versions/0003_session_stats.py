@@ -0,0 +1,56 @@
+"""session_stats summary table, backfilled from recordings and surveys
+
+Write paths keep it current from now on (see ``app.services.session_stats``);
+the backfill only adds rows for sessions that do not have one yet, so it is
+safe on databases where ``create_all`` already created the table.
+
+Revision ID: 0003_session_stats
+Revises: 0002_lookup_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003_session_stats"
+down_revision = "0002_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS session_stats (
+            session_id INTEGER PRIMARY KEY REFERENCES sessions (id) ON DELETE CASCADE,
+            recordings_count INTEGER NOT NULL,
+            surveys_count INTEGER NOT NULL,
+            first_survey_id INTEGER,
+            total_duration FLOAT NOT NULL,
+            last_activity TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute("""
+        INSERT INTO session_stats
+            (session_id, recordings_count, surveys_count, first_survey_id, total_duration, last_activity)
+        SELECT
+            s.id,
+            COALESCE(r.recordings_count, 0),
+            COALESCE(v.surveys_count, 0),
+            v.first_survey_id,
+            COALESCE(r.total_duration, 0),
+            GREATEST(s.created_at, r.last_recording, v.last_survey)
+        FROM sessions s
+        LEFT JOIN (
+            SELECT session_id, count(*) AS recordings_count,
+                   sum(duracion_segundos) AS total_duration, max(created_at) AS last_recording
+            FROM recordings GROUP BY session_id
+        ) r ON r.session_id = s.id
+        LEFT JOIN (
+            SELECT session_id, count(*) AS surveys_count,
+                   min(id) AS first_survey_id, max(created_at) AS last_survey
+            FROM surveys GROUP BY session_id
+        ) v ON v.session_id = s.id
+        ON CONFLICT (session_id) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS session_stats")
@@ -0,0 +1,20 @@
+"""recordings.updated_at, so probe and duration updates reach delta exports
+
+Revision ID: 0004_recording_updated_at
+Revises: 0003_session_stats
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0004_recording_updated_at"
+down_revision = "0003_session_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE recordings ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE recordings DROP COLUMN IF EXISTS updated_at")
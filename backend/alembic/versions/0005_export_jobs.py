@@ -0,0 +1,42 @@
+"""export_jobs: background dataset exports and their cached R2 artifacts
+
+Databases where ``create_all`` already created the table only get the
+``since`` column (delta export jobs) if it is missing.
+
+Revision ID: 0005_export_jobs
+Revises: 0004_recording_updated_at
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005_export_jobs"
+down_revision = "0004_recording_updated_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id SERIAL PRIMARY KEY,
+            cache_key VARCHAR NOT NULL,
+            compression_level INTEGER,
+            since TIMESTAMP WITH TIME ZONE,
+            status VARCHAR NOT NULL,
+            progress INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            error VARCHAR,
+            storage_key VARCHAR,
+            size_bytes BIGINT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            completed_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    op.execute("ALTER TABLE export_jobs ADD COLUMN IF NOT EXISTS since TIMESTAMP WITH TIME ZONE")
+    op.create_index("ix_export_jobs_id", "export_jobs", ["id"], if_not_exists=True)
+    op.create_index("ix_export_jobs_cache_key", "export_jobs", ["cache_key"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS export_jobs")
@@ -0,0 +1,39 @@
+"""resumable_uploads: server-side state of multipart audio uploads
+
+Revision ID: 0006_resumable_uploads
+Revises: 0005_export_jobs
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006_resumable_uploads"
+down_revision = "0005_export_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS resumable_uploads (
+            id VARCHAR PRIMARY KEY,
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            storage_key VARCHAR NOT NULL,
+            upload_id VARCHAR NOT NULL,
+            filename VARCHAR,
+            content_type VARCHAR,
+            total_size BIGINT NOT NULL,
+            part_size INTEGER NOT NULL,
+            parts JSON NOT NULL,
+            status VARCHAR NOT NULL,
+            recording_id INTEGER REFERENCES recordings (id),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+        )
+    """)
+    op.create_index("ix_resumable_uploads_session_id", "resumable_uploads", ["session_id"], if_not_exists=True)
+    op.create_index("ix_resumable_uploads_expires_at", "resumable_uploads", ["expires_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS resumable_uploads")
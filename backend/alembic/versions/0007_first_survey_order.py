@@ -0,0 +1,34 @@
+"""session_stats.first_survey_id: earliest created_at (NULLs first), then lowest id
+
+0003 backfilled it with the lowest survey id; the dataset export picks the
+earliest survey. Recompute it with the export's definition.
+
+Revision ID: 0007_first_survey_order
+Revises: 0006_resumable_uploads
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0007_first_survey_order"
+down_revision = "0006_resumable_uploads"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        UPDATE session_stats st
+        SET first_survey_id = (
+            SELECT sv.id FROM surveys sv
+            WHERE sv.session_id = st.session_id
+            ORDER BY sv.created_at ASC NULLS FIRST, sv.id
+            LIMIT 1
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        UPDATE session_stats st
+        SET first_survey_id = (SELECT min(sv.id) FROM surveys sv WHERE sv.session_id = st.session_id)
+    """)
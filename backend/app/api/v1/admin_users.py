@@ -5,7 +5,8 @@ from typing import Optional, List
 import logging
 
 from ...db.session import get_db
-from ...core.security import get_current_user_id
+from ...core.security import get_current_principal
+from ...core.principal_cache import Principal, principal_cache
 from ...core.time import to_local_iso
 from ...models.user import User
 from ...services.users import create_user_with_temp_password, reset_user_password, ALLOWED_ROLES
@@ -41,24 +42,18 @@ class AdminUserUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
-def _require_analista(user_id: int, db: Session) -> User:
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    if user.must_change_password:
+def _require_analista(principal: Principal) -> Principal:
+    if principal.must_change_password:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="PASSWORD_CHANGE_REQUIRED"
         )
-    if user.rol != "ANALISTA":
+    if principal.rol != "ANALISTA":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only ANALISTA users can access this resource"
         )
-    return user
+    return principal
 
 
 def _build_admin_user_out(user: User) -> AdminUserOut:
@@ -73,12 +68,12 @@ def _build_admin_user_out(user: User) -> AdminUserOut:
 
 @router.get("/admin/users", response_model=List[AdminUserOut])
 def list_admin_users(
-    current_user_id: int = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
 ):
-    _require_analista(current_user_id, db)
+    _require_analista(principal)
 
     users = db.query(User).offset(skip).limit(limit).all()
     return [_build_admin_user_out(user) for user in users]
@@ -87,10 +82,10 @@ def list_admin_users(
 @router.post("/admin/users", response_model=AdminUserCreateResponse, status_code=status.HTTP_201_CREATED)
 def create_admin_user(
     payload: AdminUserCreate,
-    current_user_id: int = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    _require_analista(current_user_id, db)
+    current_user = _require_analista(principal)
 
     normalized_role = payload.role.strip().upper()
     if normalized_role not in ALLOWED_ROLES:
@@ -114,7 +109,7 @@ def create_admin_user(
 
     logger.info(
         "admin_users.create user_id=%s created_user_id=%s role=%s",
-        current_user_id,
+        current_user.id,
         user.id,
         user.rol
     )
@@ -128,10 +123,10 @@ def create_admin_user(
 @router.post("/admin/users/{user_id}/reset-password", response_model=AdminUserResetPasswordResponse)
 def reset_admin_user_password(
     user_id: int,
-    current_user_id: int = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    current_user = _require_analista(current_user_id, db)
+    current_user = _require_analista(principal)
     if user_id == current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -158,10 +153,10 @@ def reset_admin_user_password(
 def update_admin_user(
     user_id: int,
     payload: AdminUserUpdate,
-    current_user_id: int = Depends(get_current_user_id),
+    principal: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    current_user = _require_analista(current_user_id, db)
+    current_user = _require_analista(principal)
     if user_id == current_user.id and (payload.role is not None or payload.is_active is not None):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -189,6 +184,7 @@ def update_admin_user(
 
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     logger.info(
         "admin_users.update user_id=%s target_user_id=%s role=%s is_active=%s",
         current_user.id,
@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from datetime import timedelta
 from ...db.session import get_db
 from ...models.user import User
 from ...core.security import (
-    verify_password,
+    verify_password_async,
+    verify_and_update_password_async,
     create_access_token,
     get_current_user_id,
     get_current_user as get_current_user_from_token,
-    get_password_hash,
+    get_password_hash_async,
 )
 from ...core.config import settings
+from ...core.principal_cache import principal_cache
 
 router = APIRouter()
 
@@ -42,18 +45,34 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+def _find_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+
+# Login and change-password are async so that requests waiting for the
+# bounded hashing pool do not hold threadpool threads; their (short) database
+# calls are sent to the threadpool explicitly.
 @router.post("/auth/login", response_model=LoginResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """Login endpoint."""
     # Find user by email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await run_in_threadpool(_find_user_by_email, db, login_data.email)
     
-    if not user or not verify_password(login_data.password, user.password_hash):
+    valid, new_hash = (
+        await verify_and_update_password_async(login_data.password, user.password_hash)
+        if user else (False, None)
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes created with older cost parameters
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -97,13 +116,20 @@ class ChangePasswordRequest(BaseModel):
     new_password: str
 
 
+def _save_password(db: Session, user: User, password_hash: str) -> None:
+    user.password_hash = password_hash
+    user.must_change_password = False
+    db.commit()
+    db.refresh(user)
+
+
 @router.post("/auth/change-password")
-def change_password(
+async def change_password(
     payload: ChangePasswordRequest,
     current_user: User = Depends(get_current_user_from_token),
     db: Session = Depends(get_db)
 ):
-    if not verify_password(payload.current_password, current_user.password_hash):
+    if not await verify_password_async(payload.current_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
@@ -115,10 +141,9 @@ def change_password(
             detail="Password must be at least 8 characters"
         )
 
-    current_user.password_hash = get_password_hash(payload.new_password)
-    current_user.must_change_password = False
-    db.commit()
-    db.refresh(current_user)
+    new_hash = await get_password_hash_async(payload.new_password)
+    await run_in_threadpool(_save_password, db, current_user, new_hash)
+    principal_cache.invalidate(current_user.id)
 
     return {"message": "Password updated"}
 
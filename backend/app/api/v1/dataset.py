@@ -1,66 +1,202 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from pydantic import BaseModel, Field
+from typing import Optional, Sequence
 from ...db.session import get_db
+from ...db.async_session import get_async_db
 from ...models.session import Session as SessionModel
-from ...models.recording import Recording
-from ...models.survey import Survey
-from ...core.security import get_current_user_role
+from ...models.session_stats import SessionStats
+from ...core.security import get_current_user_role, get_current_user_role_async
+from ...core.state_machine import SessionState
 from ...core.time import to_local_iso
-from ...core.storage_r2 import get_s3_client
+from ...core.storage_r2 import get_s3_client, presign_get_url
 from ...core.config import settings
-import json
-import io
-import csv
-import zipfile
+from ...models.export_job import ExportJob
+from ...services.dataset_stats import get_dataset_stats
+from ...services.dataset_export import DatasetExport, ExportFormat, iter_dataset_zip
+from ...services.survey_export import SurveyLayout
+from ...services.dataset_export_sql import SqlDatasetExport, iter_sql_dataset_zip, supports_copy
+from ...services.export_jobs import ExportJobStatus, create_export_job, expire_old_artifacts, run_export_job
 import logging
 from datetime import datetime
-from pathlib import Path
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Async versions of the hot endpoints (see sessions.async_router).
+async_router = APIRouter(include_in_schema=False)
+
+DATASET_PAGE_DEFAULT = 200
+DATASET_PAGE_MAX = 1000
+
 
 class DatasetEntry(BaseModel):
-    """Schema for dataset entry."""
+    """Schema for a ``/dataset?summary=true`` entry (read from session_stats)."""
     session_id: int
     session_code: str
     participant_name: str
     participant_age: Optional[int]
     participant_email: Optional[str]
-    texto_seleccionado: str
+    texto_seleccionado: Optional[str]  # Text Id
     estado: str
     created_at: str
     recordings_count: int
     surveys_count: int
+    first_survey_id: Optional[int]
+    total_duration_seconds: float
+    last_activity: Optional[str]
 
 
-@router.get("/dataset")
-def get_dataset(
-    role: str = Depends(get_current_user_role),
-    db: Session = Depends(get_db)
-):
-    """Get dataset for ANALISTA role (all sessions with recordings and surveys)."""
-    # Check if user has ANALISTA role
-    if role != "ANALISTA":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only ANALISTA users can access the dataset"
+class ExportJobCreate(BaseModel):
+    """Schema for requesting a background export."""
+    compression_level: Optional[int] = Field(None, ge=0, le=9)
+    since: Optional[datetime] = None  # Delta watermark: only changes after this instant
+
+
+class ExportJobResponse(BaseModel):
+    """Schema for export job status."""
+    id: int
+    status: str
+    progress: int
+    total: int
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: str
+    completed_at: Optional[str] = None
+    download_url: Optional[str] = None
+    expires_in: Optional[int] = None
+    reused: bool = False
+
+
+def _build_export_job_response(job: ExportJob, reused: bool = False) -> ExportJobResponse:
+    download_url = None
+    expires_in = None
+    if job.status == ExportJobStatus.COMPLETED.value and job.storage_key:
+        try:
+            download_url = presign_get_url(
+                bucket=settings.R2_BUCKET,
+                key=job.storage_key,
+                expires_seconds=settings.EXPORT_DOWNLOAD_EXPIRES_SECONDS,
+            )
+            expires_in = settings.EXPORT_DOWNLOAD_EXPIRES_SECONDS
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error generating download URL: {exc}"
+            )
+
+    return ExportJobResponse(
+        id=job.id,
+        status=job.status,
+        progress=job.progress or 0,
+        total=job.total or 0,
+        size_bytes=job.size_bytes,
+        error=job.error,
+        created_at=to_local_iso(job.created_at) or "",
+        completed_at=to_local_iso(job.completed_at),
+        download_url=download_url,
+        expires_in=expires_in,
+        reused=reused,
+    )
+
+
+def _dataset_filters(
+    estado: Optional[SessionState],
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+) -> list:
+    filters = []
+    if estado is not None:
+        filters.append(SessionModel.estado == estado.value)
+    if created_from is not None:
+        filters.append(SessionModel.created_at >= created_from)
+    if created_to is not None:
+        filters.append(SessionModel.created_at < created_to)
+    return filters
+
+
+def _dataset_count_statement(filters: list) -> Select:
+    return select(func.count(SessionModel.id)).where(*filters)
+
+
+def _dataset_page_statement(filters: list, after_id: Optional[int], limit: int) -> Select:
+    # One query for the page plus one batched query per relationship
+    statement = (
+        select(SessionModel)
+        .options(
+            selectinload(SessionModel.recordings),
+            selectinload(SessionModel.surveys),
+        )
+        .where(*filters)
+    )
+    if after_id is not None:
+        statement = statement.where(SessionModel.id > after_id)
+    return statement.order_by(SessionModel.id).limit(limit)
+
+
+def _dataset_summary_statement(filters: list, after_id: Optional[int], limit: int) -> Select:
+    # Counts come from the session_stats row, not from the recordings and surveys tables
+    statement = (
+        select(
+            SessionModel.id,
+            SessionModel.session_code,
+            SessionModel.datos_participante,
+            SessionModel.texto_seleccionado["Id"].as_string().label("texto_id"),
+            SessionModel.estado,
+            SessionModel.created_at,
+            func.coalesce(SessionStats.recordings_count, 0).label("recordings_count"),
+            func.coalesce(SessionStats.surveys_count, 0).label("surveys_count"),
+            SessionStats.first_survey_id,
+            func.coalesce(SessionStats.total_duration, 0.0).label("total_duration"),
+            SessionStats.last_activity,
         )
-    
-    # Get all sessions with related data
-    sessions = db.query(SessionModel).all()
-    
+        .outerjoin(SessionStats, SessionStats.session_id == SessionModel.id)
+        .where(*filters)
+    )
+    if after_id is not None:
+        statement = statement.where(SessionModel.id > after_id)
+    return statement.order_by(SessionModel.id).limit(limit)
+
+
+def _dataset_page(dataset: list, last_id: Optional[int], total_sessions: int, limit: int) -> dict:
+    return {
+        "dataset": dataset,
+        "total_sessions": total_sessions,
+        "limit": limit,
+        "next_after_id": last_id if len(dataset) == limit else None,
+    }
+
+
+def _build_dataset_summary_page(rows: Sequence, total_sessions: int, limit: int) -> dict:
+    dataset = [
+        DatasetEntry(
+            session_id=row.id,
+            session_code=row.session_code,
+            participant_name=row.datos_participante.get("nombre", ""),
+            participant_age=row.datos_participante.get("edad_aproximada"),
+            participant_email=row.datos_participante.get("email_opcional"),
+            texto_seleccionado=row.texto_id,
+            estado=row.estado,
+            created_at=to_local_iso(row.created_at) or "",
+            recordings_count=row.recordings_count,
+            surveys_count=row.surveys_count,
+            first_survey_id=row.first_survey_id,
+            total_duration_seconds=row.total_duration,
+            last_activity=to_local_iso(row.last_activity),
+        ).model_dump()
+        for row in rows
+    ]
+    return _dataset_page(dataset, rows[-1].id if rows else None, total_sessions, limit)
+
+
+def _build_dataset_page(sessions: Sequence[SessionModel], total_sessions: int, limit: int) -> dict:
     dataset = []
     for session in sessions:
-        # Get recordings and surveys count
-        recordings_count = db.query(Recording).filter(Recording.session_id == session.id).count()
-        surveys_count = db.query(Survey).filter(Survey.session_id == session.id).count()
-        
-        # Get recordings data
-        recordings = db.query(Recording).filter(Recording.session_id == session.id).all()
+        recordings = sorted(session.recordings, key=lambda item: item.id)
+        surveys = sorted(session.surveys, key=lambda item: item.id)
         recording_items = [
             {
                 "id": rec.id,
@@ -69,11 +205,8 @@ def get_dataset(
             }
             for rec in recordings
         ]
-        
-        # Get survey data
-        surveys = db.query(Survey).filter(Survey.session_id == session.id).all()
         survey_responses = [surv.respuestas_json for surv in surveys]
-        
+
         entry = {
             "session_id": session.id,
             "session_code": session.session_code,
@@ -83,202 +216,141 @@ def get_dataset(
             "texto_seleccionado": session.texto_seleccionado,
             "estado": session.estado,
             "created_at": to_local_iso(session.created_at) or "",
-            "recordings_count": recordings_count,
+            "recordings_count": len(recording_items),
             "recordings": recording_items,
-            "surveys_count": surveys_count,
+            "surveys_count": len(survey_responses),
             "survey_responses": survey_responses
         }
         dataset.append(entry)
-    
-    return {"dataset": dataset, "total_sessions": len(dataset)}
+
+    return _dataset_page(dataset, sessions[-1].id if sessions else None, total_sessions, limit)
+
+
+@router.get("/dataset")
+def get_dataset(
+    role: str = Depends(get_current_user_role),
+    db: Session = Depends(get_db),
+    after_id: Optional[int] = Query(None, ge=0, description="Return sessions with id greater than this value"),
+    limit: int = Query(DATASET_PAGE_DEFAULT, ge=1, le=DATASET_PAGE_MAX),
+    estado: Optional[SessionState] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    summary: bool = Query(False, description="Counts, duration and last activity from session_stats instead of nested recordings and surveys"),
+):
+    """Get a page of the dataset for ANALISTA role (sessions with recordings and surveys).
+
+    Uses keyset pagination on ``sessions.id``: pass ``next_after_id`` from the
+    previous response as ``after_id`` to fetch the next page. With
+    ``summary=true`` each entry is a ``DatasetEntry`` read from the
+    ``session_stats`` table, without the recordings and survey responses.
+    """
+    # Check if user has ANALISTA role
+    if role != "ANALISTA":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ANALISTA users can access the dataset"
+        )
+
+    filters = _dataset_filters(estado, created_from, created_to)
+
+    # Total comes from an aggregate, never from materializing the rows
+    total_sessions = db.execute(_dataset_count_statement(filters)).scalar() or 0
+    if summary:
+        rows = db.execute(_dataset_summary_statement(filters, after_id, limit)).all()
+        return _build_dataset_summary_page(rows, total_sessions, limit)
+    sessions = db.execute(_dataset_page_statement(filters, after_id, limit)).scalars().all()
+    return _build_dataset_page(sessions, total_sessions, limit)
+
+
+@async_router.get("/dataset")
+async def get_dataset_async(
+    role: str = Depends(get_current_user_role_async),
+    db: AsyncSession = Depends(get_async_db),
+    after_id: Optional[int] = Query(None, ge=0, description="Return sessions with id greater than this value"),
+    limit: int = Query(DATASET_PAGE_DEFAULT, ge=1, le=DATASET_PAGE_MAX),
+    estado: Optional[SessionState] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    summary: bool = Query(False, description="Counts, duration and last activity from session_stats instead of nested recordings and surveys"),
+):
+    """Get a page of the dataset (async database path, same contract as ``get_dataset``)."""
+    if role != "ANALISTA":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ANALISTA users can access the dataset"
+        )
+
+    filters = _dataset_filters(estado, created_from, created_to)
+    total_sessions = (await db.execute(_dataset_count_statement(filters))).scalar() or 0
+    if summary:
+        rows = (await db.execute(_dataset_summary_statement(filters, after_id, limit))).all()
+        return _build_dataset_summary_page(rows, total_sessions, limit)
+    sessions = (await db.execute(_dataset_page_statement(filters, after_id, limit))).scalars().all()
+    return _build_dataset_page(sessions, total_sessions, limit)
+
+
+@router.get("/dataset/stats")
+def get_dataset_statistics(
+    role: str = Depends(get_current_user_role),
+    db: Session = Depends(get_db),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """Aggregate statistics for the analyst dashboard (state funnel, per day/text counts, durations).
+
+    Computed with GROUP BY queries and cached for
+    ``DATASET_STATS_CACHE_TTL_SECONDS`` (see ``services.dataset_stats``).
+    """
+    if role != "ANALISTA":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ANALISTA users can access the dataset"
+        )
+
+    return get_dataset_stats(db, created_from, created_to)
 
 
 @router.get("/dataset/export")
 def export_dataset_csv(
     role: str = Depends(get_current_user_role),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    compression_level: Optional[int] = Query(None, ge=0, le=9, description="zlib level for deflated entries"),
+    since: Optional[datetime] = Query(None, description="Only export changes after this watermark (next_since from a previous manifest.json)"),
+    include_audio: bool = Query(True, description="False exports only the metadata files and manifest.json"),
+    survey_layout: Optional[SurveyLayout] = Query(None, description="surveys CSV layout (default EXPORT_SURVEY_LAYOUT)"),
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format", description="csv or parquet metadata files"),
 ):
-    """Export dataset as ZIP (CSV + audio files) for ANALISTA role."""
+    """Export dataset as a streamed ZIP (CSV or Parquet + audio files) for ANALISTA role.
+
+    Metadata-only CSV exports (``include_audio=false``) are built with
+    Postgres ``COPY`` when the database supports it.
+    """
     # Check if user has ANALISTA role
     if role != "ANALISTA":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only ANALISTA users can export the dataset"
         )
-    
+
+    zip_name = f"dataset_export_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+    headers = {"Content-Disposition": f"attachment; filename=\"{zip_name}\""}
+
+    if not include_audio:
+        # Metadata is loaded up front so the stream does not depend on the request DB session
+        if export_format == ExportFormat.CSV and settings.EXPORT_METADATA_COPY and supports_copy(db):
+            export = SqlDatasetExport.load(db, since=since, survey_layout=survey_layout)
+            chunks = iter_sql_dataset_zip(export, compresslevel=compression_level)
+        else:
+            export = DatasetExport.load(db, since=since, survey_layout=survey_layout, export_format=export_format)
+            chunks = iter_dataset_zip(export, None, compresslevel=compression_level, include_audio=False)
+        return StreamingResponse(chunks, media_type="application/zip", headers=headers)
+
     if not settings.R2_BUCKET:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="R2_BUCKET is not configured"
         )
 
-    sessions = db.query(SessionModel).all()
-    session_map = {session.id: session for session in sessions}
-
-    recordings = db.query(Recording).all()
-    recordings_by_session: Dict[int, List[Recording]] = {}
-    for recording in recordings:
-        recordings_by_session.setdefault(recording.session_id, []).append(recording)
-
-    surveys = db.query(Survey).all()
-    surveys_by_session: Dict[int, List[Survey]] = {}
-    for survey in surveys:
-        surveys_by_session.setdefault(survey.session_id, []).append(survey)
-
-    def resolve_extension(recording: Recording) -> str:
-        if recording.formato:
-            if "/" in recording.formato:
-                return recording.formato.split("/")[-1].strip() or "webm"
-            if recording.formato.startswith("."):
-                return recording.formato[1:]
-            return recording.formato
-        if recording.storage_key:
-            suffix = Path(recording.storage_key).suffix
-            if suffix:
-                return suffix.lstrip(".")
-        return "webm"
-
-    def build_dataset_csv(zip_handle: zipfile.ZipFile, s3_client) -> None:
-        dataset_buffer = io.StringIO()
-        writer = csv.writer(dataset_buffer)
-        writer.writerow([
-            "session_id",
-            "session_code",
-            "recording_id",
-            "audio_file",
-            "formato",
-            "duration_seconds",
-            "uploaded_at",
-            "survey_id",
-            "survey_completed_at",
-            "audio_missing",
-        ])
-
-        for session in sessions:
-            session_recordings = recordings_by_session.get(session.id, [])
-            session_surveys = surveys_by_session.get(session.id, [])
-            survey_to_use = None
-            if session_surveys:
-                survey_to_use = sorted(session_surveys, key=lambda item: item.created_at or datetime.min)[0]
-
-            if not session_recordings:
-                writer.writerow([
-                    session.id,
-                    session.session_code,
-                    "",
-                    "",
-                    "",
-                    "",
-                    "",
-                    survey_to_use.id if survey_to_use else "",
-                    to_local_iso(survey_to_use.created_at) if survey_to_use else "",
-                    True,
-                ])
-                continue
-
-            for recording in session_recordings:
-                storage_key = recording.storage_key
-                audio_missing = False
-                audio_path = ""
-                formato = resolve_extension(recording)
-                if storage_key:
-                    try:
-                        response = s3_client.get_object(Bucket=settings.R2_BUCKET, Key=storage_key)
-                        audio_bytes = response["Body"].read()
-                        audio_path = f"audios/{session.session_code}__{recording.id}.{formato}"
-                        zip_handle.writestr(audio_path, audio_bytes)
-                    except Exception as exc:
-                        audio_missing = True
-                        audio_path = ""
-                        logger.warning("Failed to download audio from R2: %s", exc)
-                else:
-                    audio_missing = True
-
-                writer.writerow([
-                    session.id,
-                    session.session_code,
-                    recording.id,
-                    audio_path,
-                    formato,
-                    recording.duracion_segundos or "",
-                    to_local_iso(recording.created_at) or "",
-                    survey_to_use.id if survey_to_use else "",
-                    to_local_iso(survey_to_use.created_at) if survey_to_use else "",
-                    audio_missing,
-                ])
-
-        zip_handle.writestr("dataset.csv", dataset_buffer.getvalue())
-
-    def build_surveys_csv(zip_handle: zipfile.ZipFile) -> None:
-        surveys_buffer = io.StringIO()
-        all_keys: List[str] = []
-        key_sets = []
-
-        for survey in surveys:
-            keys = sorted(survey.respuestas_json.keys()) if survey.respuestas_json else []
-            key_sets.append(keys)
-            for key in keys:
-                if key not in all_keys:
-                    all_keys.append(key)
-
-        if surveys and key_sets and all(keys == key_sets[0] for keys in key_sets):
-            writer = csv.writer(surveys_buffer)
-            writer.writerow([
-                "survey_id",
-                "session_id",
-                "session_code",
-                "created_at",
-                *all_keys,
-            ])
-            for survey in surveys:
-                session = session_map.get(survey.session_id)
-                row = [
-                    survey.id,
-                    survey.session_id,
-                    session.session_code if session else "",
-                    to_local_iso(survey.created_at) or "",
-                ]
-                for key in all_keys:
-                    row.append(survey.respuestas_json.get(key, "") if survey.respuestas_json else "")
-                writer.writerow(row)
-        else:
-            writer = csv.writer(surveys_buffer)
-            writer.writerow([
-                "survey_id",
-                "session_id",
-                "session_code",
-                "created_at",
-                "question_key",
-                "answer_value",
-            ])
-            for survey in surveys:
-                session = session_map.get(survey.session_id)
-                responses = survey.respuestas_json or {}
-                if not responses:
-                    writer.writerow([
-                        survey.id,
-                        survey.session_id,
-                        session.session_code if session else "",
-                        to_local_iso(survey.created_at) or "",
-                        "",
-                        "",
-                    ])
-                    continue
-                for key, value in responses.items():
-                    writer.writerow([
-                        survey.id,
-                        survey.session_id,
-                        session.session_code if session else "",
-                        to_local_iso(survey.created_at) or "",
-                        key,
-                        value,
-                    ])
-
-        zip_handle.writestr("surveys.csv", surveys_buffer.getvalue())
-
-    zip_buffer = io.BytesIO()
-    zip_name = f"dataset_export_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
-
     try:
         s3_client = get_s3_client()
     except Exception as exc:
@@ -287,13 +359,64 @@ def export_dataset_csv(
             detail=f"Error initializing storage client: {exc}"
         )
 
-    with zipfile.ZipFile(zip_buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zip_handle:
-        build_dataset_csv(zip_handle, s3_client)
-        build_surveys_csv(zip_handle)
+    export = DatasetExport.load(db, since=since, survey_layout=survey_layout, export_format=export_format)
 
-    zip_buffer.seek(0)
     return StreamingResponse(
-        zip_buffer,
+        iter_dataset_zip(export, s3_client, compresslevel=compression_level),
         media_type="application/zip",
-        headers={"Content-Disposition": f"attachment; filename=\"{zip_name}\""}
+        headers=headers
     )
+
+
+@router.post("/dataset/export/jobs", response_model=ExportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_export_job_endpoint(
+    background_tasks: BackgroundTasks,
+    payload: Optional[ExportJobCreate] = None,
+    role: str = Depends(get_current_user_role),
+    db: Session = Depends(get_db),
+):
+    """Start a background export, or reuse the cached archive if the data is unchanged."""
+    if role != "ANALISTA":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ANALISTA users can export the dataset"
+        )
+
+    if not settings.R2_BUCKET:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="R2_BUCKET is not configured"
+        )
+
+    compression_level = payload.compression_level if payload else None
+    since = payload.since if payload else None
+    job, reused = create_export_job(db, compression_level, since)
+    if not reused:
+        background_tasks.add_task(run_export_job, job.id)
+    # Opportunistic cleanup of archives past EXPORT_ARTIFACT_TTL_SECONDS
+    background_tasks.add_task(expire_old_artifacts)
+
+    return _build_export_job_response(job, reused=reused)
+
+
+@router.get("/dataset/export/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(
+    job_id: int,
+    role: str = Depends(get_current_user_role),
+    db: Session = Depends(get_db),
+):
+    """Poll an export job; finished jobs include a presigned download URL."""
+    if role != "ANALISTA":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only ANALISTA users can export the dataset"
+        )
+
+    job = db.query(ExportJob).filter(ExportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Export job with id {job_id} not found"
+        )
+
+    return _build_export_job_response(job)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Header, HTTPException, status
+from typing import Any, Dict, Optional
+import secrets
+
+from ...core.config import settings
+from ...core.password_hashing import password_hasher
+from ...db.pool_metrics import pool_stats
+from ...db.session import engine
+
+router = APIRouter()
+
+
+def _require_metrics_token(token: Optional[str]) -> None:
+    # Without a configured token the endpoint does not exist.
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not token or not secrets.compare_digest(token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+
+
+@router.get("/internal/metrics")
+def get_internal_metrics(x_metrics_token: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """Process-level resource metrics for monitoring (DB pool, password hashing)."""
+    _require_metrics_token(x_metrics_token)
+    return {
+        "db_pool": pool_stats(engine),
+        "password_hashing": password_hasher.stats(),
+    }
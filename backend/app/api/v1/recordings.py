@@ -1,21 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 from uuid import uuid4
 from pathlib import Path
 
 from ...db.session import get_db
+from ...db.async_session import get_async_db
 from ...models.recording import Recording
 from ...models.session import Session as SessionModel
+from ...models.resumable_upload import ResumableUpload
+from ...services import recording_probe, resumable_uploads, session_stats
+from ...services.resumable_uploads import InvalidPart, ResumableUploadStatus
+from ...services.dataset_stats import stats_cache
 from ...core.state_machine import SessionState
 from ...core.security import get_current_user_role
 from ...core.config import settings
 from ...core.time import to_local_iso
-from ...core.storage_r2 import upload_fileobj, presign_get_url
+from ...core.storage_r2 import (
+    UploadTooLarge,
+    upload_stream,
+    presign_get_url_cached,
+    presign_put_url,
+    create_multipart_upload,
+    presign_upload_part_url,
+    complete_multipart_upload,
+    head_object,
+    delete_object,
+)
 
 router = APIRouter()
 
+# Async versions of the hot endpoints (see sessions.async_router).
+async_router = APIRouter(include_in_schema=False)
+
+MAX_DIRECT_UPLOAD_PARTS = 1000
+
 
 class RecordingCreate(BaseModel):
     """Schema for creating a recording (mock for now)."""
@@ -38,6 +59,146 @@ class RecordingResponse(BaseModel):
         from_attributes = True
 
 
+class DownloadUrlsRequest(BaseModel):
+    """Schema for requesting download URLs for many recordings."""
+    recording_ids: List[int] = Field(..., min_length=1, max_length=500)
+    expires_seconds: int = Field(600, ge=1, le=7 * 24 * 3600)
+
+
+class DownloadUrlItem(BaseModel):
+    """A presigned download URL for one recording."""
+    recording_id: int
+    download_url: str
+    expires_in: int
+
+
+class DownloadUrlsResponse(BaseModel):
+    """Schema for batch download URLs."""
+    urls: List[DownloadUrlItem]
+    missing: List[int]
+
+
+class DirectUploadRequest(BaseModel):
+    """Schema for requesting a presigned direct-to-R2 upload."""
+    filename: Optional[str] = None
+    content_type: Optional[str] = "audio/wav"
+    parts: int = Field(1, ge=1, le=MAX_DIRECT_UPLOAD_PARTS, description="Use >1 for a multipart upload (parts of >= 5 MiB except the last)")
+
+
+class UploadPartUrl(BaseModel):
+    """Presigned URL for one part of a multipart upload."""
+    part_number: int
+    upload_url: str
+
+
+class DirectUploadResponse(BaseModel):
+    """Where and how the client should PUT the audio."""
+    storage_key: str
+    method: str = "PUT"
+    upload_url: Optional[str] = None  # Single-request upload
+    headers: Dict[str, str] = {}
+    upload_id: Optional[str] = None  # Multipart upload
+    part_urls: List[UploadPartUrl] = []
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    """A part uploaded by the client (ETag as returned by R2)."""
+    part_number: int = Field(..., ge=1)
+    etag: str
+
+
+class DirectUploadComplete(BaseModel):
+    """Schema for registering a recording after a direct upload."""
+    storage_key: str
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    upload_id: Optional[str] = None
+    parts: List[CompletedPart] = []
+
+
+class ResumableUploadCreate(BaseModel):
+    """Schema for starting a resumable upload."""
+    total_size: int = Field(..., gt=0, description="Size of the whole file in bytes")
+    filename: Optional[str] = None
+    content_type: Optional[str] = "audio/wav"
+
+
+class ResumableUploadState(BaseModel):
+    """What the server has received so far for a resumable upload."""
+    upload_token: str
+    session_id: int
+    status: str
+    total_size: int
+    part_size: int
+    part_count: int
+    received_bytes: int
+    offset: int  # Contiguous bytes received from the start
+    received_ranges: List[List[int]]  # Half-open [start, end) byte ranges
+    missing_parts: List[int]
+    expires_at: Optional[str] = None
+    recording_id: Optional[int] = None
+
+
+def _get_session_or_404(db: Session, session_id: int) -> SessionModel:
+    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session with id {session_id} not found"
+        )
+    return session
+
+
+def _build_storage_key(session_id: int, filename: Optional[str]) -> str:
+    original_ext = Path(filename or "").suffix or ".wav"
+    return f"{_session_key_prefix(session_id)}{uuid4()}{original_ext}"
+
+
+def _session_key_prefix(session_id: int) -> str:
+    return f"recordings/session_{session_id}/"
+
+
+def _mark_audio_uploaded(session: SessionModel) -> None:
+    # Update session state to audio_uploaded if it's in running state
+    if session.estado == SessionState.RUNNING.value:
+        session.estado = SessionState.AUDIO_UPLOADED.value
+
+
+def _register_recording(
+    db: Session,
+    session: SessionModel,
+    recording: Recording,
+    upload: Optional[ResumableUpload] = None,
+) -> None:
+    """Persist a recording, count it in session_stats and move the session from RUNNING to AUDIO_UPLOADED.
+
+    ``upload`` (a resumable upload) is marked completed and linked to the
+    recording in the same commit.
+    """
+    db.add(recording)
+    _mark_audio_uploaded(session)
+    db.flush()
+    db.execute(session_stats.recording_added(db, recording))
+    if upload is not None:
+        upload.recording_id = recording.id
+        upload.status = ResumableUploadStatus.COMPLETED.value
+    db.commit()
+    stats_cache.invalidate()
+    db.refresh(recording)
+
+
+def _build_recording_response(recording: Recording) -> RecordingResponse:
+    return RecordingResponse(
+        id=recording.id,
+        session_id=recording.session_id,
+        storage_key=recording.storage_key,
+        duracion_segundos=recording.duracion_segundos,
+        formato=recording.formato,
+        created_at=to_local_iso(recording.created_at) or ""
+    )
+
+
 @router.post("/sessions/{session_id}/recording", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
 def create_recording(
     session_id: int,
@@ -63,32 +224,21 @@ def create_recording(
         metadata_carga=recording_data.metadata_carga or {}
     )
     
-    db.add(recording)
-    
-    # Update session state to audio_uploaded if it's in running state
-    if session.estado == SessionState.RUNNING.value:
-        session.estado = SessionState.AUDIO_UPLOADED.value
-    
-    db.commit()
-    db.refresh(recording)
-    
-    return RecordingResponse(
-        id=recording.id,
-        session_id=recording.session_id,
-        storage_key=recording.storage_key,
-        duracion_segundos=recording.duracion_segundos,
-        formato=recording.formato,
-        created_at=to_local_iso(recording.created_at) or ""
-    )
+    _register_recording(db, session, recording)
+    return _build_recording_response(recording)
 
 
 @router.post("/sessions/{session_id}/upload", response_model=RecordingResponse)
-async def upload_audio_file(
+def upload_audio_file(
     session_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Upload audio file to Cloudflare R2 and register the recording."""
+    """Upload audio file to Cloudflare R2 and register the recording.
+
+    Runs on the threadpool: the (already spooled) file is streamed to R2 in
+    parts, with the size limit, byte count and SHA-256 computed on the fly.
+    """
     # Check if session exists
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     
@@ -97,19 +247,28 @@ async def upload_audio_file(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Session with id {session_id} not found"
         )
-    
+
+    # End the lookup's transaction before the (slow) upload, so the
+    # recording's created_at is stamped close to its commit (delta exports)
+    db.rollback()
+
     # Build storage key
-    original_ext = Path(file.filename or "").suffix or ".wav"
-    storage_key = f"recordings/session_{session_id}/{uuid4()}{original_ext}"
+    storage_key = _build_storage_key(session_id, file.filename)
 
     # Upload to R2 (private bucket)
     try:
         file.file.seek(0)
-        upload_fileobj(
+        size_bytes, sha256 = upload_stream(
             file.file,
             bucket=settings.R2_BUCKET,
             key=storage_key,
             content_type=file.content_type or "audio/wav",
+            max_bytes=settings.MAX_AUDIO_SIZE_MB * 1024 * 1024,
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(exc)
         )
     except Exception as exc:
         raise HTTPException(
@@ -124,29 +283,322 @@ async def upload_audio_file(
         metadata_carga={
             "filename": file.filename,
             "content_type": file.content_type,
-            "storage": "r2"
+            "storage": "r2",
+            "size_bytes": size_bytes,
+            "sha256": sha256,
         }
     )
-    
-    db.add(recording)
-    
-    # Update session state
-    if session.estado == SessionState.RUNNING.value:
-        session.estado = SessionState.AUDIO_UPLOADED.value
-    
-    db.commit()
-    db.refresh(recording)
-    
-    return RecordingResponse(
-        id=recording.id,
-        session_id=recording.session_id,
-        storage_key=recording.storage_key,
-        duracion_segundos=recording.duracion_segundos,
-        formato=recording.formato,
-        created_at=to_local_iso(recording.created_at) or ""
+    # The spooled upload is still local: read its headers without touching R2
+    recording_probe.apply_probe(recording, recording_probe.probe_fileobj(file.file, size_bytes))
+
+    _register_recording(db, session, recording)
+    return _build_recording_response(recording)
+
+
+@router.post("/sessions/{session_id}/upload-url", response_model=DirectUploadResponse)
+def create_direct_upload(
+    session_id: int,
+    payload: DirectUploadRequest,
+    db: Session = Depends(get_db)
+):
+    """Issue presigned URL(s) so the client uploads audio straight to R2.
+
+    With ``parts == 1`` the client PUTs the file to ``upload_url`` (sending the
+    returned headers); otherwise it PUTs each part to its ``part_urls`` entry
+    and keeps the ETag of every response for the completion call.
+    """
+    _get_session_or_404(db, session_id)
+    storage_key = _build_storage_key(session_id, payload.filename)
+    content_type = payload.content_type or "audio/wav"
+    expires_in = settings.DIRECT_UPLOAD_EXPIRES_SECONDS
+
+    try:
+        if payload.parts == 1:
+            return DirectUploadResponse(
+                storage_key=storage_key,
+                upload_url=presign_put_url(
+                    bucket=settings.R2_BUCKET,
+                    key=storage_key,
+                    content_type=content_type,
+                    expires_seconds=expires_in,
+                ),
+                headers={"Content-Type": content_type},
+                expires_in=expires_in,
+            )
+
+        upload_id = create_multipart_upload(
+            bucket=settings.R2_BUCKET,
+            key=storage_key,
+            content_type=content_type,
+        )
+        part_urls = [
+            UploadPartUrl(
+                part_number=part_number,
+                upload_url=presign_upload_part_url(
+                    bucket=settings.R2_BUCKET,
+                    key=storage_key,
+                    upload_id=upload_id,
+                    part_number=part_number,
+                    expires_seconds=expires_in,
+                ),
+            )
+            for part_number in range(1, payload.parts + 1)
+        ]
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating upload URL: {exc}"
+        )
+
+    return DirectUploadResponse(
+        storage_key=storage_key,
+        upload_id=upload_id,
+        part_urls=part_urls,
+        expires_in=expires_in,
     )
 
 
+@router.post("/sessions/{session_id}/upload-complete", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
+def complete_direct_upload(
+    session_id: int,
+    payload: DirectUploadComplete,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Verify a direct upload with a HEAD request and register the recording."""
+    session = _get_session_or_404(db, session_id)
+
+    if not payload.storage_key.startswith(_session_key_prefix(session_id)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="storage_key does not belong to this session"
+        )
+
+    # Completing twice (e.g. a retried request) returns the same recording
+    existing = db.query(Recording).filter(Recording.storage_key == payload.storage_key).first()
+    if existing:
+        return _build_recording_response(existing)
+
+    try:
+        if payload.upload_id:
+            complete_multipart_upload(
+                bucket=settings.R2_BUCKET,
+                key=payload.storage_key,
+                upload_id=payload.upload_id,
+                parts=[{"PartNumber": part.part_number, "ETag": part.etag} for part in payload.parts],
+            )
+        head = head_object(bucket=settings.R2_BUCKET, key=payload.storage_key)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error verifying upload in storage: {exc}"
+        )
+
+    if head is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Uploaded object not found in storage"
+        )
+
+    size_bytes = head.get("ContentLength", 0)
+    if size_bytes > settings.MAX_AUDIO_SIZE_MB * 1024 * 1024:
+        delete_object(bucket=settings.R2_BUCKET, key=payload.storage_key)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the maximum size of {settings.MAX_AUDIO_SIZE_MB} MB"
+        )
+
+    content_type = payload.content_type or head.get("ContentType") or "audio/wav"
+    recording = Recording(
+        session_id=session_id,
+        storage_key=payload.storage_key,
+        formato=content_type,
+        metadata_carga={
+            "filename": payload.filename,
+            "content_type": content_type,
+            "storage": "r2",
+            "upload": "direct",
+            "size_bytes": size_bytes,
+            "etag": (head.get("ETag") or "").strip('"'),
+        }
+    )
+    _register_recording(db, session, recording)
+    background_tasks.add_task(recording_probe.probe_recording, recording.id)
+    return _build_recording_response(recording)
+
+
+def _build_resumable_state(upload: ResumableUpload) -> ResumableUploadState:
+    return ResumableUploadState(
+        upload_token=upload.id,
+        session_id=upload.session_id,
+        status=upload.status,
+        total_size=upload.total_size,
+        part_size=upload.part_size,
+        part_count=resumable_uploads.part_count(upload),
+        received_bytes=resumable_uploads.received_bytes(upload),
+        offset=resumable_uploads.contiguous_offset(upload),
+        received_ranges=[list(r) for r in resumable_uploads.received_ranges(upload)],
+        missing_parts=resumable_uploads.missing_part_numbers(upload),
+        expires_at=to_local_iso(upload.expires_at),
+        recording_id=upload.recording_id,
+    )
+
+
+def _get_resumable_upload(db: Session, upload_token: str, pending: bool = True) -> ResumableUpload:
+    upload = db.get(ResumableUpload, upload_token)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    if pending and upload.status == ResumableUploadStatus.PENDING.value and resumable_uploads.is_expired(upload):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Upload expired, start a new one"
+        )
+    if pending and upload.status in (ResumableUploadStatus.ABORTED.value, ResumableUploadStatus.EXPIRED.value):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Upload is {upload.status}, start a new one"
+        )
+    return upload
+
+
+@router.post("/sessions/{session_id}/resumable-uploads", response_model=ResumableUploadState, status_code=status.HTTP_201_CREATED)
+def create_resumable_upload(
+    session_id: int,
+    payload: ResumableUploadCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Start an upload that the client sends in fixed-size parts and can resume.
+
+    The response gives the ``upload_token`` and the ``part_size``; every part
+    except the last must have exactly that size.
+    """
+    _get_session_or_404(db, session_id)
+
+    if payload.total_size > settings.MAX_AUDIO_SIZE_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the maximum size of {settings.MAX_AUDIO_SIZE_MB} MB"
+        )
+
+    try:
+        upload = resumable_uploads.create_resumable_upload(
+            db,
+            session_id=session_id,
+            storage_key=_build_storage_key(session_id, payload.filename),
+            total_size=payload.total_size,
+            filename=payload.filename,
+            content_type=payload.content_type,
+        )
+    except InvalidPart as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error starting upload in storage: {exc}"
+        )
+
+    # Opportunistic cleanup of uploads abandoned by other clients
+    background_tasks.add_task(resumable_uploads.expire_stale_uploads)
+    return _build_resumable_state(upload)
+
+
+@router.get("/resumable-uploads/{upload_token}", response_model=ResumableUploadState)
+def get_resumable_upload(upload_token: str, db: Session = Depends(get_db)):
+    """Report which parts and byte ranges have been received."""
+    return _build_resumable_state(_get_resumable_upload(db, upload_token, pending=False))
+
+
+@router.put("/resumable-uploads/{upload_token}/parts/{part_number}", response_model=ResumableUploadState)
+def upload_resumable_part(
+    upload_token: str,
+    part_number: int,
+    data: bytes = Body(..., media_type="application/octet-stream"),
+    db: Session = Depends(get_db)
+):
+    """Store one part (raw bytes, ``Content-Type: application/octet-stream``).
+
+    Parts may be sent in any order and re-sent after a failure.
+    """
+    upload = _get_resumable_upload(db, upload_token)
+    if upload.status == ResumableUploadStatus.COMPLETED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already completed"
+        )
+
+    try:
+        upload = resumable_uploads.store_part(db, upload, part_number, data)
+    except InvalidPart as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error storing part in storage: {exc}"
+        )
+    return _build_resumable_state(upload)
+
+
+@router.post("/resumable-uploads/{upload_token}/complete", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
+def complete_resumable_upload(
+    upload_token: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Assemble the parts and register the recording (idempotent)."""
+    upload = _get_resumable_upload(db, upload_token)
+    if upload.status == ResumableUploadStatus.COMPLETED.value:
+        return _build_recording_response(db.get(Recording, upload.recording_id))
+
+    missing = resumable_uploads.missing_part_numbers(upload)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Upload is missing parts", "missing_parts": missing}
+        )
+
+    try:
+        resumable_uploads.complete_parts(upload)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error completing upload in storage: {exc}"
+        )
+
+    content_type = upload.content_type or "audio/wav"
+    recording = Recording(
+        session_id=upload.session_id,
+        storage_key=upload.storage_key,
+        formato=content_type,
+        metadata_carga={
+            "filename": upload.filename,
+            "content_type": content_type,
+            "storage": "r2",
+            "upload": "resumable",
+            "size_bytes": upload.total_size,
+        }
+    )
+    session = _get_session_or_404(db, upload.session_id)
+    _register_recording(db, session, recording, upload=upload)
+    background_tasks.add_task(recording_probe.probe_recording, recording.id)
+    return _build_recording_response(recording)
+
+
+@router.delete("/resumable-uploads/{upload_token}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_resumable_upload(upload_token: str, db: Session = Depends(get_db)):
+    """Cancel an unfinished upload and discard the stored parts."""
+    upload = _get_resumable_upload(db, upload_token)
+    if upload.status == ResumableUploadStatus.COMPLETED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already completed"
+        )
+    resumable_uploads.abort_resumable_upload(db, upload)
+
+
 @router.get("/recordings/{recording_id}/download")
 def get_recording_download_url(
     recording_id: int,
@@ -166,7 +618,7 @@ def get_recording_download_url(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Recording has no storage key")
 
     try:
-        presigned_url = presign_get_url(
+        presigned_url, expires_in = presign_get_url_cached(
             bucket=settings.R2_BUCKET,
             key=recording.storage_key,
             expires_seconds=expires_seconds,
@@ -177,5 +629,79 @@ def get_recording_download_url(
     return {
         "recording_id": recording_id,
         "download_url": presigned_url,
-        "expires_in": expires_seconds,
+        "expires_in": expires_in,
     }
+
+
+@router.post("/recordings/download-urls", response_model=DownloadUrlsResponse)
+def get_recording_download_urls(
+    payload: DownloadUrlsRequest,
+    current_role: str = Depends(get_current_user_role),
+    db: Session = Depends(get_db),
+):
+    """Return presigned URLs for many recordings in one call (ANALISTA only)."""
+    if current_role != "ANALISTA":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only ANALISTA can download recordings")
+
+    requested_ids = list(dict.fromkeys(payload.recording_ids))
+    rows = (
+        db.query(Recording.id, Recording.storage_key)
+        .filter(Recording.id.in_(requested_ids))
+        .all()
+    )
+    storage_keys = {row.id: row.storage_key for row in rows if row.storage_key}
+
+    urls: List[DownloadUrlItem] = []
+    missing: List[int] = []
+    try:
+        for recording_id in requested_ids:
+            storage_key = storage_keys.get(recording_id)
+            if not storage_key:
+                missing.append(recording_id)
+                continue
+            presigned_url, expires_in = presign_get_url_cached(
+                bucket=settings.R2_BUCKET,
+                key=storage_key,
+                expires_seconds=payload.expires_seconds,
+            )
+            urls.append(DownloadUrlItem(
+                recording_id=recording_id,
+                download_url=presigned_url,
+                expires_in=expires_in,
+            ))
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error generating download URL: {exc}")
+
+    return DownloadUrlsResponse(urls=urls, missing=missing)
+
+
+@async_router.post("/sessions/{session_id}/recording", response_model=RecordingResponse, status_code=status.HTTP_201_CREATED)
+async def create_recording_async(
+    session_id: int,
+    recording_data: RecordingCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a recording for a session (async database path)."""
+    session = await db.get(SessionModel, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session with id {session_id} not found"
+        )
+
+    recording = Recording(
+        session_id=session_id,
+        storage_key=recording_data.storage_key,
+        duracion_segundos=recording_data.duracion_segundos,
+        formato=recording_data.formato,
+        metadata_carga=recording_data.metadata_carga or {}
+    )
+    db.add(recording)
+    _mark_audio_uploaded(session)
+    await db.flush()
+    await db.execute(session_stats.recording_added(db, recording))
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(recording)
+
+    return _build_recording_response(recording)
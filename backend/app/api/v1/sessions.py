@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 import json
 from ...db.session import get_db
+from ...db.async_session import get_async_db
 from ...models.session import Session as SessionModel
+from ...services import session_stats
+from ...services.dataset_stats import stats_cache
 from ...core.state_machine import SessionState, SessionStateMachine
 from ...core.time import to_local_iso
 from ...core.text_normalization import normalize_text_object
+from ...core.http_cache import conditional_json_response
 from .texts import get_text_by_id
 
 router = APIRouter()
 
+# Async versions of the hot endpoints, mounted ahead of ``router`` when
+# DB_ASYNC_ENABLED is set. Same paths and contracts, so they stay out of the
+# OpenAPI schema to avoid duplicate operations.
+async_router = APIRouter(include_in_schema=False)
+
+# Sessions change state, so clients must revalidate (ETag) before reusing a copy.
+SESSION_CACHE_CONTROL = "no-cache"
+
 
 def parse_texto_seleccionado(value) -> Dict[str, Any]:
     """Parse texto_seleccionado - handles both dict and JSON string from DB."""
@@ -57,9 +71,24 @@ class StateUpdateRequest(BaseModel):
     new_state: SessionState
 
 
-@router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
-def create_session(session_data: SessionCreate, db: Session = Depends(get_db)):
-    """Create a new training session."""
+def _build_session_response(session: SessionModel) -> SessionResponse:
+    # Stored text is already normalized; the memoized normalizer returns it
+    # without re-wrapping and still covers rows stored before normalization.
+    return SessionResponse(
+        id=session.id,
+        session_code=session.session_code,
+        datos_participante=session.datos_participante,
+        texto_seleccionado=normalize_text_object(
+            parse_texto_seleccionado(session.texto_seleccionado)
+        ),
+        estado=session.estado,
+        created_at=to_local_iso(session.created_at) or "",
+        updated_at=to_local_iso(session.updated_at)
+    )
+
+
+def _build_new_session(session_data: SessionCreate) -> SessionModel:
+    """Resolve and normalize the selected text and build an unsaved session."""
     # Look up the full text by ID
     texto = get_text_by_id(session_data.texto_seleccionado_id)
     if not texto:
@@ -77,27 +106,27 @@ def create_session(session_data: SessionCreate, db: Session = Depends(get_db)):
         texto_seleccionado=texto_normalizado,  # Store the normalized text object as JSON
         estado=SessionState.CREATED.value
     )
-    
+    return new_session
+
+
+@router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+def create_session(session_data: SessionCreate, db: Session = Depends(get_db)):
+    """Create a new training session."""
+    new_session = _build_new_session(session_data)
+
     db.add(new_session)
+    db.flush()
+    db.execute(session_stats.session_created(db, new_session.id))
     db.commit()
+    stats_cache.invalidate()
     db.refresh(new_session)
     
-    return SessionResponse(
-        id=new_session.id,
-        session_code=new_session.session_code,
-        datos_participante=new_session.datos_participante,
-        texto_seleccionado=normalize_text_object(
-            parse_texto_seleccionado(new_session.texto_seleccionado)
-        ),
-        estado=new_session.estado,
-        created_at=to_local_iso(new_session.created_at) or "",
-        updated_at=to_local_iso(new_session.updated_at)
-    )
+    return _build_session_response(new_session)
 
 
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
-def get_session(session_id: int, db: Session = Depends(get_db)):
-    """Get session details by ID."""
+def get_session(session_id: int, request: Request, db: Session = Depends(get_db)):
+    """Get session details by ID (supports If-None-Match)."""
     session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
     
     if not session:
@@ -106,21 +135,15 @@ def get_session(session_id: int, db: Session = Depends(get_db)):
             detail=f"Session with id {session_id} not found"
         )
     
-    return SessionResponse(
-        id=session.id,
-        session_code=session.session_code,
-        datos_participante=session.datos_participante,
-        texto_seleccionado=normalize_text_object(
-            parse_texto_seleccionado(session.texto_seleccionado)
-        ),
-        estado=session.estado,
-        created_at=to_local_iso(session.created_at) or "",
-        updated_at=to_local_iso(session.updated_at)
+    return conditional_json_response(
+        request,
+        _build_session_response(session),
+        cache_control=SESSION_CACHE_CONTROL,
     )
 
 @router.get("/sessions/by-code/{session_code}", response_model=SessionResponse)
-def get_session_by_code(session_code: str, db: Session = Depends(get_db)):
-    """Get session details by session_code (for VR app)."""
+def get_session_by_code(session_code: str, request: Request, db: Session = Depends(get_db)):
+    """Get session details by session_code (for VR app, supports If-None-Match)."""
     session = db.query(SessionModel).filter(SessionModel.session_code == session_code).first()
 
     if not session:
@@ -129,16 +152,10 @@ def get_session_by_code(session_code: str, db: Session = Depends(get_db)):
             detail="Invalid session_code"
         )
 
-    return SessionResponse(
-        id=session.id,
-        session_code=session.session_code,
-        datos_participante=session.datos_participante,
-        texto_seleccionado=normalize_text_object(
-            parse_texto_seleccionado(session.texto_seleccionado)
-        ),
-        estado=session.estado,
-        created_at=to_local_iso(session.created_at) or "",
-        updated_at=to_local_iso(session.updated_at)
+    return conditional_json_response(
+        request,
+        _build_session_response(session),
+        cache_control=SESSION_CACHE_CONTROL,
     )
 
 @router.patch("/sessions/{session_id}/state", response_model=SessionResponse)
@@ -171,16 +188,41 @@ def update_session_state(
     # Update state
     session.estado = new_state.value
     db.commit()
+    stats_cache.invalidate()
     db.refresh(session)
     
-    return SessionResponse(
-        id=session.id,
-        session_code=session.session_code,
-        datos_participante=session.datos_participante,
-        texto_seleccionado=normalize_text_object(
-            parse_texto_seleccionado(session.texto_seleccionado)
-        ),
-        estado=session.estado,
-        created_at=to_local_iso(session.created_at) or "",
-        updated_at=to_local_iso(session.updated_at)
+    return _build_session_response(session)
+
+
+@async_router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_session_async(session_data: SessionCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new training session (async database path)."""
+    new_session = _build_new_session(session_data)
+
+    db.add(new_session)
+    await db.flush()
+    await db.execute(session_stats.session_created(db, new_session.id))
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(new_session)
+
+    return _build_session_response(new_session)
+
+
+@async_router.get("/sessions/by-code/{session_code}", response_model=SessionResponse)
+async def get_session_by_code_async(session_code: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get session details by session_code (async database path)."""
+    result = await db.execute(select(SessionModel).where(SessionModel.session_code == session_code))
+    session = result.scalars().first()
+
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Invalid session_code"
+        )
+
+    return conditional_json_response(
+        request,
+        _build_session_response(session),
+        cache_control=SESSION_CACHE_CONTROL,
     )
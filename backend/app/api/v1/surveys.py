@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Dict, Any, List
 from ...db.session import get_db
+from ...db.async_session import get_async_db
 from ...models.survey import Survey
 from ...models.session import Session as SessionModel
+from ...services import session_stats
+from ...services.dataset_stats import stats_cache
 from ...core.state_machine import SessionState
 from ...core.time import to_local_iso
 
 router = APIRouter()
 
+# Async versions of the hot endpoints (see sessions.async_router).
+async_router = APIRouter(include_in_schema=False)
+
 
 class SurveyCreate(BaseModel):
     """Schema for creating a survey."""
@@ -27,6 +34,21 @@ class SurveyResponse(BaseModel):
         from_attributes = True
 
 
+def _mark_survey_completed(session: SessionModel) -> None:
+    # Update session state to completed if it's in survey_pending state
+    if session.estado == SessionState.SURVEY_PENDING.value:
+        session.estado = SessionState.COMPLETED.value
+
+
+def _build_survey_response(survey: Survey) -> SurveyResponse:
+    return SurveyResponse(
+        id=survey.id,
+        session_id=survey.session_id,
+        respuestas_json=survey.respuestas_json,
+        created_at=to_local_iso(survey.created_at) or ""
+    )
+
+
 @router.post("/sessions/{session_id}/survey", response_model=SurveyResponse, status_code=status.HTTP_201_CREATED)
 def create_survey(
     session_id: int,
@@ -50,20 +72,14 @@ def create_survey(
     )
     
     db.add(survey)
-    
-    # Update session state to completed if it's in survey_pending state
-    if session.estado == SessionState.SURVEY_PENDING.value:
-        session.estado = SessionState.COMPLETED.value
-    
+    _mark_survey_completed(session)
+    db.flush()
+    db.execute(session_stats.survey_added(db, survey))
     db.commit()
+    stats_cache.invalidate()
     db.refresh(survey)
     
-    return SurveyResponse(
-        id=survey.id,
-        session_id=survey.session_id,
-        respuestas_json=survey.respuestas_json,
-        created_at=to_local_iso(survey.created_at) or ""
-    )
+    return _build_survey_response(survey)
 
 
 @router.get("/sessions/{session_id}/survey", response_model=List[SurveyResponse])
@@ -79,12 +95,33 @@ def get_session_surveys(session_id: int, db: Session = Depends(get_db)):
     
     surveys = db.query(Survey).filter(Survey.session_id == session_id).all()
     
-    return [
-        SurveyResponse(
-            id=survey.id,
-            session_id=survey.session_id,
-            respuestas_json=survey.respuestas_json,
-            created_at=to_local_iso(survey.created_at) or ""
+    return [_build_survey_response(survey) for survey in surveys]
+
+
+@async_router.post("/sessions/{session_id}/survey", response_model=SurveyResponse, status_code=status.HTTP_201_CREATED)
+async def create_survey_async(
+    session_id: int,
+    survey_data: SurveyCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a survey for a session (async database path)."""
+    session = await db.get(SessionModel, session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session with id {session_id} not found"
         )
-        for survey in surveys
-    ]
+
+    survey = Survey(
+        session_id=session_id,
+        respuestas_json=survey_data.respuestas_json
+    )
+    db.add(survey)
+    _mark_survey_completed(session)
+    await db.flush()
+    await db.execute(session_stats.survey_added(db, survey))
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(survey)
+
+    return _build_survey_response(survey)
@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, status, Request
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from pathlib import Path
-import json
+from ...core.config import settings
+from ...core.http_cache import conditional_json_response
+from ...core.text_catalog import TextCatalog, normalize_tag_value
 from ...core.text_normalization import normalize_pages
 
 router = APIRouter()
@@ -10,6 +12,12 @@ router = APIRouter()
 # Path to the texts JSON file
 TEXTS_FILE = Path(__file__).parent.parent.parent.parent / "data" / "LecturasToast.json"
 
+text_catalog = TextCatalog(TEXTS_FILE)
+
+
+def _texts_cache_control() -> str:
+    return f"public, max-age={settings.TEXTS_CACHE_MAX_AGE_SECONDS}"
+
 
 class TextSummary(BaseModel):
     """Summary of a text (for listing)."""
@@ -39,14 +47,8 @@ class TagsIndexResponse(BaseModel):
 
 
 def load_texts() -> List[Dict[str, Any]]:
-    """Load all texts from the JSON file."""
-    if not TEXTS_FILE.exists():
-        raise FileNotFoundError(f"Texts file not found: {TEXTS_FILE}")
-    
-    with open(TEXTS_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    return data.get("texts", [])
+    """Return all texts from the in-memory catalog (reloaded if the file changed)."""
+    return text_catalog.all()
 
 
 def get_text_by_id(text_id: str) -> Optional[Dict[str, Any]]:
@@ -54,25 +56,7 @@ def get_text_by_id(text_id: str) -> Optional[Dict[str, Any]]:
     Get a specific text by its Id.
     Returns None if not found.
     """
-    texts = load_texts()
-    return next((t for t in texts if t["Id"] == text_id), None)
-
-
-def _normalize_tag_value(value: Any) -> str:
-    return str(value).strip().casefold()
-
-
-def _matches_tag_filters(text: Dict[str, Any], filters: Dict[str, str]) -> bool:
-    if not filters:
-        return True
-
-    tags = text.get("Tags", {})
-    for key, expected in filters.items():
-        if key not in tags:
-            return False
-        if _normalize_tag_value(tags.get(key, "")) != expected:
-            return False
-    return True
+    return text_catalog.get(text_id)
 
 
 @router.get("/texts", response_model=TextsListResponse)
@@ -81,20 +65,18 @@ def list_texts(request: Request):
     List all available training texts.
     Returns summaries (Id, Title, Tags) without the full Pages array.
     """
+    filters = {
+        key: normalize_tag_value(value)
+        for key, value in request.query_params.items()
+    }
+
     try:
-        texts = load_texts()
+        filtered_texts = text_catalog.filter_by_tags(filters)
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
-    
-    filters = {
-        key: _normalize_tag_value(value)
-        for key, value in request.query_params.items()
-    }
-
-    filtered_texts = [t for t in texts if _matches_tag_filters(t, filters)]
 
     summaries = [
         TextSummary(
@@ -105,29 +87,24 @@ def list_texts(request: Request):
         for t in filtered_texts
     ]
     
-    return TextsListResponse(texts=summaries, total=len(summaries))
+    return conditional_json_response(
+        request,
+        TextsListResponse(texts=summaries, total=len(summaries)),
+        cache_control=_texts_cache_control(),
+    )
 
 
 @router.get("/texts/tags", response_model=TagsIndexResponse)
-def list_text_tags():
+def list_text_tags(request: Request):
     """List available tag keys and their unique values."""
     try:
-        texts = load_texts()
+        values_map = text_catalog.tag_labels()
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-    values_map: Dict[str, Dict[str, str]] = {}
-    for text in texts:
-        tags = text.get("Tags", {})
-        for key, value in tags.items():
-            key_values = values_map.setdefault(key, {})
-            normalized_value = _normalize_tag_value(value)
-            if normalized_value not in key_values:
-                key_values[normalized_value] = str(value).strip()
-
     keys = sorted(values_map.keys())
     values = {
         key: [
@@ -137,11 +114,15 @@ def list_text_tags():
         for key in keys
     }
 
-    return TagsIndexResponse(keys=keys, values=values)
+    return conditional_json_response(
+        request,
+        TagsIndexResponse(keys=keys, values=values),
+        cache_control=_texts_cache_control(),
+    )
 
 
 @router.get("/texts/{text_id}", response_model=TextFull)
-def get_text(text_id: str):
+def get_text(text_id: str, request: Request):
     """
     Get a specific text by Id, including the full Pages array.
     """
@@ -159,11 +140,15 @@ def get_text(text_id: str):
             detail=f"Text with Id '{text_id}' not found"
         )
     
-    normalized_pages = normalize_pages(text.get("Pages", []), start_page_index=2)
-
-    return TextFull(
-        Id=text["Id"],
-        Title=text["Title"],
-        Pages=normalized_pages,
-        Tags=text.get("Tags", {})
+    normalized_pages = normalize_pages(text.get("Pages", []), start_page_index=2, text_id=text["Id"])
+
+    return conditional_json_response(
+        request,
+        TextFull(
+            Id=text["Id"],
+            Title=text["Title"],
+            Pages=normalized_pages,
+            Tags=text.get("Tags", {})
+        ),
+        cache_control=_texts_cache_control(),
     )
\ No newline at end of file
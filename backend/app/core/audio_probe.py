@@ -0,0 +1,362 @@
+"""Read audio duration and stream parameters from container headers.
+
+Only small byte ranges are read: the first ``HEAD_BYTES`` of the object and,
+when the duration is not in the header, the last ``TAIL_BYTES``. Supported
+containers:
+
+- WAV (RIFF/RF64): ``fmt `` chunk + ``data`` chunk size.
+- Ogg (Opus, Vorbis, FLAC): identification header + granule position of the
+  last page.
+- WebM/Matroska: ``Info``/``Tracks`` elements, falling back to the last
+  block timestamp when ``Duration`` is missing (as in MediaRecorder output).
+
+All parsers take ``read_range(start, length) -> bytes`` so they work on top
+of ranged GETs as well as local files.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+import struct
+
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+
+ReadRange = Callable[[int, int], bytes]
+
+
+class AudioInfo(NamedTuple):
+    """Stream parameters found in the container."""
+    container: str  # wav | ogg | webm | matroska
+    codec: Optional[str]
+    duration_seconds: Optional[float]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+
+
+class _Reader:
+    """Serve reads from a cached head and fall back to ranged reads beyond it."""
+
+    def __init__(self, read_range: ReadRange, size: int) -> None:
+        self._read_range = read_range
+        self.size = size
+        self.head = read_range(0, min(size, HEAD_BYTES)) if size else b""
+
+    def read(self, start: int, length: int) -> bytes:
+        length = max(0, min(length, self.size - start))
+        if start + length <= len(self.head):
+            return self.head[start:start + length]
+        if length == 0:
+            return b""
+        return self._read_range(start, length)
+
+    def tail(self) -> Tuple[int, bytes]:
+        start = max(0, self.size - TAIL_BYTES)
+        return start, self.read(start, self.size - start)
+
+
+# --- WAV -------------------------------------------------------------------
+
+_WAV_CODECS = {1: "pcm_s{bits}le", 3: "pcm_f{bits}le", 6: "pcm_alaw", 7: "pcm_mulaw"}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _probe_wav(reader: _Reader) -> AudioInfo:
+    riff_id = reader.head[:4]
+    pos = 12
+    channels = sample_rate = byte_rate = None
+    codec = None
+    data_size = None
+    ds64_data_size = None
+
+    while pos + 8 <= reader.size and (byte_rate is None or data_size is None):
+        chunk_id, chunk_size = struct.unpack("<4sI", reader.read(pos, 8))
+        body_start = pos + 8
+
+        if chunk_id == b"ds64":
+            ds64_data_size = struct.unpack("<Q", reader.read(body_start + 8, 8))[0]
+        elif chunk_id == b"fmt ":
+            fmt = reader.read(body_start, min(chunk_size, 40))
+            audio_format, channels, sample_rate, byte_rate, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                audio_format = struct.unpack("<H", fmt[24:26])[0]
+            codec = _WAV_CODECS.get(audio_format, "wav_0x{fmt:04x}").format(bits=bits, fmt=audio_format)
+        elif chunk_id == b"data":
+            if riff_id == b"RF64" and chunk_size == 0xFFFFFFFF and ds64_data_size is not None:
+                chunk_size = ds64_data_size
+            # Streaming writers leave 0 / 0xFFFFFFFF; trust the object size then.
+            available = reader.size - body_start
+            if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available:
+                chunk_size = available
+            data_size = chunk_size
+
+        pos = body_start + chunk_size + (chunk_size & 1)
+
+    duration = data_size / byte_rate if data_size is not None and byte_rate else None
+    return AudioInfo("wav", codec, duration, sample_rate, channels)
+
+
+# --- Ogg -------------------------------------------------------------------
+
+_OGG_HEADER = struct.Struct("<4sBBqIIIB")
+_OGG_UNKNOWN_GRANULE = -1
+
+
+def _probe_ogg(reader: _Reader) -> AudioInfo:
+    head = reader.head
+    _, _, _, _, serial, _, _, segments = _OGG_HEADER.unpack_from(head, 0)
+    body_start = _OGG_HEADER.size + segments
+    packet = head[body_start:body_start + sum(head[_OGG_HEADER.size:body_start])]
+
+    codec = None
+    channels = sample_rate = None
+    granule_rate = None
+    pre_skip = 0
+    if packet.startswith(b"OpusHead"):
+        codec = "opus"
+        channels = packet[9]
+        pre_skip, input_rate = struct.unpack("<HI", packet[10:16])
+        sample_rate = input_rate or 48000
+        granule_rate = 48000  # Opus granules always count 48 kHz samples
+    elif packet.startswith(b"\x01vorbis"):
+        codec = "vorbis"
+        channels = packet[11]
+        sample_rate = granule_rate = struct.unpack("<I", packet[12:16])[0]
+    elif packet.startswith(b"\x7fFLAC"):
+        codec = "flac"
+        # STREAMINFO follows "\x7fFLAC", version (2), header count (2), "fLaC" and the block header (4)
+        info = packet[17:]
+        packed = int.from_bytes(info[10:13], "big")
+        sample_rate = granule_rate = packed >> 4
+        channels = ((info[12] >> 1) & 0x07) + 1
+
+    duration = None
+    tail_start, tail = reader.tail()
+    pos = len(tail)
+    while granule_rate:
+        pos = tail.rfind(b"OggS", 0, pos)
+        if pos < 0 or pos + _OGG_HEADER.size > len(tail):
+            break
+        _, version, _, granule, page_serial, _, _, _ = _OGG_HEADER.unpack_from(tail, pos)
+        if version == 0 and page_serial == serial and granule != _OGG_UNKNOWN_GRANULE:
+            duration = max(0, granule - pre_skip) / granule_rate
+            break
+
+    return AudioInfo("ogg", codec, duration, sample_rate, channels)
+
+
+# --- WebM / Matroska -------------------------------------------------------
+
+_EBML_HEADER = 0x1A45DFA3
+_EBML_DOCTYPE = 0x4282
+_SEGMENT = 0x18538067
+_INFO = 0x1549A966
+_TIMECODE_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_AUDIO = 0xE1
+_SAMPLING_FREQUENCY = 0xB5
+_CHANNELS = 0x9F
+_CLUSTER = 0x1F43B675
+_CLUSTER_TIMECODE = 0xE7
+_SIMPLE_BLOCK = 0xA3
+_BLOCK_GROUP = 0xA0
+_BLOCK = 0xA1
+_AUDIO_TRACK_TYPE = 2
+_CLUSTER_ID_BYTES = _CLUSTER.to_bytes(4, "big")
+
+
+def _vint_length(first: int) -> int:
+    for length in range(1, 9):
+        if first & (0x80 >> (length - 1)):
+            return length
+    raise ValueError("Invalid EBML variable-size integer")
+
+
+def _read_id(buf: bytes, pos: int) -> Tuple[int, int]:
+    length = _vint_length(buf[pos])
+    return int.from_bytes(buf[pos:pos + length], "big"), pos + length
+
+
+def _read_size(buf: bytes, pos: int) -> Tuple[Optional[int], int]:
+    """Return ``(size, next_pos)``; size is None for the "unknown size" marker."""
+    length = _vint_length(buf[pos])
+    raw = buf[pos:pos + length]
+    if len(raw) < length:
+        raise ValueError("Truncated EBML size")
+    value = int.from_bytes(raw, "big") & ((1 << (7 * length)) - 1)
+    if value == (1 << (7 * length)) - 1:
+        return None, pos + length
+    return value, pos + length
+
+
+def _read_element_header(buf: bytes, pos: int) -> Tuple[int, int, Optional[int]]:
+    """Return ``(id, data_start, size)`` of the element at ``pos``; size None if unknown."""
+    element_id, pos = _read_id(buf, pos)
+    size, pos = _read_size(buf, pos)
+    return element_id, pos, size
+
+
+def _iter_elements(buf: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield ``(id, data_start, size)`` for the elements in ``buf[start:end]``.
+
+    An element of unknown size extends to ``end`` and is the last one yielded.
+    """
+    end = len(buf) if end is None else end
+    pos = start
+    while pos < end:
+        element_id, pos = _read_id(buf, pos)
+        size, pos = _read_size(buf, pos)
+        if size is None:
+            yield element_id, pos, max(0, end - pos)
+            return
+        yield element_id, pos, size
+        pos += size
+
+
+def _uint(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+
+def _float(data: bytes) -> float:
+    return struct.unpack(">f" if len(data) == 4 else ">d", data)[0]
+
+
+def _parse_info(body: bytes) -> Tuple[int, Optional[float]]:
+    scale, duration = 1_000_000, None
+    for element_id, start, size in _iter_elements(body):
+        if element_id == _TIMECODE_SCALE:
+            scale = _uint(body[start:start + size])
+        elif element_id == _DURATION:
+            duration = _float(body[start:start + size])
+    return scale, duration
+
+
+def _parse_audio_track(body: bytes) -> Optional[Dict[str, object]]:
+    for element_id, start, size in _iter_elements(body):
+        if element_id != _TRACK_ENTRY:
+            continue
+        track: Dict[str, object] = {}
+        for child_id, child_start, child_size in _iter_elements(body, start, start + size):
+            data = body[child_start:child_start + child_size]
+            if child_id == _TRACK_TYPE:
+                track["type"] = _uint(data)
+            elif child_id == _CODEC_ID:
+                track["codec"] = data.rstrip(b"\x00").decode("ascii", "replace")
+            elif child_id == _AUDIO:
+                for audio_id, audio_start, audio_size in _iter_elements(data):
+                    value = data[audio_start:audio_start + audio_size]
+                    if audio_id == _SAMPLING_FREQUENCY:
+                        track["sample_rate"] = int(round(_float(value)))
+                    elif audio_id == _CHANNELS:
+                        track["channels"] = _uint(value)
+        if track.get("type") == _AUDIO_TRACK_TYPE or "sample_rate" in track:
+            return track
+    return None
+
+
+def _block_timecode(data: bytes) -> int:
+    _, pos = _read_size(data, 0)  # Track number
+    return struct.unpack(">h", data[pos:pos + 2])[0]
+
+
+def _last_cluster_timecode(tail: bytes) -> Optional[int]:
+    """Timestamp (in TimecodeScale units) of the last block in the tail."""
+    pos = len(tail)
+    while True:
+        pos = tail.rfind(_CLUSTER_ID_BYTES, 0, pos)
+        if pos < 0:
+            return None
+        try:
+            _, data_start = _read_id(tail, pos)
+            size, data_start = _read_size(tail, data_start)
+            end = len(tail) if size is None else min(len(tail), data_start + size)
+            cluster_timecode, last = None, None
+            for element_id, start, element_size in _iter_elements(tail, data_start, end):
+                if start + element_size > len(tail):
+                    break
+                data = tail[start:start + element_size]
+                if element_id == _CLUSTER_TIMECODE:
+                    cluster_timecode = _uint(data)
+                elif element_id == _SIMPLE_BLOCK:
+                    last = _block_timecode(data)
+                elif element_id == _BLOCK_GROUP:
+                    for child_id, child_start, child_size in _iter_elements(data):
+                        if child_id == _BLOCK:
+                            last = _block_timecode(data[child_start:child_start + child_size])
+        except (ValueError, IndexError, struct.error):
+            continue  # Cluster id bytes inside payload data; keep looking
+        if cluster_timecode is not None:
+            return cluster_timecode + max(0, last or 0)
+
+
+def _probe_matroska(reader: _Reader) -> AudioInfo:
+    head = reader.head
+    container = "matroska"
+    _, header_start, header_size = _read_element_header(head, 0)
+    if header_size is None:
+        raise ValueError("EBML header with unknown size")
+    for element_id, start, size in _iter_elements(head, header_start, header_start + header_size):
+        if element_id == _EBML_DOCTYPE:
+            container = head[start:start + size].rstrip(b"\x00").decode("ascii", "replace")
+
+    segment_id, pos = _read_id(head, header_start + header_size)
+    if segment_id != _SEGMENT:
+        raise ValueError("Matroska segment not found")
+    _, pos = _read_size(head, pos)
+
+    scale, duration, track = 1_000_000, None, None
+    info_seen = False
+    while pos < reader.size and not (info_seen and track is not None):
+        header = reader.read(pos, 12)
+        element_id, data_start = _read_id(header, 0)
+        size, data_start = _read_size(header, data_start)
+        data_start += pos
+        if element_id == _CLUSTER or size is None:
+            break
+        if element_id == _INFO:
+            scale, duration = _parse_info(reader.read(data_start, size))
+            info_seen = True
+        elif element_id == _TRACKS:
+            track = _parse_audio_track(reader.read(data_start, size)) or {}
+        pos = data_start + size
+
+    if duration is not None:
+        duration_seconds = duration * scale / 1e9
+    else:
+        timecode = _last_cluster_timecode(reader.tail()[1])
+        duration_seconds = timecode * scale / 1e9 if timecode is not None else None
+
+    track = track or {}
+    codec = track.get("codec")
+    if isinstance(codec, str) and codec.startswith("A_"):
+        codec = codec[2:].lower()
+    return AudioInfo(
+        container,
+        codec,
+        duration_seconds,
+        track.get("sample_rate"),
+        track.get("channels"),
+    )
+
+
+def probe_audio(read_range: ReadRange, size: int) -> Optional[AudioInfo]:
+    """Identify the container by its magic bytes and read its stream parameters.
+
+    Returns None for unsupported formats; raises ValueError for files that
+    look like a supported container but cannot be parsed.
+    """
+    reader = _Reader(read_range, size)
+    head = reader.head
+    try:
+        if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+            return _probe_wav(reader)
+        if head[:4] == b"OggS":
+            return _probe_ogg(reader)
+        if head[:4] == _EBML_HEADER.to_bytes(4, "big"):
+            return _probe_matroska(reader)
+    except (IndexError, struct.error, StopIteration, TypeError, OverflowError, ZeroDivisionError) as exc:
+        raise ValueError(f"Malformed audio header: {exc}") from exc
+    return None
@@ -0,0 +1,46 @@
+"""Conditional GET helpers (strong ETags and ``If-None-Match`` -> 304)."""
+from __future__ import annotations
+
+from typing import Any, Optional
+import hashlib
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def compute_etag(body: bytes) -> str:
+    """Return a strong ETag for a serialized response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate ``If-None-Match`` against ``etag`` (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    cache_control: Optional[str] = None,
+) -> Response:
+    """Serialize ``content`` once, tag it, and answer 304 if the client already has it."""
+    response = JSONResponse(content=jsonable_encoder(content))
+    etag = compute_etag(response.body)
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return response
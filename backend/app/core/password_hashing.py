@@ -0,0 +1,108 @@
+"""Bounded executor for password hashing.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Running it on a small
+dedicated pool caps how many hashes run at once, and the bounded queue turns
+a login burst into fast ``429 Retry-After`` responses instead of an unbounded
+pile-up that starves the request threadpool. bcrypt releases the GIL while
+hashing, so a thread pool is enough to use several cores.
+
+Request handlers use ``run_async``: callers waiting for a worker await the
+pool's future on the event loop instead of parking a threadpool thread.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+import asyncio
+import logging
+import threading
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; clients should retry later."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHashExecutor:
+    """Run hashing calls on ``max_workers`` threads with at most ``max_queue`` waiting."""
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._rejected = 0
+
+    def _track(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _admit(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+                queued = self._in_flight - self._running
+            logger.warning("Password hashing rejected: queue full (queued=%s)", queued)
+            raise PasswordHasherBusy(self.retry_after)
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool and block until it finishes, or raise PasswordHasherBusy.
+
+        For scripts and rare admin paths; request handlers use ``run_async``.
+        """
+        self._admit()
+        try:
+            return self._pool.submit(self._track, fn, *args).result()
+        finally:
+            self._release()
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        """Like ``run``, but the caller awaits the result without holding a thread."""
+        self._admit()
+        try:
+            return await asyncio.wrap_future(self._pool.submit(self._track, fn, *args))
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool usage: running, queued (waiting for a worker) and rejected so far."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "rejected_total": self._rejected,
+            }
+
+
+password_hasher = PasswordHashExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
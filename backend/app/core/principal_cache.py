@@ -0,0 +1,68 @@
+"""Short-lived cache of authenticated principals.
+
+Protected endpoints only need a user's role and account flags, not the full
+row. Caching them per user id turns the hot auth path into a JWT verify plus
+a dict lookup. Entries expire after ``PRINCIPAL_CACHE_TTL_SECONDS`` and are
+invalidated explicitly whenever a user's password, role or status changes.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+import threading
+import time
+
+from .config import settings
+
+
+class Principal(NamedTuple):
+    """Authorization-relevant view of a user."""
+    id: int
+    rol: str
+    is_active: bool
+    must_change_password: bool
+
+
+class PrincipalCache:
+    """Thread-safe, TTL- and size-bounded mapping of user id -> Principal."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
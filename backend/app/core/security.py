@@ -1,26 +1,56 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .config import settings
+from .principal_cache import Principal, principal_cache
+from .password_hashing import password_hasher
+from ..db.async_session import get_async_db
 from ..db.session import get_db
 from ..models.user import User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+)
 security = HTTPBearer()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against a hash (on the bounded hashing pool)."""
+    return password_hasher.run(pwd_context.verify, plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored one uses outdated parameters."""
+    return password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
+    """Hash a password (on the bounded hashing pool)."""
+    return password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` for async handlers (awaits the pool without holding a thread)."""
+    return await password_hasher.run_async(pwd_context.verify, plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """``verify_and_update_password`` for async handlers."""
+    return await password_hasher.run_async(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """``get_password_hash`` for async handlers."""
+    return await password_hasher.run_async(pwd_context.hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -83,17 +113,93 @@ def get_current_user(
     return user
 
 
-def require_password_changed(current_user: User = Depends(get_current_user)) -> User:
-    if current_user.must_change_password:
+def _principal_statement(user_id: int):
+    return select(User.id, User.rol, User.is_active, User.must_change_password).where(User.id == user_id)
+
+
+def _cache_principal(row) -> Optional[Principal]:
+    if row is None:
+        return None
+    principal = Principal(
+        id=row.id,
+        rol=row.rol,
+        is_active=row.is_active,
+        must_change_password=row.must_change_password,
+    )
+    principal_cache.put(principal)
+    return principal
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Return the cached principal for ``user_id``, loading it from the DB on a miss."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    return _cache_principal(db.execute(_principal_statement(user_id)).first())
+
+
+async def load_principal_async(db: AsyncSession, user_id: int) -> Optional[Principal]:
+    """``load_principal`` for async handlers."""
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    return _cache_principal((await db.execute(_principal_statement(user_id))).first())
+
+
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    payload = decode_token(credentials.credentials)
+    user_id = payload.get("sub")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    return int(user_id)
+
+
+def _require_principal(principal: Optional[Principal]) -> Principal:
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    return principal
+
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Get the current user's id, role and account flags (cached)."""
+    return _require_principal(load_principal(db, _token_user_id(credentials)))
+
+
+async def get_current_principal_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """``get_current_principal`` for the async database path (no threadpool hop)."""
+    return _require_principal(await load_principal_async(db, _token_user_id(credentials)))
+
+
+def require_password_changed(principal: Principal = Depends(get_current_principal)) -> Principal:
+    if principal.must_change_password:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="PASSWORD_CHANGE_REQUIRED",
         )
-    return current_user
+    return principal
 
 
 def get_current_user_role(
-    current_user: User = Depends(require_password_changed),
+    principal: Principal = Depends(require_password_changed),
 ) -> str:
     """Get current user role from token and enforce password change policy."""
-    return current_user.rol
+    return principal.rol
+
+
+async def get_current_user_role_async(
+    principal: Principal = Depends(get_current_principal_async),
+) -> str:
+    """``get_current_user_role`` for the async database path."""
+    return require_password_changed(principal).rol
@@ -1,17 +1,32 @@
 """Cloudflare R2 (S3-compatible) storage helpers.
 
 This module provides a minimal wrapper around boto3 to upload files and
-create presigned GET URLs. It is intentionally small to keep the PMV code
-simple while enabling secure private audio storage.
+create presigned GET URLs. A single client is shared by the whole process so
+uploads and presigns reuse its connection pool instead of paying client
+construction and TLS handshakes on every call.
 """
-from typing import BinaryIO
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import hashlib
+import threading
+import time
 import boto3
 from botocore.config import Config
 from .config import settings
 
+# S3 multipart parts must be at least 5 MiB (except the last one).
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
 
-def get_s3_client():
-    """Return a boto3 S3 client configured for Cloudflare R2."""
+_client = None
+_client_lock = threading.Lock()
+
+# Signed GET URLs: (bucket, key, expires_seconds, expiry bucket) -> (url, signed_at)
+_presign_cache: "OrderedDict[tuple, Tuple[str, float]]" = OrderedDict()
+_presign_lock = threading.Lock()
+
+
+def _build_s3_client():
     if not settings.R2_ENDPOINT_URL:
         raise RuntimeError("R2_ENDPOINT_URL is not configured")
     if not settings.R2_ACCESS_KEY_ID or not settings.R2_SECRET_ACCESS_KEY:
@@ -23,10 +38,38 @@ def get_s3_client():
         aws_access_key_id=settings.R2_ACCESS_KEY_ID,
         aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
         region_name=settings.R2_REGION or None,
-        config=Config(signature_version="s3v4"),
+        config=Config(
+            signature_version="s3v4",
+            max_pool_connections=settings.R2_MAX_POOL_CONNECTIONS,
+            connect_timeout=settings.R2_CONNECT_TIMEOUT_SECONDS,
+            read_timeout=settings.R2_READ_TIMEOUT_SECONDS,
+            retries={"max_attempts": settings.R2_MAX_ATTEMPTS, "mode": "standard"},
+            tcp_keepalive=True,
+        ),
     )
 
 
+def get_s3_client():
+    """Return the process-wide boto3 S3 client configured for Cloudflare R2.
+
+    The client (and its HTTP connection pool) is built lazily on first use
+    and shared afterwards; boto3 clients are thread-safe.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_s3_client()
+    return _client
+
+
+def reset_s3_client() -> None:
+    """Drop the shared client so the next call rebuilds it (e.g. after settings change)."""
+    global _client
+    with _client_lock:
+        _client = None
+
+
 def upload_fileobj(fileobj: BinaryIO, bucket: str, key: str, content_type: str | None = None) -> None:
     """Upload a file-like object to R2.
 
@@ -41,6 +84,85 @@ def upload_fileobj(fileobj: BinaryIO, bucket: str, key: str, content_type: str |
     client.upload_fileobj(fileobj, bucket, key, ExtraArgs=extra_args or {})
 
 
+class UploadTooLarge(Exception):
+    """Raised while streaming an upload once it exceeds the allowed size."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+def _read_part(fileobj: BinaryIO, size: int) -> bytes:
+    part = bytearray()
+    while len(part) < size:
+        chunk = fileobj.read(min(READ_CHUNK_SIZE, size - len(part)))
+        if not chunk:
+            break
+        part += chunk
+    return bytes(part)
+
+
+def upload_stream(
+    fileobj: BinaryIO,
+    bucket: str,
+    key: str,
+    content_type: str | None = None,
+    max_bytes: Optional[int] = None,
+) -> Tuple[int, str]:
+    """Stream a file-like object to R2, enforcing ``max_bytes`` as it is read.
+
+    Objects that fit in one part are sent with a single PUT; larger ones use
+    a multipart upload, holding only one part in memory, and are aborted as
+    soon as the limit is exceeded.
+
+    Returns:
+        ``(size_bytes, sha256_hex)`` of the uploaded content.
+    """
+    client = get_s3_client()
+    digest = hashlib.sha256()
+    total = 0
+
+    def next_part() -> bytes:
+        nonlocal total
+        part = _read_part(fileobj, MULTIPART_PART_SIZE)
+        total += len(part)
+        if max_bytes is not None and total > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        digest.update(part)
+        return part
+
+    extra_args = {"ContentType": content_type} if content_type else {}
+    part = next_part()
+    if len(part) < MULTIPART_PART_SIZE:
+        client.put_object(Bucket=bucket, Key=key, Body=part, **extra_args)
+        return total, digest.hexdigest()
+
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key=key, **extra_args)["UploadId"]
+    try:
+        parts = []
+        while part:
+            part_number = len(parts) + 1
+            response = client.upload_part(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=part,
+            )
+            parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+            part = next_part()
+        client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+    return total, digest.hexdigest()
+
+
 def presign_get_url(bucket: str, key: str, expires_seconds: int = 600) -> str:
     """Create a presigned URL for private GET access."""
     client = get_s3_client()
@@ -49,3 +171,120 @@ def presign_get_url(bucket: str, key: str, expires_seconds: int = 600) -> str:
         Params={"Bucket": bucket, "Key": key},
         ExpiresIn=expires_seconds,
     )
+
+
+def presign_get_url_cached(bucket: str, key: str, expires_seconds: int = 600) -> Tuple[str, int]:
+    """Return ``(url, remaining_seconds)`` for a private GET, reusing a recent signature.
+
+    Signatures are grouped in buckets of half the requested lifetime, so a
+    cached URL is returned only while it still has at least half of
+    ``expires_seconds`` left; after that a fresh URL is signed.
+    """
+    now = time.time()
+    bucket_size = max(1, expires_seconds // 2)
+    cache_key = (bucket, key, expires_seconds, int(now // bucket_size))
+
+    with _presign_lock:
+        cached = _presign_cache.get(cache_key)
+        if cached is not None:
+            _presign_cache.move_to_end(cache_key)
+    if cached is not None:
+        url, signed_at = cached
+        return url, int(signed_at + expires_seconds - now)
+
+    url = presign_get_url(bucket=bucket, key=key, expires_seconds=expires_seconds)
+    with _presign_lock:
+        _presign_cache[cache_key] = (url, now)
+        _presign_cache.move_to_end(cache_key)
+        while len(_presign_cache) > settings.PRESIGN_CACHE_MAX_ENTRIES:
+            _presign_cache.popitem(last=False)
+    return url, expires_seconds
+
+
+def presign_put_url(bucket: str, key: str, content_type: str | None = None, expires_seconds: int = 900) -> str:
+    """Create a presigned URL for a single-request PUT upload.
+
+    When ``content_type`` is given it is part of the signature, so the client
+    must send the same ``Content-Type`` header.
+    """
+    params: Dict[str, Any] = {"Bucket": bucket, "Key": key}
+    if content_type:
+        params["ContentType"] = content_type
+    return get_s3_client().generate_presigned_url(
+        "put_object",
+        Params=params,
+        ExpiresIn=expires_seconds,
+    )
+
+
+def create_multipart_upload(bucket: str, key: str, content_type: str | None = None) -> str:
+    """Start a multipart upload and return its upload id."""
+    extra_args = {"ContentType": content_type} if content_type else {}
+    response = get_s3_client().create_multipart_upload(Bucket=bucket, Key=key, **extra_args)
+    return response["UploadId"]
+
+
+def presign_upload_part_url(bucket: str, key: str, upload_id: str, part_number: int, expires_seconds: int = 900) -> str:
+    """Create a presigned URL to PUT one part of a multipart upload."""
+    return get_s3_client().generate_presigned_url(
+        "upload_part",
+        Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": part_number},
+        ExpiresIn=expires_seconds,
+    )
+
+
+def upload_part(bucket: str, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+    """Upload one part of a multipart upload and return its ETag."""
+    response = get_s3_client().upload_part(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        PartNumber=part_number,
+        Body=body,
+    )
+    return response["ETag"]
+
+
+def complete_multipart_upload(bucket: str, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> None:
+    """Assemble uploaded parts (``[{"PartNumber": n, "ETag": ...}]``) into the final object."""
+    get_s3_client().complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=upload_id,
+        MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+    )
+
+
+def abort_multipart_upload(bucket: str, key: str, upload_id: str) -> None:
+    """Discard a multipart upload and any parts already stored."""
+    get_s3_client().abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+
+
+def get_object_range(bucket: str, key: str, start: int, length: int) -> bytes:
+    """Read ``length`` bytes starting at ``start`` with a ranged GET."""
+    response = get_s3_client().get_object(
+        Bucket=bucket,
+        Key=key,
+        Range=f"bytes={start}-{start + length - 1}",
+    )
+    body = response["Body"]
+    try:
+        return body.read()
+    finally:
+        body.close()
+
+
+def head_object(bucket: str, key: str) -> Optional[Dict[str, Any]]:
+    """Return object metadata (size, type, ETag), or None if the object does not exist."""
+    client = get_s3_client()
+    try:
+        return client.head_object(Bucket=bucket, Key=key)
+    except client.exceptions.ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+
+
+def delete_object(bucket: str, key: str) -> None:
+    """Delete an object."""
+    get_s3_client().delete_object(Bucket=bucket, Key=key)
@@ -0,0 +1,112 @@
+"""In-memory, indexed catalog of training texts.
+
+The catalog is parsed once and kept in memory with an index by ``Id`` and an
+inverted tag index (tag key -> normalized value -> text ids), so lookups and
+tag filters never re-read or scan the JSON file. The file's mtime is checked
+on access and the catalog reloads itself when the content changes.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+import json
+import os
+import threading
+
+
+def normalize_tag_value(value: Any) -> str:
+    return str(value).strip().casefold()
+
+
+class _Snapshot(NamedTuple):
+    """One loaded version of the file; replaced as a whole on reload, never mutated."""
+    texts: List[Dict[str, Any]]
+    by_id: Dict[str, Dict[str, Any]]
+    position: Dict[str, int]
+    tag_index: Dict[str, Dict[str, Set[str]]]
+    tag_labels: Dict[str, Dict[str, str]]
+
+
+_EMPTY = _Snapshot([], {}, {}, {}, {})
+
+
+class TextCatalog:
+    """Texts loaded from a ``{"texts": [...]}`` JSON file.
+
+    Returned text dicts are shared between callers and must be treated as
+    read-only. Readers take the current snapshot once, so a request served
+    during a reload sees either the old or the new catalog, never a mix.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._snapshot = _EMPTY
+
+    def _current_signature(self) -> tuple:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Texts file not found: {self.path}")
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _build(texts: List[Dict[str, Any]]) -> _Snapshot:
+        by_id: Dict[str, Dict[str, Any]] = {}
+        position: Dict[str, int] = {}
+        tag_index: Dict[str, Dict[str, Set[str]]] = {}
+        tag_labels: Dict[str, Dict[str, str]] = {}
+
+        for i, text in enumerate(texts):
+            text_id = text["Id"]
+            by_id.setdefault(text_id, text)
+            position.setdefault(text_id, i)
+            for key, value in text.get("Tags", {}).items():
+                normalized_value = normalize_tag_value(value)
+                tag_index.setdefault(key, {}).setdefault(normalized_value, set()).add(text_id)
+                tag_labels.setdefault(key, {}).setdefault(normalized_value, str(value).strip())
+
+        return _Snapshot(texts, by_id, position, tag_index, tag_labels)
+
+    def refresh(self) -> None:
+        """Load the file if it has never been loaded or changed on disk."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._snapshot = self._build(data.get("texts", []))
+            self._signature = signature
+
+    def _current(self) -> _Snapshot:
+        self.refresh()
+        return self._snapshot
+
+    def all(self) -> List[Dict[str, Any]]:
+        return self._current().texts
+
+    def get(self, text_id: str) -> Optional[Dict[str, Any]]:
+        return self._current().by_id.get(text_id)
+
+    def filter_by_tags(self, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Return texts whose tags match every ``key -> normalized value`` filter, in file order."""
+        snapshot = self._current()
+        if not filters:
+            return snapshot.texts
+
+        matching: Optional[Set[str]] = None
+        for key, expected in filters.items():
+            ids = snapshot.tag_index.get(key, {}).get(expected, set())
+            matching = ids if matching is None else matching & ids
+            if not matching:
+                return []
+
+        return [snapshot.by_id[text_id] for text_id in sorted(matching, key=snapshot.position.__getitem__)]
+
+    def tag_labels(self) -> Dict[str, Dict[str, str]]:
+        """Return ``key -> normalized value -> first-seen display value``."""
+        return self._current().tag_labels
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
 import textwrap
+import threading
 
+# Normalized page sets kept in memory (one per text/parameter combination).
+NORMALIZATION_CACHE_SIZE = 256
+
+_PagesTuple = Tuple[Tuple[str, ...], ...]
+_cache: "OrderedDict[tuple, _PagesTuple]" = OrderedDict()
+_cache_lock = threading.Lock()
 
-def _wrap_line(line: str, max_chars: int) -> List[str]:
-    if line == "":
-        return [""]
 
-    wrapper = textwrap.TextWrapper(
+@lru_cache(maxsize=32)
+def _get_wrapper(max_chars: int) -> textwrap.TextWrapper:
+    # TextWrapper.wrap() keeps no per-call state, so one instance per width is reused.
+    return textwrap.TextWrapper(
         width=max_chars,
         break_long_words=True,
         break_on_hyphens=False,
@@ -16,15 +27,70 @@ def _wrap_line(line: str, max_chars: int) -> List[str]:
         drop_whitespace=False,
     )
 
-    wrapped = wrapper.wrap(line)
+
+def _wrap_line(line: str, max_chars: int) -> List[str]:
+    if line == "":
+        return [""]
+
+    wrapped = _get_wrapper(max_chars).wrap(line)
     return wrapped if wrapped else [""]
 
 
+def _content_hash(pages: List[List[str]]) -> str:
+    encoded = json.dumps(pages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def _cache_get(key: tuple) -> Optional[_PagesTuple]:
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+        return cached
+
+
+def _cache_put(key: tuple, value: _PagesTuple) -> None:
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > NORMALIZATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear_normalization_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _normalize_pages_uncached(
+    pages: List[List[str]],
+    start_page_index: int,
+    max_lines: int,
+    max_chars: int,
+) -> List[List[str]]:
+    normalized_pages: List[List[str]] = [list(page) for page in pages[:start_page_index]]
+
+    for page in pages[start_page_index:]:
+        normalized_lines: List[str] = []
+        for line in page:
+            normalized_lines.extend(_wrap_line(line, max_chars))
+
+        if not normalized_lines:
+            normalized_pages.append([])
+            continue
+
+        for i in range(0, len(normalized_lines), max_lines):
+            normalized_pages.append(normalized_lines[i : i + max_lines])
+
+    return normalized_pages
+
+
 def normalize_pages(
     pages: List[List[str]],
     start_page_index: int = 2,
     max_lines: int = 8,
     max_chars: int = 39,
+    text_id: Optional[str] = None,
 ) -> List[List[str]]:
     """
     Normalize pages for RV projection.
@@ -33,25 +99,24 @@ def normalize_pages(
     - From start_page_index onward, lines are wrapped to max_chars.
     - Each page has at most max_lines; overflow creates new pages.
     - No padding with empty lines.
+
+    Results are memoized by (text_id, content hash, parameters). Normalization
+    is idempotent, so the normalized output is cached as its own result too:
+    re-normalizing text already stored on a session never re-wraps it.
     """
     if not pages:
         return []
 
-    normalized_pages: List[List[str]] = [list(page) for page in pages[:start_page_index]]
+    params = (start_page_index, max_lines, max_chars)
+    key = (text_id, _content_hash(pages), *params)
+    cached = _cache_get(key)
+    if cached is None:
+        normalized = _normalize_pages_uncached(pages, *params)
+        cached = tuple(tuple(page) for page in normalized)
+        _cache_put(key, cached)
+        _cache_put((text_id, _content_hash(normalized), *params), cached)
 
-    for page in pages[start_page_index:]:
-        normalized_lines: List[str] = []
-        for line in page:
-            normalized_lines.extend(_wrap_line(line, max_chars))
-
-        if not normalized_lines:
-            normalized_pages.append([])
-            continue
-
-        for i in range(0, len(normalized_lines), max_lines):
-            normalized_pages.append(normalized_lines[i : i + max_lines])
-
-    return normalized_pages
+    return [list(page) for page in cached]
 
 
 def normalize_text_object(
@@ -66,5 +131,6 @@ def normalize_text_object(
     normalized["Pages"] = normalize_pages(
         text.get("Pages", []),
         start_page_index=start_page_index,
+        text_id=text.get("Id"),
     )
-    return normalized
\ No newline at end of file
+    return normalized
@@ -13,6 +13,10 @@ def _ensure_aware(dt: datetime) -> datetime:
     return dt
 
 
+def to_utc(dt: datetime) -> datetime:
+    return _ensure_aware(dt).astimezone(timezone.utc)
+
+
 def to_local_datetime(dt: datetime) -> datetime:
     try:
         tz = ZoneInfo(settings.TIMEZONE)
@@ -0,0 +1,88 @@
+"""ASGI middleware that caps request body size on upload endpoints.
+
+FastAPI parses multipart forms before the endpoint runs, so the size check
+has to happen while the body is being received: requests that announce a
+too-large ``Content-Length`` are rejected up front, and chunked bodies are
+cut off as soon as the running byte count passes the limit.
+"""
+from __future__ import annotations
+
+from typing import Pattern
+import json
+import re
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class MaxUploadSizeMiddleware:
+    """Answer 413 for request bodies over ``max_bytes`` on paths matching ``path_pattern``."""
+
+    def __init__(self, app: ASGIApp, max_bytes: int, path_pattern: str) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_pattern: Pattern[str] = re.compile(path_pattern)
+
+    async def _reject(self, send: Send) -> None:
+        body = json.dumps({"detail": f"Upload exceeds the maximum size of {self.max_bytes} bytes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PUT", "PATCH")
+            or not self.path_pattern.match(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    if int(value) > self.max_bytes:
+                        await self._reject(send)
+                        return
+                except ValueError:
+                    pass
+
+        received = 0
+        exceeded = False
+        rejected = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Stop reading; the app sees a disconnect and its error
+                    # response is replaced by a 413 below.
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal rejected, response_started
+            if exceeded and not response_started:
+                if not rejected:
+                    rejected = True
+                    await self._reject(send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
+        if exceeded and not rejected and not response_started:
+            await self._reject(send)
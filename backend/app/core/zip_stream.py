@@ -0,0 +1,130 @@
+"""Streaming ZIP writer with bounded memory.
+
+``zipfile`` already knows how to write to unseekable outputs: it emits each
+local file header up front and a data descriptor (CRC + sizes) after the
+entry body. ``ZipStream`` points a ``ZipFile`` at an in-memory sink that is
+drained after every write, so callers can yield the archive bytes to a
+``StreamingResponse`` while only holding one chunk at a time.
+"""
+from __future__ import annotations
+
+from typing import IO, Iterable, Iterator, List, Optional
+import io
+import zipfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only, unseekable buffer whose contents are drained by the caller."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._offset += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """Incrementally build a ZIP archive and yield its bytes as they are produced.
+
+    Every ``write_*`` method and ``close`` is a generator of output chunks;
+    nothing is written until the generator is consumed.
+    """
+
+    def __init__(
+        self,
+        compression: int = zipfile.ZIP_DEFLATED,
+        compresslevel: Optional[int] = None,
+    ) -> None:
+        self._sink = _DrainableSink()
+        self._zip = zipfile.ZipFile(
+            self._sink,
+            mode="w",
+            compression=compression,
+            compresslevel=compresslevel,
+            allowZip64=True,
+        )
+
+    def _drain(self) -> Iterator[bytes]:
+        data = self._sink.drain()
+        if data:
+            yield data
+
+    def _open_entry(self, arcname: str, compress_type: Optional[int], compresslevel: Optional[int]):
+        # ZipFile.open() builds the entry's ZipInfo from the archive defaults,
+        # so override them just for this entry.
+        default_type, default_level = self._zip.compression, self._zip.compresslevel
+        if compress_type is not None:
+            self._zip.compression = compress_type
+        if compresslevel is not None:
+            self._zip.compresslevel = compresslevel
+        try:
+            return self._zip.open(arcname, mode="w", force_zip64=True)
+        finally:
+            self._zip.compression, self._zip.compresslevel = default_type, default_level
+
+    def write_chunks(
+        self,
+        arcname: str,
+        chunks: Iterable[bytes],
+        compress_type: Optional[int] = None,
+        compresslevel: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Add an entry whose body is produced by ``chunks``.
+
+        ``compress_type``/``compresslevel`` override the archive defaults for
+        this entry only.
+        """
+        with self._open_entry(arcname, compress_type, compresslevel) as entry:
+            yield from self._drain()
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                entry.write(chunk)
+                yield from self._drain()
+        yield from self._drain()
+
+    def write_fileobj(
+        self,
+        arcname: str,
+        fileobj: IO[bytes],
+        chunk_size: int = CHUNK_SIZE,
+        compress_type: Optional[int] = None,
+        compresslevel: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Add an entry copied from a binary file object in ``chunk_size`` reads."""
+        yield from self.write_chunks(
+            arcname,
+            iter(lambda: fileobj.read(chunk_size), b""),
+            compress_type=compress_type,
+            compresslevel=compresslevel,
+        )
+
+    def write_bytes(self, arcname: str, data: bytes) -> Iterator[bytes]:
+        """Add a small in-memory entry."""
+        yield from self.write_chunks(arcname, [data])
+
+    def close(self) -> Iterator[bytes]:
+        """Write the central directory and finish the archive."""
+        self._zip.close()
+        yield from self._drain()
@@ -0,0 +1,70 @@
+"""Optional asyncio database access (SQLAlchemy asyncio + asyncpg).
+
+Enabled with ``DB_ASYNC_ENABLED``: the hot endpoints then run as ``async
+def`` on the event loop and await Postgres instead of holding a threadpool
+thread per request. The engine is built lazily so deployments that keep the
+sync path never import the async driver.
+"""
+from typing import Any, AsyncIterator, Dict, Optional
+import threading
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from ..core.config import settings
+
+# Sync driver -> asyncio driver for the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_lock = threading.Lock()
+
+
+def async_database_url(database_url: str) -> str:
+    """Rewrite ``database_url`` to use the asyncio driver of its backend."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend!r} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _engine_options(database_url: str) -> Dict[str, Any]:
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+
+def get_async_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first use."""
+    global _engine, _sessionmaker
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                _engine = create_async_engine(
+                    async_database_url(settings.DATABASE_URL),
+                    **_engine_options(settings.DATABASE_URL),
+                )
+                # Objects stay usable after commit: lazy refreshes cannot run outside the event loop.
+                _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False, autoflush=False)
+    return _engine
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an async database session."""
+    get_async_engine()
+    async with _sessionmaker() as session:
+        yield session
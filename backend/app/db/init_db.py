@@ -1,38 +1,32 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Engine
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from ..models.base import Base
 from ..models.user import User
 from ..core.security import get_password_hash
 from .session import engine
 
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def run_migrations(bind: Engine = engine) -> None:
+    """Upgrade the schema to the latest Alembic revision (``alembic upgrade head``).
+
+    The migrations create every table, so this works on an empty database too.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
 
 def init_db(db: Session) -> None:
     """Initialize database with tables and seed data."""
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-
-    # Ensure new columns exist when running without migrations
-    db.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE"))
-    db.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS must_change_password BOOLEAN NOT NULL DEFAULT FALSE"))
-    db.execute(text("""
-        DO $$
-        BEGIN
-            IF EXISTS (
-                SELECT 1
-                FROM information_schema.columns
-                WHERE table_name = 'recordings'
-                  AND column_name = 'audio_url'
-            ) AND NOT EXISTS (
-                SELECT 1
-                FROM information_schema.columns
-                WHERE table_name = 'recordings'
-                  AND column_name = 'storage_key'
-            ) THEN
-                ALTER TABLE recordings RENAME COLUMN audio_url TO storage_key;
-            END IF;
-        END $$;
-    """))
-    db.commit()
+    # Create or upgrade the schema; migrations are its only source
+    run_migrations()
     
     # Create default users if they don't exist
     impulsador = db.query(User).filter(User.email == "impulsador@toastclub.com").first()
@@ -0,0 +1,99 @@
+"""Connection pool instrumentation.
+
+``InstrumentedQueuePool`` is a ``QueuePool`` that times every checkout, so
+pool exhaustion (e.g. long exports holding connections) shows up as a shift
+in the wait-time histogram and in checkout timeouts before requests start
+failing.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Dict, List
+import threading
+import time
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolWaitMetrics:
+    """Thread-safe histogram of connection checkout wait times."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)  # Last bucket is +Inf
+        self._count = 0
+        self._sum_seconds = 0.0
+        self._max_seconds = 0.0
+        self._timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._buckets[bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+            self._count += 1
+            self._sum_seconds += seconds
+            self._max_seconds = max(self._max_seconds, seconds)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts keyed by upper bound (``le``), plus totals."""
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, count in zip([*map(str, WAIT_BUCKETS_MS), "+Inf"], self._buckets):
+                running += count
+                cumulative[bound] = running
+            return {
+                "checkouts_total": self._count,
+                "timeouts_total": self._timeouts,
+                "wait_seconds_sum": round(self._sum_seconds, 6),
+                "wait_seconds_max": round(self._max_seconds, 6),
+                "wait_ms_buckets": cumulative,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolWaitMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.observe_timeout()
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # Keep the history when the pool is rebuilt (e.g. after dispose()).
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Current occupancy of ``engine``'s pool and, if instrumented, its wait metrics."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+            timeout_seconds=pool.timeout(),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(pool.metrics.snapshot())
+    return stats
@@ -1,13 +1,46 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
 from ..core.config import settings
+from .pool_metrics import InstrumentedQueuePool
+
+
+def _engine_options(database_url: str) -> Dict[str, Any]:
+    """Pool and timeout options for ``database_url`` (server databases only)."""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def without_statement_timeout(db: Session) -> None:
+    """Lift ``DB_STATEMENT_TIMEOUT_MS`` for the rest of ``db``'s current transaction.
+
+    For the long scans of exports and maintenance commands; the connection
+    gets its normal timeout back at commit or rollback (``SET LOCAL``).
+    """
+    if settings.DB_STATEMENT_TIMEOUT_MS and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SET LOCAL statement_timeout = 0"))
+
 
 # Create SQLAlchemy engine
 # Note: echo=True logs all SQL queries. Disable in production for security and performance.
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
     echo=False,  # Set to True only for debugging
+    **_engine_options(settings.DATABASE_URL),
 )
 
 # Create SessionLocal class
@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .core.config import settings
-from .api.v1 import sessions, recordings, surveys, auth, dataset, texts, admin_users
+from .core.password_hashing import PasswordHasherBusy
+from .core.upload_limits import MaxUploadSizeMiddleware
+from .api.v1 import sessions, recordings, surveys, auth, dataset, texts, admin_users, metrics
 from .db.session import SessionLocal
+from .services import export_jobs, resumable_uploads
 from .db.init_db import init_db
 
 # Create FastAPI app
@@ -12,6 +16,19 @@ app = FastAPI(
     description="Toast Club PMV - VR Communication Training Platform API"
 )
 
+# Reject oversized audio uploads while the body is still streaming in
+# (1 MiB of slack for the multipart envelope around the file).
+app.add_middleware(
+    MaxUploadSizeMiddleware,
+    max_bytes=(settings.MAX_AUDIO_SIZE_MB + 1) * 1024 * 1024,
+    path_pattern=rf"^{settings.API_V1_STR}/sessions/\d+/upload$",
+)
+app.add_middleware(
+    MaxUploadSizeMiddleware,
+    max_bytes=settings.RESUMABLE_UPLOAD_PART_SIZE_MB * 1024 * 1024,
+    path_pattern=rf"^{settings.API_V1_STR}/resumable-uploads/[^/]+/parts/\d+$",
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,7 +38,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Back-pressure for login bursts: ask the client to retry instead of queueing."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Include routers
+if settings.DB_ASYNC_ENABLED:
+    # Registered first so they take precedence over the sync routes on the same paths
+    for async_router in (sessions.async_router, recordings.async_router, surveys.async_router, dataset.async_router):
+        app.include_router(async_router, prefix=settings.API_V1_STR)
+
 app.include_router(auth.router, prefix=settings.API_V1_STR, tags=["auth"])
 app.include_router(sessions.router, prefix=settings.API_V1_STR, tags=["sessions"])
 app.include_router(recordings.router, prefix=settings.API_V1_STR, tags=["recordings"])
@@ -29,17 +61,27 @@ app.include_router(surveys.router, prefix=settings.API_V1_STR, tags=["surveys"])
 app.include_router(dataset.router, prefix=settings.API_V1_STR, tags=["dataset"])
 app.include_router(texts.router, prefix=settings.API_V1_STR, tags=["texts"])
 app.include_router(admin_users.router, prefix=settings.API_V1_STR, tags=["admin"])
+app.include_router(metrics.router, prefix=settings.API_V1_STR, tags=["internal"])
 
 
 @app.on_event("startup")
 def startup_event():
-    """Initialize database on startup."""
+    """Initialize database and load the text catalog on startup."""
     db = SessionLocal()
     try:
         init_db(db)
     finally:
         db.close()
 
+    # Abort multipart uploads abandoned while the server was down
+    resumable_uploads.expire_stale_uploads()
+    export_jobs.expire_old_artifacts()
+
+    try:
+        texts.text_catalog.refresh()
+    except FileNotFoundError:
+        pass  # Reported as 500 by the texts endpoints
+
 
 @app.get("/")
 def root():
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class ExportJob(Base):
+    """Background dataset export job and its cached archive."""
+    __tablename__ = "export_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Fingerprint of the exported data + options; identical requests share it
+    cache_key = Column(String, index=True, nullable=False)
+    compression_level = Column(Integer, nullable=True)
+    since = Column(DateTime(timezone=True), nullable=True)  # Delta watermark (None = full export)
+
+    # Progress
+    status = Column(String, nullable=False, default="pending")  # pending | running | completed | failed
+    progress = Column(Integer, nullable=False, default=0)  # recordings processed
+    total = Column(Integer, nullable=False, default=0)  # recordings to process
+    error = Column(String, nullable=True)
+
+    # Artifact
+    storage_key = Column(String, nullable=True)  # R2 key of the finished ZIP
+    size_bytes = Column(BigInteger, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
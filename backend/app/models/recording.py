@@ -9,16 +9,23 @@ class Recording(Base):
     __tablename__ = "recordings"
     
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
     
     # Audio data
     storage_key = Column(String, nullable=False)
     duracion_segundos = Column(Float, nullable=True)
     formato = Column(String, nullable=True)  # mp3, wav, etc.
     metadata_carga = Column(JSON, nullable=True)  # Additional upload metadata
+
+    # Stream parameters read from the container headers after upload
+    sample_rate = Column(Integer, nullable=True)
+    channels = Column(Integer, nullable=True)
+    codec = Column(String, nullable=True)
+    probed_at = Column(DateTime(timezone=True), nullable=True)  # None = not probed yet
     
-    # Timestamp
+    # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())  # e.g. probe results
     
     # Relationship
     session = relationship("Session", back_populates="recordings")
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from .base import Base
+
+
+class ResumableUpload(Base):
+    """Server-tracked R2 multipart upload that a client can resume part by part."""
+    __tablename__ = "resumable_uploads"
+
+    id = Column(String, primary_key=True)  # Random token handed to the client
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
+
+    # Target object
+    storage_key = Column(String, nullable=False)
+    upload_id = Column(String, nullable=False)  # R2 multipart upload id
+    filename = Column(String, nullable=True)
+    content_type = Column(String, nullable=True)
+
+    # Layout: every part is part_size bytes except the last one
+    total_size = Column(BigInteger, nullable=False)
+    part_size = Column(Integer, nullable=False)
+    parts = Column(JSON, nullable=False, default=dict)  # {"<part_number>": {"etag": ..., "size": ...}}
+
+    status = Column(String, nullable=False, default="pending")  # pending | completed | aborted | expired
+    recording_id = Column(Integer, ForeignKey("recordings.id"), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Pushed back on every part
@@ -18,10 +18,10 @@ class Session(Base):
     texto_seleccionado = Column(JSON, nullable=False)
     
     # State management
-    estado = Column(String, nullable=False, default=SessionState.CREATED.value)
+    estado = Column(String, nullable=False, default=SessionState.CREATED.value, index=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
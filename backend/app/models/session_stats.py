@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from .base import Base
+
+
+class SessionStats(Base):
+    """Per-session summary maintained on every recording/survey insert (see services.session_stats)."""
+    __tablename__ = "session_stats"
+
+    session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), primary_key=True)
+
+    # Aggregates over the session's recordings and surveys
+    recordings_count = Column(Integer, nullable=False, default=0)
+    surveys_count = Column(Integer, nullable=False, default=0)
+    first_survey_id = Column(Integer, nullable=True)  # Earliest created_at (NULLs first), then lowest id
+    total_duration = Column(Float, nullable=False, default=0.0)  # Sum of recordings.duracion_segundos
+
+    # Newest of the session, recording and survey creation times
+    last_activity = Column(DateTime(timezone=True), nullable=True)
@@ -9,7 +9,7 @@ class Survey(Base):
     __tablename__ = "surveys"
     
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False, index=True)
     
     # Survey data
     respuestas_json = Column(JSON, nullable=False)
@@ -0,0 +1,518 @@
+"""Dataset export archive builder.
+
+Builds the analyst ZIP (``audios/*``, ``dataset.csv``, the surveys CSVs (see
+``survey_export``) and ``manifest.json``) as a stream of bytes. Audio bodies are prefetched from R2
+on a small thread pool into spooled temporary files and the CSV rows are
+spooled the same way, so memory stays bounded no matter how large the export
+gets.
+"""
+from __future__ import annotations
+
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from collections import deque
+from enum import Enum
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+import csv
+import json
+import logging
+import tempfile
+import zipfile
+
+from sqlalchemy import or_, select
+
+from ..core.config import settings
+from ..core.time import to_local_iso, to_utc
+from ..core.zip_stream import ZipStream, CHUNK_SIZE
+from ..db.session import without_statement_timeout
+from ..models.session import Session as SessionModel
+from ..models.recording import Recording
+from ..models.survey import Survey
+from .dataset_parquet import RecordingParquetRows, SurveyParquetWriter, write_sessions_parquet
+from .survey_export import SurveyCsvWriter, SurveyLayout, load_declared_keys
+
+logger = logging.getLogger(__name__)
+
+# CSV rows stay in memory up to this size, then spill to disk.
+CSV_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Prefetched audio objects stay in memory up to this size, then spill to disk.
+AUDIO_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Surveys fetched from the database per round trip while writing surveys.csv.
+SURVEY_BATCH_SIZE = 1000
+
+# Audio containers whose payload is already compressed; deflating them only burns CPU.
+COMPRESSED_AUDIO_FORMATS = frozenset({
+    "webm",
+    "ogg",
+    "oga",
+    "opus",
+    "mp3",
+    "mpeg",
+    "m4a",
+    "x-m4a",
+    "mp4",
+    "aac",
+    "flac",
+})
+
+
+class ExportFormat(str, Enum):
+    """File format of the archive's metadata tables."""
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+DATASET_CSV_HEADER = [
+    "session_id",
+    "session_code",
+    "recording_id",
+    "audio_file",
+    "formato",
+    "duration_seconds",
+    "uploaded_at",
+    "survey_id",
+    "survey_completed_at",
+    "audio_missing",
+]
+
+
+def resolve_extension(recording: Recording) -> str:
+    """Return the file extension to use for a recording inside the archive."""
+    if recording.formato:
+        if "/" in recording.formato:
+            return recording.formato.split("/")[-1].strip() or "webm"
+        if recording.formato.startswith("."):
+            return recording.formato[1:]
+        return recording.formato
+    if recording.storage_key:
+        suffix = Path(recording.storage_key).suffix
+        if suffix:
+            return suffix.lstrip(".")
+    return "webm"
+
+
+def audio_compress_type(formato: str) -> int:
+    """Return the ZIP method for an audio entry: STORED if already compressed, DEFLATED otherwise."""
+    base_format = formato.split(";")[0].strip().lower()
+    if base_format in COMPRESSED_AUDIO_FORMATS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _spool() -> TextIO:
+    return tempfile.SpooledTemporaryFile(
+        max_size=CSV_SPOOL_MAX_BYTES,
+        mode="w+",
+        newline="",
+        encoding="utf-8",
+    )
+
+
+def _iter_spooled_bytes(spool: TextIO) -> Iterator[bytes]:
+    spool.seek(0)
+    for chunk in iter(lambda: spool.read(CHUNK_SIZE), ""):
+        yield chunk.encode("utf-8")
+
+
+def _max_timestamp(values: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    present = [to_utc(value) for value in values if value is not None]
+    return max(present) if present else None
+
+
+class DatasetExport:
+    """Export inputs loaded from the database, grouped for archive building.
+
+    With ``since`` set this is a delta export: sessions created or updated
+    after the watermark, or owning a recording or survey created or updated
+    after it, each with all of its recordings and its first survey (full
+    rows); surveys.csv only holds the surveys created after the watermark.
+    Only the audio of recordings created or updated after the watermark is
+    copied again; the others keep the ``audio_file`` path of the archive
+    that first included them.
+
+    ``next_since`` lags ``EXPORT_DELTA_OVERLAP_SECONDS`` behind the export
+    time, so rows stamped before a slow transaction committed are picked up
+    by the next delta. Deltas therefore overlap: consumers de-duplicate rows
+    by id (the latest archive wins).
+
+    Surveys are consumed in a single pass: their rows go straight into the
+    ``survey_writer`` spools and only each session's first survey is kept.
+    The spools are released once the archive is built, so an export can be
+    passed to ``iter_dataset_zip`` only once; load a new one to rebuild it.
+    """
+
+    def __init__(
+        self,
+        sessions: List[SessionModel],
+        recordings: List[Recording],
+        surveys: Iterable[Survey],
+        since: Optional[datetime] = None,
+        survey_layout: Optional[SurveyLayout | str] = None,
+        declared_survey_keys: Optional[List[str]] = None,
+        export_format: ExportFormat | str = "csv",
+        first_surveys: Optional[Dict[int, Survey]] = None,
+    ) -> None:
+        self.since = to_utc(since) if since is not None else None
+        self.sessions = sessions
+        self.session_map = {session.id: session for session in sessions}
+        self.recordings_by_session: Dict[int, List[Recording]] = {}
+        for recording in recordings:
+            self.recordings_by_session.setdefault(recording.session_id, []).append(recording)
+
+        self.export_format = ExportFormat(export_format)
+        if self.export_format == ExportFormat.PARQUET:
+            self.survey_writer = SurveyParquetWriter(declared_survey_keys)
+        else:
+            self.survey_writer = SurveyCsvWriter(
+                _spool,
+                survey_layout or settings.EXPORT_SURVEY_LAYOUT,
+                declared_survey_keys,
+            )
+        self.consumed = False
+        self.survey_count = 0
+        self._first_surveys: Dict[int, Survey] = {}
+        newest_survey: Optional[datetime] = None
+        for survey in surveys:
+            self.survey_count += 1
+            created_at = to_utc(survey.created_at) if survey.created_at is not None else None
+            if created_at is not None and (newest_survey is None or created_at > newest_survey):
+                newest_survey = created_at
+            if first_surveys is None:
+                current = self._first_surveys.get(survey.session_id)
+                if current is None or _survey_order(survey) < _survey_order(current):
+                    self._first_surveys[survey.session_id] = survey
+            session = self.session_map.get(survey.session_id)
+            self.survey_writer.write(
+                survey.id,
+                survey.session_id,
+                session.session_code if session else "",
+                survey.created_at,
+                survey.respuestas_json,
+            )
+
+        if first_surveys is not None:
+            self._first_surveys = first_surveys
+
+        # Next watermark: newest change included (lagged), or the current one if nothing changed
+        newest = _max_timestamp(
+            [session.created_at for session in sessions]
+            + [session.updated_at for session in sessions]
+            + [recording.created_at for recording in recordings]
+            + [recording.updated_at for recording in recordings]
+            + [newest_survey]
+        )
+        self.next_since = next_watermark(newest, self.since)
+
+    @classmethod
+    def load(
+        cls,
+        db,
+        since: Optional[datetime] = None,
+        survey_layout: Optional[SurveyLayout | str] = None,
+        export_format: ExportFormat | str = "csv",
+    ) -> "DatasetExport":
+        """Load sessions, recordings and surveys (metadata only) ordered by id.
+
+        Surveys are streamed from the database in batches rather than loaded
+        as a list. Runs without ``DB_STATEMENT_TIMEOUT_MS``.
+        """
+        without_statement_timeout(db)
+        survey_columns = select(Survey.id, Survey.session_id, Survey.created_at, Survey.respuestas_json)
+        options = {
+            "survey_layout": survey_layout,
+            "declared_survey_keys": load_declared_keys(),
+            "export_format": export_format,
+        }
+        if since is None:
+            return cls(
+                sessions=db.query(SessionModel).order_by(SessionModel.id).all(),
+                recordings=db.query(Recording).order_by(Recording.id).all(),
+                surveys=_stream(db, survey_columns.order_by(Survey.id)),
+                **options,
+            )
+
+        since = to_utc(since)
+        recording_changed = or_(Recording.created_at > since, Recording.updated_at > since)
+        survey_changed = Survey.created_at > since
+        session_changed = or_(
+            SessionModel.created_at > since,
+            SessionModel.updated_at > since,
+            SessionModel.id.in_(select(Recording.session_id).where(recording_changed)),
+            SessionModel.id.in_(select(Survey.session_id).where(survey_changed)),
+        )
+        in_scope = select(SessionModel.id).where(session_changed)
+        # Full rows: every recording and the first survey of each session in scope
+        first_surveys: Dict[int, Survey] = {}
+        for survey in _stream(db, select(Survey.id, Survey.session_id, Survey.created_at).where(Survey.session_id.in_(in_scope))):
+            current = first_surveys.get(survey.session_id)
+            if current is None or _survey_order(survey) < _survey_order(current):
+                first_surveys[survey.session_id] = survey
+        return cls(
+            sessions=db.query(SessionModel).filter(session_changed).order_by(SessionModel.id).all(),
+            recordings=db.query(Recording).filter(Recording.session_id.in_(in_scope)).order_by(Recording.id).all(),
+            surveys=_stream(db, survey_columns.where(survey_changed).order_by(Survey.id)),
+            since=since,
+            first_surveys=first_surveys,
+            **options,
+        )
+
+    def manifest(self) -> Dict[str, Any]:
+        """Describe the archive contents and the watermark for the next delta export."""
+        return {
+            "mode": "delta" if self.since is not None else "full",
+            "since": self.since.isoformat() if self.since else None,
+            "next_since": self.next_since.isoformat() if self.next_since else None,
+            "overlap_seconds": settings.EXPORT_DELTA_OVERLAP_SECONDS,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "sessions": len(self.sessions),
+            "recordings": self.recording_count,
+            "surveys": self.survey_count,
+            "format": self.export_format.value,
+            **self.survey_writer.manifest(),
+        }
+
+    @property
+    def recording_count(self) -> int:
+        return sum(len(items) for items in self.recordings_by_session.values())
+
+    def first_survey(self, session_id: int) -> Optional[Survey]:
+        return self._first_surveys.get(session_id)
+
+    def audio_changed(self, recording: Recording) -> bool:
+        """Whether the recording's audio belongs in this archive (always, for full exports)."""
+        if self.since is None:
+            return True
+        return any(
+            value is not None and to_utc(value) > self.since
+            for value in (recording.created_at, recording.updated_at)
+        )
+
+
+def next_watermark(newest: Optional[datetime], since: Optional[datetime]) -> Optional[datetime]:
+    """``next_since`` for an export whose newest included change is ``newest``.
+
+    Held ``EXPORT_DELTA_OVERLAP_SECONDS`` behind now: timestamps are taken at
+    transaction start, so rows stamped just before the export may still be
+    uncommitted and must be picked up again by the next delta.
+    """
+    if newest is not None:
+        horizon = datetime.now(timezone.utc) - timedelta(seconds=settings.EXPORT_DELTA_OVERLAP_SECONDS)
+        newest = min(to_utc(newest), horizon)
+    return max(filter(None, [newest, since]), default=None)
+
+
+def _survey_order(survey: Survey) -> Tuple[datetime, int]:
+    # Earliest survey first, surveys without a timestamp before the rest, then
+    # by id (same order as session_stats.first_survey_id)
+    if survey.created_at is None:
+        return datetime.min.replace(tzinfo=timezone.utc), survey.id
+    return to_utc(survey.created_at), survey.id
+
+
+def _stream(db, statement) -> Iterator[Any]:
+    yield from db.execute(statement.execution_options(yield_per=SURVEY_BATCH_SIZE))
+
+
+def fetch_object(s3_client, bucket: str, key: str) -> IO[bytes]:
+    """Download an object in chunks into a spooled temp file, rewound for reading."""
+    spool = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_MAX_BYTES)
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+        body = response["Body"]
+        try:
+            for chunk in body.iter_chunks(CHUNK_SIZE):
+                spool.write(chunk)
+        finally:
+            body.close()
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_prefetched(fetch: Callable[[str], IO[bytes]], keys: Iterable[str], concurrency: int) -> Iterator["Future[IO[bytes]]"]:
+    """Yield one future per key, in key order, keeping up to ``concurrency`` fetches in flight.
+
+    Results of futures that were never consumed (e.g. the client disconnected)
+    are closed on shutdown.
+    """
+    concurrency = max(1, concurrency)
+    keys = iter(keys)
+    pending: Deque["Future[IO[bytes]]"] = deque()
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="export-fetch")
+    try:
+        for key in islice(keys, concurrency):
+            pending.append(pool.submit(fetch, key))
+        while pending:
+            future = pending.popleft()
+            next_key = next(keys, None)
+            if next_key is not None:
+                pending.append(pool.submit(fetch, next_key))
+            yield future
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        for future in pending:
+            if not future.cancelled() and future.exception() is None:
+                future.result().close()
+
+
+class DatasetCsvRows:
+    """Writes dataset.csv: one row per recording, one per session without recordings."""
+
+    def __init__(self, spool: TextIO) -> None:
+        self.writer = csv.writer(spool)
+        self.writer.writerow(DATASET_CSV_HEADER)
+
+    def add(
+        self,
+        session: SessionModel,
+        recording: Optional[Recording],
+        audio_path: str,
+        formato: str,
+        audio_missing: bool,
+        survey: Optional[Survey],
+    ) -> None:
+        survey_id = survey.id if survey else ""
+        survey_completed_at = to_local_iso(survey.created_at) if survey else ""
+        if recording is None:
+            self.writer.writerow([session.id, session.session_code, "", "", "", "", "", survey_id, survey_completed_at, True])
+            return
+        self.writer.writerow([
+            session.id,
+            session.session_code,
+            recording.id,
+            audio_path,
+            formato,
+            recording.duracion_segundos or "",
+            to_local_iso(recording.created_at) or "",
+            survey_id,
+            survey_completed_at,
+            audio_missing,
+        ])
+
+
+def iter_dataset_rows_and_audio(
+    export: DatasetExport,
+    zip_stream: ZipStream,
+    s3_client,
+    rows,
+    on_progress: Optional[Callable[[int], None]] = None,
+    include_audio: bool = True,
+) -> Iterator[bytes]:
+    """Copy every audio object into the archive and add its row to ``rows``.
+
+    ``rows`` is a row sink such as ``DatasetCsvRows``; its ``add`` is called
+    once per recording (and once with ``recording=None`` for sessions without
+    recordings).
+
+    Downloads run ahead of the archive writer on a bounded thread pool; entries
+    are still written in session/recording order. ``on_progress`` is called
+    with the number of recordings processed so far.
+
+    Without ``include_audio`` nothing is downloaded: ``audio_file`` is the
+    path the audio would have in a full export and ``audio_missing`` only
+    flags recordings without a storage key. Delta exports treat recordings
+    unchanged since the watermark the same way.
+    """
+    bucket = settings.R2_BUCKET
+    keys = [
+        recording.storage_key
+        for session in export.sessions
+        for recording in export.recordings_by_session.get(session.id, [])
+        if recording.storage_key and export.audio_changed(recording)
+    ] if include_audio else []
+    processed = 0
+    fetched = iter_prefetched(
+        lambda key: fetch_object(s3_client, bucket, key),
+        keys,
+        settings.EXPORT_FETCH_CONCURRENCY,
+    )
+
+    try:
+        for session in export.sessions:
+            session_recordings = export.recordings_by_session.get(session.id, [])
+            survey_to_use = export.first_survey(session.id)
+
+            if not session_recordings:
+                rows.add(session, None, "", "", True, survey_to_use)
+                continue
+
+            for recording in session_recordings:
+                storage_key = recording.storage_key
+                audio_missing = False
+                audio_path = ""
+                formato = resolve_extension(recording)
+                if storage_key:
+                    audio_path = f"audios/{session.session_code}__{recording.id}.{formato}"
+                if storage_key and include_audio and export.audio_changed(recording):
+                    future = next(fetched)
+                    try:
+                        with future.result() as audio_file:
+                            yield from zip_stream.write_fileobj(
+                                audio_path,
+                                audio_file,
+                                compress_type=audio_compress_type(formato),
+                            )
+                    except Exception as exc:
+                        audio_missing = True
+                        audio_path = ""
+                        logger.warning("Failed to download audio from R2: %s", exc)
+                elif not storage_key:
+                    audio_missing = True
+
+                rows.add(session, recording, audio_path, formato, audio_missing, survey_to_use)
+                processed += 1
+                if on_progress is not None:
+                    on_progress(processed)
+    finally:
+        fetched.close()
+
+
+def iter_dataset_zip(
+    export: DatasetExport,
+    s3_client,
+    compresslevel: Optional[int] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+    include_audio: bool = True,
+) -> Iterator[bytes]:
+    """Yield the complete export archive: audio first, then the metadata files and manifest.json.
+
+    Metadata is dataset.csv and surveys.csv, or sessions/recordings/survey
+    responses Parquet files when the export format is ``parquet``. CSVs and
+    uncompressed audio are deflated at ``compresslevel`` (defaults to
+    ``EXPORT_COMPRESSION_LEVEL``); already-compressed audio and Parquet files
+    are stored as-is. With ``include_audio=False`` the archive only holds the
+    metadata files.
+    """
+    if export.consumed:
+        raise RuntimeError("This DatasetExport was already archived; its survey spools are closed. Load a new export.")
+    export.consumed = True
+    if compresslevel is None:
+        compresslevel = settings.EXPORT_COMPRESSION_LEVEL
+    zip_stream = ZipStream(compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+
+    if export.export_format == ExportFormat.PARQUET:
+        with RecordingParquetRows() as recordings:
+            yield from iter_dataset_rows_and_audio(export, zip_stream, s3_client, recordings, on_progress, include_audio)
+            yield from zip_stream.write_fileobj("recordings.parquet", recordings.finish(), compress_type=zipfile.ZIP_STORED)
+        with write_sessions_parquet(export.sessions, export.first_survey) as sessions:
+            yield from zip_stream.write_fileobj("sessions.parquet", sessions, compress_type=zipfile.ZIP_STORED)
+    else:
+        with _spool() as dataset_spool:
+            rows = DatasetCsvRows(dataset_spool)
+            yield from iter_dataset_rows_and_audio(export, zip_stream, s3_client, rows, on_progress, include_audio)
+            yield from zip_stream.write_chunks("dataset.csv", _iter_spooled_bytes(dataset_spool))
+
+    try:
+        for name, chunks in export.survey_writer.files():
+            yield from zip_stream.write_chunks(name, chunks, compress_type=export.survey_writer.compress_type)
+    finally:
+        export.survey_writer.close()
+
+    manifest = json.dumps({**export.manifest(), "audio_included": include_audio}, indent=2).encode("utf-8")
+    yield from zip_stream.write_bytes("manifest.json", manifest)
+
+    yield from zip_stream.close()
@@ -0,0 +1,369 @@
+"""Metadata-only dataset export built with Postgres ``COPY``.
+
+The ORM export materializes every session, recording and survey as Python
+objects and formats each cell (timezone conversion, extension, first survey)
+in a loop. For a metadata archive (``dataset.csv``, the surveys CSVs and
+``manifest.json``, no audio) the database can do all of that itself: the
+join, the first-survey selection and the local-time formatting run in one
+``COPY (SELECT ...) TO STDOUT WITH CSV`` per file, and psycopg2 writes the
+CSV bytes straight into the spool that is streamed into the archive.
+
+The CSVs are meant to be byte-identical to the ORM export with
+``include_audio=False``, in every surveys layout: ``COPY`` output gets
+``\\r\\n`` record terminators like ``csv.writer``, empty strings are
+written as NULL so they are not quoted, booleans render as ``True`` /
+``False`` and float durations as Python's ``repr``. Numbers and nested values
+in survey answers are copied as stored, which matches the ORM export for
+rows written by the application (SQLAlchemy stores them with ``json.dumps``).
+Known gaps: durations of 1e15 seconds or more, and answers written outside
+the application in a non-canonical JSON form (e.g. ``1.50``).
+
+Both properties are checked by ``tests/test_dataset_export_sql.py`` against a
+real Postgres; ``/dataset/export`` only uses this path when
+``EXPORT_METADATA_COPY`` is enabled.
+"""
+from __future__ import annotations
+
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import tempfile
+import zipfile
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.time import to_utc
+from ..core.zip_stream import ZipStream, CHUNK_SIZE
+from .dataset_export import CSV_SPOOL_MAX_BYTES, DATASET_CSV_HEADER, ExportFormat, next_watermark
+from .survey_export import SURVEY_BASE_HEADER, SURVEY_LONG_HEADER, SurveyLayout, load_declared_keys
+
+
+def _local_iso(column: str) -> str:
+    """SQL rendering ``column`` like ``to_local_iso`` (session time zone set to ``TIMEZONE``)."""
+    return (
+        f"regexp_replace(to_char({column}, 'YYYY-MM-DD\"T\"HH24:MI:SS.USTZH:TZM'), "
+        "'\\.000000(?=[+-])', '')"
+    )
+
+
+def _python_float(column: str) -> str:
+    """SQL rendering a float8 ``column`` like ``repr(float)`` (``12.0``, not ``12``)."""
+    return (
+        f"CASE WHEN {column} = trunc({column}) AND abs({column}) < 1e15 "
+        f"THEN trunc({column})::bigint::text || '.0' ELSE {column}::text END"
+    )
+
+
+def _answer(value: str) -> str:
+    """SQL rendering a JSON answer like ``csv.writer`` renders the loaded Python value."""
+    return f"""
+        CASE json_typeof({value})
+            WHEN 'boolean' THEN CASE WHEN ({value})::text = 'true' THEN 'True' ELSE 'False' END
+            WHEN 'string' THEN NULLIF({value} #>> '{{}}', '')
+            ELSE {value} #>> '{{}}'
+        END
+    """
+
+
+# Mirrors dataset_export.resolve_extension
+_EXTENSION = """
+    CASE
+        WHEN r.formato IS NOT NULL AND r.formato <> '' THEN
+            CASE
+                WHEN position('/' IN r.formato) > 0 THEN
+                    COALESCE(NULLIF(btrim(regexp_replace(r.formato, '^.*/', ''), E' \\t\\r\\n'), ''), 'webm')
+                WHEN left(r.formato, 1) = '.' THEN substr(r.formato, 2)
+                ELSE r.formato
+            END
+        ELSE COALESCE(substring(r.storage_key FROM '\\.([^./]+)$'), 'webm')
+    END
+"""
+
+_SESSION_SCOPE = """
+    s.created_at > %(since)s
+    OR s.updated_at > %(since)s
+    OR s.id IN (SELECT session_id FROM recordings WHERE created_at > %(since)s OR updated_at > %(since)s)
+    OR s.id IN (SELECT session_id FROM surveys WHERE created_at > %(since)s)
+"""
+
+
+def _where(condition: str, since: Optional[datetime]) -> str:
+    return f"WHERE {condition}" if since is not None else ""
+
+
+def dataset_csv_query(since: Optional[datetime] = None) -> str:
+    """SELECT producing dataset.csv rows (one per recording, one per session without recordings).
+
+    A delta includes every recording and the first survey of each session in scope.
+    """
+    return f"""
+        WITH s AS (
+            SELECT s.id, s.session_code FROM sessions s {_where(_SESSION_SCOPE, since)}
+        ),
+        first_survey AS (
+            SELECT DISTINCT ON (sv.session_id) sv.session_id, sv.id, sv.created_at
+            FROM surveys sv
+            WHERE sv.session_id IN (SELECT id FROM s)
+            ORDER BY sv.session_id, sv.created_at ASC NULLS FIRST, sv.id
+        )
+        SELECT
+            s.id,
+            s.session_code,
+            r.id,
+            CASE WHEN r.storage_key <> ''
+                THEN 'audios/' || s.session_code || '__' || r.id || '.' || {_EXTENSION}
+            END,
+            CASE WHEN r.id IS NOT NULL THEN {_EXTENSION} END,
+            CASE WHEN r.duracion_segundos <> 0 THEN {_python_float("r.duracion_segundos")} END,
+            {_local_iso("r.created_at")},
+            fs.id,
+            {_local_iso("fs.created_at")},
+            CASE WHEN r.storage_key <> '' THEN 'False' ELSE 'True' END
+        FROM s
+        LEFT JOIN recordings r ON r.session_id = s.id
+        LEFT JOIN first_survey fs ON fs.session_id = s.id
+        ORDER BY s.id, r.id
+    """
+
+
+def _survey_responses(alias: str = "sv") -> str:
+    # Non-object answers (e.g. a JSON null) are treated like an empty survey
+    return f"CASE WHEN json_typeof({alias}.respuestas_json) = 'object' THEN {alias}.respuestas_json END"
+
+
+def survey_key_stats_query(since: Optional[datetime] = None) -> str:
+    """SELECT returning how many distinct key sets the surveys have, and how many surveys there are."""
+    return f"""
+        SELECT count(DISTINCT keys), count(*)
+        FROM (
+            SELECT COALESCE(
+                (SELECT string_agg(k, E'\\x1f' ORDER BY k COLLATE "C")
+                 FROM json_object_keys({_survey_responses()}) AS k),
+                ''
+            ) AS keys
+            FROM surveys sv {_where("sv.created_at > %(since)s", since)}
+        ) per_survey
+    """
+
+
+def survey_keys_query(since: Optional[datetime] = None) -> str:
+    """SELECT returning every question key in discovery order (as ``SurveySchema`` sees them)."""
+    return f"""
+        SELECT k
+        FROM surveys sv
+        CROSS JOIN LATERAL json_object_keys({_survey_responses()}) AS k
+        {_where("sv.created_at > %(since)s", since)}
+        GROUP BY k
+        ORDER BY min(sv.id), k COLLATE "C"
+    """
+
+
+def surveys_wide_query(key_count: int, since: Optional[datetime] = None) -> str:
+    """SELECT producing the wide surveys.csv rows; answers bound as ``%(key_<i>)s``."""
+    answers = "".join(f", {_answer(f'sv.respuestas_json -> %(key_{index})s')}" for index in range(key_count))
+    return f"""
+        SELECT sv.id, sv.session_id, s.session_code, {_local_iso("sv.created_at")}{answers}
+        FROM surveys sv
+        LEFT JOIN sessions s ON s.id = sv.session_id
+        {_where("sv.created_at > %(since)s", since)}
+        ORDER BY sv.id
+    """
+
+
+def surveys_long_query(since: Optional[datetime] = None) -> str:
+    """SELECT producing the long surveys.csv rows, answers in their stored order."""
+    return f"""
+        SELECT sv.id, sv.session_id, s.session_code, {_local_iso("sv.created_at")}, NULLIF(kv.key, ''), {_answer("kv.value")}
+        FROM surveys sv
+        LEFT JOIN sessions s ON s.id = sv.session_id
+        LEFT JOIN LATERAL json_each({_survey_responses()}) WITH ORDINALITY AS kv(key, value, ord) ON true
+        {_where("sv.created_at > %(since)s", since)}
+        ORDER BY sv.id, kv.ord
+    """
+
+
+def manifest_query(since: Optional[datetime] = None) -> str:
+    """SELECT returning session, recording and survey counts plus the newest change."""
+    return f"""
+        WITH s AS (
+            SELECT s.* FROM sessions s {_where(_SESSION_SCOPE, since)}
+        ),
+        r AS (
+            SELECT r.* FROM recordings r WHERE r.session_id IN (SELECT id FROM s)
+        ),
+        sv AS (
+            SELECT sv.* FROM surveys sv {_where("sv.created_at > %(since)s", since)}
+        )
+        SELECT
+            (SELECT count(*) FROM s),
+            (SELECT count(*) FROM r),
+            (SELECT count(*) FROM sv),
+            GREATEST(
+                (SELECT max(GREATEST(created_at, updated_at)) FROM s),
+                (SELECT max(GREATEST(created_at, updated_at)) FROM r),
+                (SELECT max(created_at) FROM sv)
+            )
+    """
+
+
+def supports_copy(db: Session) -> bool:
+    """True when the session is bound to Postgres (COPY is not available elsewhere)."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _spool() -> IO[bytes]:
+    return tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MAX_BYTES)
+
+
+def _csv_line(row: List[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+class _CrlfWriter:
+    """File object for ``copy_expert`` ending records in ``\\r\\n`` like ``csv.writer``.
+
+    Newlines inside quoted values are left alone; the quote state carries
+    over between the chunks psycopg2 writes.
+    """
+
+    def __init__(self, spool: IO[bytes]) -> None:
+        self.spool = spool
+        self.quoted = False
+
+    def write(self, data: bytes | str) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        out = bytearray()
+        for index, part in enumerate(data.split(b'"')):
+            if index:
+                out += b'"'
+                self.quoted = not self.quoted
+            out += part if self.quoted else part.replace(b"\n", b"\r\n")
+        self.spool.write(bytes(out))
+        return len(data)
+
+
+def _iter_spooled_bytes(spool: IO[bytes]) -> Iterator[bytes]:
+    spool.seek(0)
+    yield from iter(lambda: spool.read(CHUNK_SIZE), b"")
+
+
+class SqlDatasetExport:
+    """dataset.csv and the surveys CSVs produced by ``COPY``, spooled, plus the manifest.
+
+    Everything is read from the database in ``load`` so the archive can be
+    streamed after the request's DB session is gone. Call ``close`` (or let
+    ``iter_sql_dataset_zip`` do it) to release the spools.
+    """
+
+    def __init__(self, files: List[Tuple[str, IO[bytes]]], manifest: Dict[str, Any]) -> None:
+        self.files = files
+        self._manifest = manifest
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        since: Optional[datetime] = None,
+        survey_layout: Optional[SurveyLayout | str] = None,
+    ) -> "SqlDatasetExport":
+        since = to_utc(since) if since is not None else None
+        layout = SurveyLayout(survey_layout or settings.EXPORT_SURVEY_LAYOUT)
+        declared_keys = load_declared_keys()
+        params: Dict[str, Any] = {"since": since}
+        cursor = db.connection().connection.cursor()
+        files: List[Tuple[str, IO[bytes]]] = []
+        try:
+            # Timestamps are formatted in the export time zone, and the export may
+            # outlast DB_STATEMENT_TIMEOUT_MS, for this transaction only
+            cursor.execute("SELECT set_config('TimeZone', %(tz)s, true)", {"tz": settings.TIMEZONE})
+            cursor.execute("SELECT set_config('statement_timeout', '0', true)")
+
+            dataset_spool = _spool()
+            files.append(("dataset.csv", dataset_spool))
+            dataset_spool.write(_csv_line(DATASET_CSV_HEADER))
+            _copy(cursor, dataset_csv_query(since), params, dataset_spool)
+
+            cursor.execute(survey_keys_query(since), params)
+            discovered = [row[0] for row in cursor.fetchall()]
+            if layout == SurveyLayout.AUTO:
+                cursor.execute(survey_key_stats_query(since), params)
+                variants, surveys = cursor.fetchone()
+                uniform = surveys and variants == 1
+                layout = SurveyLayout.WIDE if declared_keys is not None or uniform else SurveyLayout.LONG
+
+            wide_name, long_name = "surveys.csv", "surveys.csv"
+            if layout == SurveyLayout.BOTH:
+                wide_name, long_name = "surveys_wide.csv", "surveys_long.csv"
+            if layout in (SurveyLayout.WIDE, SurveyLayout.BOTH):
+                columns = declared_keys if declared_keys is not None else discovered
+                wide_spool = _spool()
+                files.append((wide_name, wide_spool))
+                wide_spool.write(_csv_line([*SURVEY_BASE_HEADER, *columns]))
+                key_params = {f"key_{index}": key for index, key in enumerate(columns)}
+                _copy(cursor, surveys_wide_query(len(columns), since), {**params, **key_params}, wide_spool)
+            if layout in (SurveyLayout.LONG, SurveyLayout.BOTH):
+                long_spool = _spool()
+                files.append((long_name, long_spool))
+                long_spool.write(_csv_line(SURVEY_LONG_HEADER))
+                _copy(cursor, surveys_long_query(since), params, long_spool)
+
+            cursor.execute(manifest_query(since), params)
+            sessions, recordings, surveys, newest = cursor.fetchone()
+        except Exception:
+            for _, spool in files:
+                spool.close()
+            raise
+        finally:
+            cursor.close()
+
+        declared = set(declared_keys or ())
+        next_since = next_watermark(newest, since)
+        manifest = {
+            "mode": "delta" if since is not None else "full",
+            "since": since.isoformat() if since else None,
+            "next_since": next_since.isoformat() if next_since else None,
+            "overlap_seconds": settings.EXPORT_DELTA_OVERLAP_SECONDS,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "sessions": sessions,
+            "recordings": recordings,
+            "surveys": surveys,
+            "format": ExportFormat.CSV.value,
+            "survey_layout": layout.value,
+            "survey_schema": "declared" if declared_keys is not None else "discovered",
+            "undeclared_survey_keys": [key for key in discovered if key not in declared] if declared_keys is not None else [],
+            "audio_included": False,
+        }
+        return cls(files, manifest)
+
+    def manifest(self) -> Dict[str, Any]:
+        return self._manifest
+
+    def close(self) -> None:
+        for _, spool in self.files:
+            spool.close()
+
+
+def _copy(cursor, query: str, params: Dict[str, Any], spool: IO[bytes]) -> None:
+    statement = cursor.mogrify(query, params).decode("utf-8")
+    cursor.copy_expert(f"COPY ({statement}) TO STDOUT WITH (FORMAT csv, ENCODING 'UTF8')", _CrlfWriter(spool))
+
+
+def iter_sql_dataset_zip(export: SqlDatasetExport, compresslevel: Optional[int] = None) -> Iterator[bytes]:
+    """Yield the metadata archive: dataset.csv, surveys.csv and manifest.json."""
+    if compresslevel is None:
+        compresslevel = settings.EXPORT_COMPRESSION_LEVEL
+    zip_stream = ZipStream(compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+    try:
+        for name, spool in export.files:
+            yield from zip_stream.write_chunks(name, _iter_spooled_bytes(spool))
+        manifest = json.dumps(export.manifest(), indent=2).encode("utf-8")
+        yield from zip_stream.write_bytes("manifest.json", manifest)
+        yield from zip_stream.close()
+    finally:
+        export.close()
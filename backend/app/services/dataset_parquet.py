@@ -0,0 +1,339 @@
+"""Typed Parquet tables for the dataset export (``format=parquet``).
+
+Analysts loading the CSVs into pandas get strings everywhere: booleans as
+``"True"``, missing durations as ``""``, timestamps as local ISO text. The
+Parquet export writes three typed, zstd-compressed tables instead:
+
+- ``sessions.parquet``: one row per session, with its first survey
+- ``recordings.parquet``: one row per recording, with the audio columns of
+  dataset.csv and the probed stream parameters
+- ``survey_responses.parquet``: one row per survey, ``respuestas_json``
+  flattened to one column per question (nested objects as ``parent.child``;
+  questions named like a base column, e.g. ``created_at``, become
+  ``answer_created_at``)
+
+Timestamps are ``timestamp[us]`` in ``TIMEZONE``. Rows are buffered in
+batches of ``PARQUET_BATCH_ROWS`` and written as row groups into spooled
+files, so memory stays bounded like the CSV writers. Question columns are
+only known once every survey has been seen, so survey rows are spooled as
+JSON lines during the pass and converted to Parquet at the end.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+import json
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from ..core.config import settings
+from ..core.time import to_utc
+from ..core.zip_stream import CHUNK_SIZE
+from ..models.recording import Recording
+from ..models.session import Session as SessionModel
+from ..models.survey import Survey
+from .survey_export import SurveySchema
+
+# Rows per Parquet row group / Arrow record batch.
+PARQUET_BATCH_ROWS = 10_000
+# Parquet files and spooled survey rows stay in memory up to this size, then spill to disk.
+PARQUET_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _timestamp() -> pa.DataType:
+    return pa.timestamp("us", tz=settings.TIMEZONE)
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    return to_utc(value) if value is not None else None
+
+
+def _spool() -> IO[bytes]:
+    return tempfile.SpooledTemporaryFile(max_size=PARQUET_SPOOL_MAX_BYTES)
+
+
+class ParquetTableWriter:
+    """Buffers rows column by column and writes them as row groups into a spool."""
+
+    def __init__(self, schema: pa.Schema) -> None:
+        self.schema = schema
+        self.spool = _spool()
+        self._writer = pq.ParquetWriter(
+            pa.PythonFile(self.spool, mode="w"),
+            schema,
+            compression=settings.EXPORT_PARQUET_COMPRESSION,
+        )
+        self._columns: List[List[Any]] = [[] for _ in schema]
+
+    def append(self, row: Sequence[Any]) -> None:
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        if len(self._columns[0]) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._columns[0]:
+            return
+        arrays = [pa.array(values, type=field.type) for values, field in zip(self._columns, self.schema)]
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._columns = [[] for _ in self.schema]
+
+    def finish(self) -> IO[bytes]:
+        """Write the pending rows and the footer; return the file rewound for reading."""
+        self._flush()
+        self._writer.close()
+        self.spool.seek(0)
+        return self.spool
+
+    def close(self) -> None:
+        self.spool.close()
+
+    def __enter__(self) -> "ParquetTableWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def recordings_schema() -> pa.Schema:
+    return pa.schema([
+        ("recording_id", pa.int64()),
+        ("session_id", pa.int64()),
+        ("session_code", pa.string()),
+        ("audio_file", pa.string()),
+        ("formato", pa.string()),
+        ("duration_seconds", pa.float64()),
+        ("sample_rate", pa.int32()),
+        ("channels", pa.int16()),
+        ("codec", pa.string()),
+        ("uploaded_at", _timestamp()),
+        ("survey_id", pa.int64()),
+        ("audio_missing", pa.bool_()),
+    ])
+
+
+class RecordingParquetRows(ParquetTableWriter):
+    """recordings.parquet row sink for ``iter_dataset_rows_and_audio``."""
+
+    def __init__(self) -> None:
+        super().__init__(recordings_schema())
+
+    def add(
+        self,
+        session: SessionModel,
+        recording: Optional[Recording],
+        audio_path: str,
+        formato: str,
+        audio_missing: bool,
+        survey: Optional[Survey],
+    ) -> None:
+        if recording is None:
+            # Sessions without recordings are only listed in sessions.parquet
+            return
+        self.append([
+            recording.id,
+            session.id,
+            session.session_code,
+            audio_path or None,
+            formato,
+            recording.duracion_segundos,
+            recording.sample_rate,
+            recording.channels,
+            recording.codec,
+            _utc(recording.created_at),
+            survey.id if survey else None,
+            audio_missing,
+        ])
+
+
+def sessions_schema() -> pa.Schema:
+    return pa.schema([
+        ("session_id", pa.int64()),
+        ("session_code", pa.string()),
+        ("estado", pa.string()),
+        ("texto_id", pa.string()),
+        ("created_at", _timestamp()),
+        ("updated_at", _timestamp()),
+        ("survey_id", pa.int64()),
+        ("survey_completed_at", _timestamp()),
+    ])
+
+
+def write_sessions_parquet(
+    sessions: Sequence[SessionModel],
+    first_survey: Callable[[int], Optional[Survey]],
+) -> IO[bytes]:
+    """sessions.parquet as a rewound spool (the caller closes it)."""
+    table = ParquetTableWriter(sessions_schema())
+    try:
+        for session in sessions:
+            texto = session.texto_seleccionado
+            survey = first_survey(session.id)
+            table.append([
+                session.id,
+                session.session_code,
+                session.estado,
+                str(texto.get("Id")) if isinstance(texto, dict) and texto.get("Id") is not None else None,
+                _utc(session.created_at),
+                _utc(session.updated_at),
+                survey.id if survey else None,
+                _utc(survey.created_at) if survey else None,
+            ])
+        return table.finish()
+    except Exception:
+        table.close()
+        raise
+
+
+def flatten_responses(responses: Mapping[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """One entry per answer; nested objects become ``parent.child`` keys."""
+    flat: Dict[str, Any] = {}
+    for key, value in responses.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten_responses(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _value_kind(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    return "json"
+
+
+def column_type(kinds: Set[str]) -> pa.DataType:
+    """Arrow type for a question column given the kinds of values seen in it."""
+    if kinds == {"bool"}:
+        return pa.bool_()
+    if kinds == {"int"}:
+        return pa.int64()
+    if kinds and kinds <= {"int", "float"}:
+        return pa.float64()
+    return pa.string()
+
+
+def _column_value(value: Any, arrow_type: pa.DataType) -> Any:
+    if value is None or not pa.types.is_string(arrow_type) or isinstance(value, str):
+        return value
+    # Mixed or structured answers are kept as JSON text
+    return json.dumps(value, ensure_ascii=False)
+
+
+SURVEY_BASE_COLUMNS = ["survey_id", "session_id", "session_code", "created_at"]
+ANSWER_COLUMN_PREFIX = "answer_"
+
+
+def answer_column_names(keys: Sequence[str]) -> List[str]:
+    """Parquet field names for question ``keys``, prefixed where they would repeat a base column."""
+    taken = set(SURVEY_BASE_COLUMNS) | set(keys)
+    names = []
+    for key in keys:
+        name = key
+        if key in SURVEY_BASE_COLUMNS:
+            name = ANSWER_COLUMN_PREFIX + key
+            while name in taken:
+                name = ANSWER_COLUMN_PREFIX + name
+            taken.add(name)
+        names.append(name)
+    return names
+
+
+class SurveyParquetWriter:
+    """survey_responses.parquet writer with the ``SurveyCsvWriter`` interface.
+
+    Question columns are discovered in a single pass (``SurveySchema``) while
+    their value kinds are tracked per column; rows are spooled as JSON lines
+    until the final schema is known.
+    """
+
+    compress_type: Optional[int] = zipfile.ZIP_STORED  # Parquet is already compressed
+
+    def __init__(self, declared_keys: Optional[Sequence[str]] = None) -> None:
+        self.schema = SurveySchema(declared_keys)
+        self._kinds: Dict[str, Set[str]] = {}
+        self._rows = tempfile.SpooledTemporaryFile(
+            max_size=PARQUET_SPOOL_MAX_BYTES,
+            mode="w+",
+            encoding="utf-8",
+        )
+        self._table: Optional[ParquetTableWriter] = None
+
+    def write(
+        self,
+        survey_id: int,
+        session_id: int,
+        session_code: str,
+        created_at: Optional[datetime],
+        responses: Optional[Mapping[str, Any]],
+    ) -> None:
+        answers = flatten_responses(responses) if responses else {}
+        self.schema.observe(answers)
+        for key, value in answers.items():
+            kind = _value_kind(value)
+            if kind is not None:
+                self._kinds.setdefault(key, set()).add(kind)
+        created = _utc(created_at)
+        self._rows.write(json.dumps([
+            survey_id,
+            session_id,
+            session_code,
+            created.isoformat() if created else None,
+            answers,
+        ]) + "\n")
+
+    def _arrow_schema(self) -> pa.Schema:
+        return pa.schema([
+            ("survey_id", pa.int64()),
+            ("session_id", pa.int64()),
+            ("session_code", pa.string()),
+            ("created_at", _timestamp()),
+            *(
+                (name, column_type(self._kinds.get(key, set())))
+                for key, name in zip(self.schema.columns, answer_column_names(self.schema.columns))
+            ),
+        ])
+
+    def files(self) -> List[Tuple[str, Iterator[bytes]]]:
+        schema = self._arrow_schema()
+        types = [field.type for field in schema][len(SURVEY_BASE_COLUMNS):]
+        self._table = ParquetTableWriter(schema)
+        self._rows.seek(0)
+        for line in self._rows:
+            survey_id, session_id, session_code, created_at, answers = json.loads(line)
+            self._table.append([
+                survey_id,
+                session_id,
+                session_code,
+                datetime.fromisoformat(created_at) if created_at else None,
+                *(_column_value(answers.get(key), arrow_type) for key, arrow_type in zip(self.schema.columns, types)),
+            ])
+        spool = self._table.finish()
+        return [("survey_responses.parquet", iter(lambda: spool.read(CHUNK_SIZE), b""))]
+
+    def manifest(self) -> Dict[str, Any]:
+        columns = self.schema.columns
+        return {
+            "survey_schema": "declared" if self.schema.declared else "discovered",
+            "undeclared_survey_keys": list(self.schema.undeclared),
+            "renamed_survey_keys": {
+                key: name for key, name in zip(columns, answer_column_names(columns)) if key != name
+            },
+        }
+
+    def close(self) -> None:
+        self._rows.close()
+        if self._table is not None:
+            self._table.close()
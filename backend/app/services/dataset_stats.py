@@ -0,0 +1,240 @@
+"""Aggregate statistics for the analyst dashboard (``/dataset/stats``).
+
+Everything is computed with GROUP BY queries in the database, so the
+dashboard no longer downloads ``/dataset`` to count sessions:
+
+- state funnel: sessions per ``estado`` and how many reached each state of
+  the ``SessionState`` workflow, with recordings and surveys totals read
+  from ``session_stats``
+- sessions (and completed sessions) per day of ``created_at`` in
+  ``TIMEZONE`` (UTC on SQLite) and per selected text
+  (``texto_seleccionado->>'Id'``)
+- recording durations: average, total and ``percentile_cont`` percentiles
+  (SQLite, used by the tests, reads the two neighbouring values instead)
+
+Results are cached per date range for ``DATASET_STATS_CACHE_TTL_SECONDS``
+and dropped whenever this process writes a session, recording or survey.
+Other workers only see those writes once their entry expires.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import math
+import threading
+import time
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.state_machine import SessionState
+from ..core.time import to_local_iso
+from ..models.recording import Recording
+from ..models.session import Session as SessionModel
+from ..models.session_stats import SessionStats
+
+DURATION_PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+STATS_CACHE_MAX_ENTRIES = 64
+
+
+class StatsCache:
+    """Thread-safe, TTL- and size-bounded cache of computed statistics."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, stats = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return stats
+
+    def put(self, key: Hashable, stats: Dict[str, Any]) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, stats)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every entry (any write can change any date range)."""
+        with self._lock:
+            self._entries.clear()
+
+
+stats_cache = StatsCache(
+    ttl_seconds=settings.DATASET_STATS_CACHE_TTL_SECONDS,
+    max_entries=STATS_CACHE_MAX_ENTRIES,
+)
+
+
+def _session_filters(created_from: Optional[datetime], created_to: Optional[datetime]) -> list:
+    filters = []
+    if created_from is not None:
+        filters.append(SessionModel.created_at >= created_from)
+    if created_to is not None:
+        filters.append(SessionModel.created_at < created_to)
+    return filters
+
+
+def _percentile_label(fraction: float) -> str:
+    return f"p{fraction * 100:g}"
+
+
+def build_funnel(counts: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Sessions in each state and sessions that reached it (the workflow is linear)."""
+    funnel = []
+    reached = 0
+    for state in reversed(list(SessionState)):
+        reached += counts.get(state.value, 0)
+        funnel.append({"estado": state.value, "sessions": counts.get(state.value, 0), "reached": reached})
+    funnel.reverse()
+    return funnel
+
+
+def _funnel_statement(filters: list) -> Select:
+    return (
+        select(
+            SessionModel.estado,
+            func.count(SessionModel.id).label("sessions"),
+            func.coalesce(func.sum(SessionStats.recordings_count), 0).label("recordings"),
+            func.coalesce(func.sum(SessionStats.surveys_count), 0).label("surveys"),
+        )
+        .outerjoin(SessionStats, SessionStats.session_id == SessionModel.id)
+        .where(*filters)
+        .group_by(SessionModel.estado)
+    )
+
+
+def _completed_count():
+    return func.count(SessionModel.id).filter(SessionModel.estado == SessionState.COMPLETED.value)
+
+
+def _per_day_statement(db: Session, filters: list) -> Select:
+    if db.get_bind().dialect.name == "postgresql":
+        day = func.date(func.timezone(settings.TIMEZONE, SessionModel.created_at))
+    else:
+        day = func.date(SessionModel.created_at)
+    day = day.label("day")
+    return (
+        select(day, func.count(SessionModel.id).label("sessions"), _completed_count().label("completed"))
+        .where(*filters)
+        .group_by(day)
+        .order_by(day)
+    )
+
+
+def _per_text_statement(filters: list) -> Select:
+    texto_id = SessionModel.texto_seleccionado["Id"].as_string().label("texto_id")
+    return (
+        select(texto_id, func.count(SessionModel.id).label("sessions"), _completed_count().label("completed"))
+        .where(*filters)
+        .group_by(texto_id)
+        .order_by(func.count(SessionModel.id).desc(), texto_id)
+    )
+
+
+def _durations_statement(filters: list) -> Select:
+    statement = select(Recording.duracion_segundos).where(Recording.duracion_segundos.isnot(None))
+    if filters:
+        statement = statement.join(SessionModel, SessionModel.id == Recording.session_id).where(*filters)
+    return statement
+
+
+def _duration_percentiles(db: Session, filters: list, count: int) -> Dict[str, Optional[float]]:
+    if not count:
+        return {_percentile_label(fraction): None for fraction in DURATION_PERCENTILES}
+
+    durations = _durations_statement(filters).subquery()
+    if db.get_bind().dialect.name == "postgresql":
+        values = db.execute(
+            select(func.percentile_cont(array(DURATION_PERCENTILES)).within_group(durations.c.duracion_segundos))
+        ).scalar()
+        return {_percentile_label(fraction): value for fraction, value in zip(DURATION_PERCENTILES, values)}
+
+    # Same interpolation as percentile_cont from the two values around each rank
+    percentiles = {}
+    for fraction in DURATION_PERCENTILES:
+        position = fraction * (count - 1)
+        lower = math.floor(position)
+        neighbours = db.execute(
+            select(durations.c.duracion_segundos)
+            .order_by(durations.c.duracion_segundos)
+            .offset(lower)
+            .limit(2)
+        ).scalars().all()
+        upper_value = neighbours[-1] if position > lower else neighbours[0]
+        percentiles[_percentile_label(fraction)] = neighbours[0] + (upper_value - neighbours[0]) * (position - lower)
+    return percentiles
+
+
+def compute_dataset_stats(
+    db: Session,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Run the aggregate queries for sessions created in ``[created_from, created_to)``."""
+    filters = _session_filters(created_from, created_to)
+
+    by_state = db.execute(_funnel_statement(filters)).all()
+    counts = {row.estado: row.sessions for row in by_state}
+
+    durations = _durations_statement(filters).subquery()
+    duration_row = db.execute(
+        select(
+            func.count(durations.c.duracion_segundos).label("count"),
+            func.avg(durations.c.duracion_segundos).label("average"),
+            func.coalesce(func.sum(durations.c.duracion_segundos), 0.0).label("total"),
+        )
+    ).one()
+
+    return {
+        "total_sessions": sum(counts.values()),
+        "funnel": build_funnel(counts),
+        "sessions_by_estado": counts,
+        "sessions_per_day": [
+            {"date": str(row.day), "sessions": row.sessions, "completed": row.completed}
+            for row in db.execute(_per_day_statement(db, filters))
+        ],
+        "sessions_per_text": [
+            {"texto_id": row.texto_id, "sessions": row.sessions, "completed": row.completed}
+            for row in db.execute(_per_text_statement(filters))
+        ],
+        "recordings": {
+            "total": sum(row.recordings for row in by_state),
+            "with_duration": duration_row.count,
+            "average_duration_seconds": duration_row.average,
+            "total_duration_seconds": duration_row.total,
+            "duration_percentiles": _duration_percentiles(db, filters, duration_row.count),
+        },
+        "surveys": {"total": sum(row.surveys for row in by_state)},
+        "generated_at": to_local_iso(datetime.now(timezone.utc)),
+    }
+
+
+def get_dataset_stats(
+    db: Session,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """``compute_dataset_stats`` through the TTL cache."""
+    key = (created_from, created_to)
+    stats = stats_cache.get(key)
+    if stats is None:
+        stats = compute_dataset_stats(db, created_from, created_to)
+        stats_cache.put(key, stats)
+    return stats
@@ -0,0 +1,299 @@
+"""Background dataset export jobs with cached artifacts.
+
+A job builds the export archive into a local spool file, uploads it to R2
+and records the object key. Jobs are keyed by a fingerprint of the exported
+data, so a request made while the data is unchanged reuses the finished
+archive (or the job already building it) instead of starting over.
+
+While a job runs, a heartbeat thread refreshes ``updated_at`` every
+``EXPORT_JOB_HEARTBEAT_SECONDS`` (loading the metadata and uploading the
+archive report no progress), and the job only completes if it is still
+``running``: a job taken over as stale stops before uploading and never
+overwrites its successor.
+Archives older than ``EXPORT_ARTIFACT_TTL_SECONDS`` are no longer reused
+and ``expire_old_artifacts`` deletes them from R2.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+import hashlib
+import json
+import logging
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.storage_r2 import delete_object, get_s3_client, upload_fileobj
+from ..core.time import to_utc
+from ..db.session import SessionLocal
+from ..models.export_job import ExportJob
+from ..models.recording import Recording
+from ..models.session import Session as SessionModel
+from ..models.survey import Survey
+from .dataset_export import DatasetExport, iter_dataset_zip
+from .survey_export import load_declared_keys
+
+logger = logging.getLogger(__name__)
+
+# Bump when the archive layout changes so older cached artifacts are not reused.
+EXPORT_FORMAT_VERSION = 1
+
+# Minimum seconds between progress commits (also the job heartbeat).
+PROGRESS_COMMIT_SECONDS = 2.0
+
+
+class ExportJobStatus(str, Enum):
+    """Lifecycle of an export job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    EXPIRED = "expired"  # completed, archive deleted after EXPORT_ARTIFACT_TTL_SECONDS
+
+
+def compute_cache_key(db: Session, compression_level: Optional[int], since: Optional[datetime] = None) -> str:
+    """Fingerprint the exported data and options using aggregates only."""
+    sessions = db.query(
+        func.count(SessionModel.id),
+        func.max(SessionModel.id),
+        func.max(SessionModel.updated_at),
+    ).one()
+    recordings = db.query(
+        func.count(Recording.id),
+        func.max(Recording.id),
+        func.count(Recording.duracion_segundos),
+        # Probe results rewrite duration and stream parameters in place
+        func.max(Recording.updated_at),
+    ).one()
+    surveys = db.query(func.count(Survey.id), func.max(Survey.id)).one()
+
+    fingerprint = {
+        "version": EXPORT_FORMAT_VERSION,
+        "compression_level": compression_level,
+        "since": to_utc(since).isoformat() if since else None,
+        "survey_layout": settings.EXPORT_SURVEY_LAYOUT,
+        "survey_keys": load_declared_keys(),
+        "sessions": list(sessions),
+        "recordings": list(recordings),
+        "surveys": list(surveys),
+    }
+    encoded = json.dumps(fingerprint, default=str, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _is_stale(job: ExportJob) -> bool:
+    last_seen = job.updated_at or job.created_at
+    if last_seen is None:
+        return False
+    age = datetime.now(timezone.utc) - to_utc(last_seen)
+    return age > timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+
+
+def _artifact_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.EXPORT_ARTIFACT_TTL_SECONDS)
+
+
+def find_reusable_job(db: Session, cache_key: str) -> Optional[ExportJob]:
+    """Return a finished or live job for ``cache_key``, if any.
+
+    Running jobs that stopped reporting progress (e.g. the worker died) are
+    marked as failed so a new job can take over.
+    """
+    jobs = (
+        db.query(ExportJob)
+        .filter(ExportJob.cache_key == cache_key)
+        .filter(ExportJob.status != ExportJobStatus.FAILED.value)
+        .order_by(ExportJob.id.desc())
+        .all()
+    )
+    for job in jobs:
+        if job.status == ExportJobStatus.COMPLETED.value and job.storage_key:
+            if job.completed_at is not None and to_utc(job.completed_at) <= _artifact_cutoff():
+                continue  # left for expire_old_artifacts
+            return job
+        if job.status in (ExportJobStatus.PENDING.value, ExportJobStatus.RUNNING.value):
+            if not _is_stale(job):
+                return job
+            job.status = ExportJobStatus.FAILED.value
+            job.error = "Export job stopped reporting progress"
+            db.commit()
+    return None
+
+
+def create_export_job(
+    db: Session,
+    compression_level: Optional[int],
+    since: Optional[datetime] = None,
+) -> Tuple[ExportJob, bool]:
+    """Return ``(job, reused)``: an existing job for the same data, or a new pending one."""
+    cache_key = compute_cache_key(db, compression_level, since)
+    existing = find_reusable_job(db, cache_key)
+    if existing:
+        return existing, True
+
+    job = ExportJob(
+        cache_key=cache_key,
+        compression_level=compression_level,
+        since=since,
+        status=ExportJobStatus.PENDING.value,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job, False
+
+
+def _update_if_running(db: Session, job_id: int, **values) -> bool:
+    """Update the job only while it is still ``running``; False if it was taken over or finished."""
+    updated = db.query(ExportJob).filter(
+        ExportJob.id == job_id,
+        ExportJob.status == ExportJobStatus.RUNNING.value,
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return updated == 1
+
+
+def _log_taken_over(job_id: int) -> None:
+    logger.warning("Export job %s was taken over while running; its result is discarded", job_id)
+
+
+def _touch(job_id: int, session_factory: Callable[[], Session]) -> None:
+    db = session_factory()
+    try:
+        _update_if_running(db, job_id, updated_at=func.now())
+    finally:
+        db.close()
+
+
+@contextmanager
+def _heartbeat(job_id: int, session_factory: Callable[[], Session]) -> Iterator[None]:
+    """Refresh the job's ``updated_at`` from a background thread while the block runs."""
+    stopped = threading.Event()
+
+    def beat() -> None:
+        while not stopped.wait(settings.EXPORT_JOB_HEARTBEAT_SECONDS):
+            try:
+                _touch(job_id, session_factory)
+            except Exception:
+                logger.warning("Heartbeat for export job %s failed", job_id, exc_info=True)
+
+    thread = threading.Thread(target=beat, name=f"export-job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run_export_job(job_id: int, session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """Build the archive for ``job_id`` and upload it to R2 (runs in the background)."""
+    db = session_factory()
+    try:
+        started = db.query(ExportJob).filter(
+            ExportJob.id == job_id,
+            ExportJob.status == ExportJobStatus.PENDING.value,
+        ).update({ExportJob.status: ExportJobStatus.RUNNING.value}, synchronize_session=False)
+        db.commit()
+        if not started:
+            return
+        job = db.get(ExportJob, job_id)
+        since, compression_level = job.since, job.compression_level
+        # One key per job: a job taken over as stale never overwrites (or
+        # expires) its successor's archive
+        storage_key = f"{settings.EXPORT_ARTIFACT_PREFIX}{job.cache_key}-{job_id}.zip"
+
+        with _heartbeat(job_id, session_factory):
+            # Load metadata with its own session: committing progress on ``db``
+            # would otherwise expire every loaded row.
+            data_db = session_factory()
+            try:
+                export = DatasetExport.load(data_db, since=since)
+            finally:
+                data_db.close()
+
+            total = export.recording_count
+            if not _update_if_running(db, job_id, total=total):
+                _log_taken_over(job_id)
+                return
+
+            s3_client = get_s3_client()
+            last_commit = time.monotonic()
+
+            def on_progress(processed: int) -> None:
+                nonlocal last_commit
+                if time.monotonic() - last_commit >= PROGRESS_COMMIT_SECONDS:
+                    _update_if_running(db, job_id, progress=processed)
+                    last_commit = time.monotonic()
+
+            with tempfile.TemporaryFile(dir=settings.EXPORT_SPOOL_DIR or None) as spool:
+                for chunk in iter_dataset_zip(
+                    export,
+                    s3_client,
+                    compresslevel=compression_level,
+                    on_progress=on_progress,
+                ):
+                    spool.write(chunk)
+                # Do not upload an archive nobody will reference
+                if not _update_if_running(db, job_id, progress=total):
+                    _log_taken_over(job_id)
+                    return
+                size_bytes = spool.tell()
+                spool.seek(0)
+                upload_fileobj(
+                    spool,
+                    bucket=settings.R2_BUCKET,
+                    key=storage_key,
+                    content_type="application/zip",
+                )
+
+        completed = _update_if_running(
+            db,
+            job_id,
+            storage_key=storage_key,
+            size_bytes=size_bytes,
+            progress=total,
+            status=ExportJobStatus.COMPLETED.value,
+            completed_at=datetime.now(timezone.utc),
+        )
+        if not completed:
+            _log_taken_over(job_id)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        db.rollback()
+        _update_if_running(db, job_id, status=ExportJobStatus.FAILED.value, error=str(exc)[:500])
+    finally:
+        db.close()
+
+
+def expire_old_artifacts(session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """Delete archives completed more than ``EXPORT_ARTIFACT_TTL_SECONDS`` ago; returns how many."""
+    db = session_factory()
+    try:
+        old = (
+            db.query(ExportJob)
+            .filter(ExportJob.status == ExportJobStatus.COMPLETED.value)
+            .filter(ExportJob.completed_at <= _artifact_cutoff())
+            .all()
+        )
+        for job in old:
+            if job.storage_key:
+                try:
+                    delete_object(settings.R2_BUCKET, job.storage_key)
+                except Exception:
+                    # Retried on the next sweep
+                    logger.warning("Could not delete export artifact %s", job.storage_key, exc_info=True)
+                    continue
+            job.status = ExportJobStatus.EXPIRED.value
+            job.storage_key = None
+            db.commit()
+        return len(old)
+    finally:
+        db.close()
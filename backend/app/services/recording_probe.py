@@ -0,0 +1,174 @@
+"""Fill recording duration and stream parameters from the stored audio.
+
+Each probe costs a HEAD request plus one or two small ranged GETs (see
+``core.audio_probe``); audio is never downloaded whole. Files sent through
+the backend are probed from the local upload before it is discarded,
+direct-to-R2 uploads in a background task, and existing rows can be
+backfilled with::
+
+    python -m app.services.recording_probe [--limit N] [--force]
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import IO, Callable, Optional, Tuple
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from ..core.audio_probe import AudioInfo, probe_audio
+from ..core.config import settings
+from ..core.storage_r2 import get_object_range, head_object
+from ..db.session import SessionLocal
+from ..models.recording import Recording
+from . import session_stats
+from .dataset_stats import stats_cache
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 100
+
+
+def probe_object(bucket: str, key: str) -> Optional[AudioInfo]:
+    """Probe an R2 object; None if its format is not supported."""
+    head = head_object(bucket=bucket, key=key)
+    if head is None:
+        raise FileNotFoundError(f"Object not found in storage: {key}")
+    return probe_audio(
+        lambda start, length: get_object_range(bucket, key, start, length),
+        head["ContentLength"],
+    )
+
+
+def probe_fileobj(fileobj: IO[bytes], size: int) -> Optional[AudioInfo]:
+    """Probe a local seekable file (e.g. an upload still on disk); None if unreadable.
+
+    Never raises: the upload it belongs to is already stored, and metadata
+    is not worth failing it over.
+    """
+    def read_range(start: int, length: int) -> bytes:
+        fileobj.seek(start)
+        return fileobj.read(length)
+
+    try:
+        return probe_audio(read_range, size)
+    except Exception:
+        logger.warning("Could not parse audio headers of uploaded file", exc_info=True)
+        return None
+
+
+def apply_probe(recording: Recording, info: Optional[AudioInfo]) -> None:
+    """Copy probe results onto the recording and mark it as probed."""
+    if info is not None:
+        if info.duration_seconds is not None:
+            recording.duracion_segundos = round(info.duration_seconds, 3)
+        recording.sample_rate = info.sample_rate
+        recording.channels = info.channels
+        recording.codec = info.codec
+    recording.probed_at = datetime.now(timezone.utc)
+
+
+def _apply_probe_counted(db: Session, recording: Recording, info: Optional[AudioInfo]) -> None:
+    """``apply_probe`` on a stored recording, carrying a duration change into session_stats."""
+    before = recording.duracion_segundos or 0.0
+    apply_probe(recording, info)
+    delta = (recording.duracion_segundos or 0.0) - before
+    if delta:
+        db.execute(session_stats.duration_changed(db, recording.session_id, delta))
+
+
+def _probe_key(key: str) -> Optional[AudioInfo]:
+    try:
+        return probe_object(settings.R2_BUCKET, key)
+    except ValueError:
+        # Corrupt headers will not get better on retry: record it as probed.
+        logger.warning("Could not parse audio headers of %s", key, exc_info=True)
+        return None
+
+
+def probe_recording(recording_id: int, session_factory: Callable[[], Session] = SessionLocal) -> bool:
+    """Probe one recording (runs in the background after upload).
+
+    Returns False when the recording is missing or storage could not be
+    read; the row then stays unprobed and the backfill will retry it.
+    """
+    db = session_factory()
+    try:
+        recording = db.get(Recording, recording_id)
+        if recording is None or not recording.storage_key:
+            return False
+        try:
+            info = _probe_key(recording.storage_key)
+        except Exception:
+            logger.warning("Probing recording %s failed", recording_id, exc_info=True)
+            return False
+        _apply_probe_counted(db, recording, info)
+        db.commit()
+        stats_cache.invalidate()
+        return True
+    finally:
+        db.close()
+
+
+def backfill_recordings(
+    session_factory: Callable[[], Session] = SessionLocal,
+    concurrency: Optional[int] = None,
+    force: bool = False,
+    limit: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Probe recordings that were never probed (all of them with ``force``).
+
+    Rows are walked by id in batches; storage reads run on a thread pool
+    while database writes stay on this thread. Returns ``(probed, failed)``.
+    """
+    concurrency = concurrency or settings.AUDIO_PROBE_CONCURRENCY
+    probed = failed = 0
+    after_id = 0
+    db = session_factory()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while limit is None or probed + failed < limit:
+                batch_size = BACKFILL_BATCH_SIZE if limit is None else min(BACKFILL_BATCH_SIZE, limit - probed - failed)
+                query = (
+                    db.query(Recording)
+                    .filter(Recording.id > after_id)
+                    .filter(Recording.storage_key.isnot(None))
+                )
+                if not force:
+                    query = query.filter(Recording.probed_at.is_(None))
+                batch = query.order_by(Recording.id).limit(batch_size).all()
+                if not batch:
+                    break
+                after_id = batch[-1].id
+
+                futures = [(recording, pool.submit(_probe_key, recording.storage_key)) for recording in batch]
+                for recording, future in futures:
+                    try:
+                        _apply_probe_counted(db, recording, future.result())
+                        probed += 1
+                    except Exception:
+                        logger.warning("Probing recording %s failed", recording.id, exc_info=True)
+                        failed += 1
+                db.commit()
+                stats_cache.invalidate()
+    finally:
+        db.close()
+    return probed, failed
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill recording duration, sample rate, channels and codec.")
+    parser.add_argument("--limit", type=int, default=None, help="Probe at most this many recordings")
+    parser.add_argument("--force", action="store_true", help="Re-probe recordings that were already probed")
+    parser.add_argument("--concurrency", type=int, default=None, help="Parallel storage reads")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    probed, failed = backfill_recordings(concurrency=args.concurrency, force=args.force, limit=args.limit)
+    print(f"Probed {probed} recordings, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
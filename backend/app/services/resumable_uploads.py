@@ -0,0 +1,223 @@
+"""Resumable audio uploads on top of R2 multipart uploads.
+
+The server owns the multipart upload and records every part it has stored,
+so a client that lost its connection can ask which byte ranges arrived and
+send only the missing parts. Each part is forwarded to R2 as soon as it is
+received; nothing is kept on local disk between requests. Uploads that stop
+receiving parts are aborted after ``RESUMABLE_UPLOAD_TTL_SECONDS`` so R2
+does not keep billing for orphaned parts.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import math
+import secrets
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.storage_r2 import (
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
+    upload_part,
+)
+from ..core.time import to_utc
+from ..db.session import SessionLocal
+from ..models.resumable_upload import ResumableUpload
+
+logger = logging.getLogger(__name__)
+
+# S3/R2 limit on the number of parts in one multipart upload.
+MAX_PARTS = 10000
+
+
+class ResumableUploadStatus(str, Enum):
+    """Lifecycle of a resumable upload."""
+    PENDING = "pending"
+    COMPLETED = "completed"
+    ABORTED = "aborted"
+    EXPIRED = "expired"
+
+
+class InvalidPart(ValueError):
+    """The part number or size does not match the upload layout."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _next_expiry() -> datetime:
+    return _now() + timedelta(seconds=settings.RESUMABLE_UPLOAD_TTL_SECONDS)
+
+
+def part_count(upload: ResumableUpload) -> int:
+    return max(1, math.ceil(upload.total_size / upload.part_size))
+
+
+def expected_part_size(upload: ResumableUpload, part_number: int) -> int:
+    """Size in bytes that part ``part_number`` (1-based) must have."""
+    count = part_count(upload)
+    if part_number < 1 or part_number > count:
+        raise InvalidPart(f"part_number must be between 1 and {count}")
+    if part_number < count:
+        return upload.part_size
+    return upload.total_size - upload.part_size * (count - 1)
+
+
+def part_range(upload: ResumableUpload, part_number: int) -> Tuple[int, int]:
+    """Half-open byte range ``[start, end)`` covered by a part."""
+    start = (part_number - 1) * upload.part_size
+    return start, start + expected_part_size(upload, part_number)
+
+
+def received_part_numbers(upload: ResumableUpload) -> List[int]:
+    return sorted(int(number) for number in (upload.parts or {}))
+
+
+def missing_part_numbers(upload: ResumableUpload) -> List[int]:
+    received = set(received_part_numbers(upload))
+    return [number for number in range(1, part_count(upload) + 1) if number not in received]
+
+
+def received_ranges(upload: ResumableUpload) -> List[Tuple[int, int]]:
+    """Merged ``[start, end)`` byte ranges already stored in R2."""
+    ranges: List[Tuple[int, int]] = []
+    for number in received_part_numbers(upload):
+        start, end = part_range(upload, number)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def received_bytes(upload: ResumableUpload) -> int:
+    return sum(part["size"] for part in (upload.parts or {}).values())
+
+
+def contiguous_offset(upload: ResumableUpload) -> int:
+    """Bytes received without gaps from the start (where a sequential client resumes)."""
+    ranges = received_ranges(upload)
+    return ranges[0][1] if ranges and ranges[0][0] == 0 else 0
+
+
+def is_expired(upload: ResumableUpload) -> bool:
+    return to_utc(upload.expires_at) <= _now()
+
+
+def create_resumable_upload(
+    db: Session,
+    session_id: int,
+    storage_key: str,
+    total_size: int,
+    filename: Optional[str] = None,
+    content_type: Optional[str] = None,
+) -> ResumableUpload:
+    """Start the R2 multipart upload and persist its state."""
+    part_size = settings.RESUMABLE_UPLOAD_PART_SIZE_MB * 1024 * 1024
+    if math.ceil(total_size / part_size) > MAX_PARTS:
+        raise InvalidPart(f"Upload would need more than {MAX_PARTS} parts")
+
+    upload = ResumableUpload(
+        id=secrets.token_urlsafe(24),
+        session_id=session_id,
+        storage_key=storage_key,
+        upload_id=create_multipart_upload(
+            bucket=settings.R2_BUCKET,
+            key=storage_key,
+            content_type=content_type,
+        ),
+        filename=filename,
+        content_type=content_type,
+        total_size=total_size,
+        part_size=part_size,
+        parts={},
+        status=ResumableUploadStatus.PENDING.value,
+        expires_at=_next_expiry(),
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def store_part(db: Session, upload: ResumableUpload, part_number: int, data: bytes) -> ResumableUpload:
+    """Forward one part to R2 and record it; re-sending a part replaces it."""
+    expected = expected_part_size(upload, part_number)
+    if len(data) != expected:
+        raise InvalidPart(f"Part {part_number} must be {expected} bytes, got {len(data)}")
+
+    etag = upload_part(
+        bucket=settings.R2_BUCKET,
+        key=upload.storage_key,
+        upload_id=upload.upload_id,
+        part_number=part_number,
+        body=data,
+    )
+
+    # Parts of the same upload may arrive concurrently: re-read the row under
+    # a lock so one request does not overwrite the part map of another.
+    db.refresh(upload, with_for_update=True)
+    parts: Dict[str, dict] = dict(upload.parts or {})
+    parts[str(part_number)] = {"etag": etag, "size": len(data)}
+    upload.parts = parts
+    upload.expires_at = _next_expiry()
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+def complete_parts(upload: ResumableUpload) -> None:
+    """Assemble the stored parts into the final object in R2."""
+    complete_multipart_upload(
+        bucket=settings.R2_BUCKET,
+        key=upload.storage_key,
+        upload_id=upload.upload_id,
+        parts=[
+            {"PartNumber": int(number), "ETag": part["etag"]}
+            for number, part in (upload.parts or {}).items()
+        ],
+    )
+
+
+def _abort(upload: ResumableUpload, new_status: ResumableUploadStatus) -> None:
+    try:
+        abort_multipart_upload(
+            bucket=settings.R2_BUCKET,
+            key=upload.storage_key,
+            upload_id=upload.upload_id,
+        )
+    except Exception:
+        # The state change still happens; R2's own lifecycle rule is the backstop.
+        logger.warning("Could not abort multipart upload %s", upload.upload_id, exc_info=True)
+    upload.status = new_status.value
+
+
+def abort_resumable_upload(db: Session, upload: ResumableUpload) -> None:
+    """Cancel an upload at the client's request and discard its parts."""
+    _abort(upload, ResumableUploadStatus.ABORTED)
+    db.commit()
+
+
+def expire_stale_uploads(session_factory: Callable[[], Session] = SessionLocal) -> int:
+    """Abort pending uploads past their expiry; returns how many were expired."""
+    db = session_factory()
+    try:
+        stale = (
+            db.query(ResumableUpload)
+            .filter(ResumableUpload.status == ResumableUploadStatus.PENDING.value)
+            .filter(ResumableUpload.expires_at <= _now())
+            .all()
+        )
+        for upload in stale:
+            _abort(upload, ResumableUploadStatus.EXPIRED)
+            upload.parts = {}
+            db.commit()
+        return len(stale)
+    finally:
+        db.close()
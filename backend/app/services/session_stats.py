@@ -0,0 +1,249 @@
+"""Per-session summary table (``session_stats``) maintained on insert.
+
+``/dataset?summary=true`` and the analyst dashboard read recordings and
+surveys counts, the first survey, total audio duration and last activity
+from this narrow table instead of aggregating recordings and surveys on
+every load. Each write path executes one upsert in the same transaction as
+the row it accounts for:
+
+- ``session_created``: zeroed row for a new session
+- ``recording_added``: one more recording and its duration
+- ``survey_added``: one more survey; ``first_survey_id`` if it precedes the
+  stored one
+- ``duration_changed``: a probe filled ``duracion_segundos`` after insert
+
+The upserts are ``INSERT ... ON CONFLICT DO UPDATE`` statements that add to
+the stored values, so concurrent uploads to one session never lose an
+increment. The first survey of a session is the one with the earliest
+``created_at`` (NULLs first), then the lowest id, as in the dataset export.
+The table can always be recomputed from the source rows::
+
+    python -m app.services.session_stats rebuild
+    python -m app.services.session_stats verify   # exit status 1 on drift
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Union
+import argparse
+import sys
+
+from sqlalchemy import ColumnElement, Select, and_, case, delete, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+from ..db.session import SessionLocal, without_statement_timeout
+from ..models.recording import Recording
+from ..models.session import Session as SessionModel
+from ..models.session_stats import SessionStats
+from ..models.survey import Survey
+
+# Float sums may differ in the last bits depending on the order they were added.
+DURATION_TOLERANCE = 1e-6
+
+_UPSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+STATS_COLUMNS = ["session_id", "recordings_count", "surveys_count", "first_survey_id", "total_duration", "last_activity"]
+
+
+def _latest(*columns: ColumnElement) -> ColumnElement:
+    """Newest non-NULL value (``GREATEST`` ignoring NULLs, also on SQLite)."""
+    latest = columns[0]
+    for column in columns[1:]:
+        latest = case(
+            (column.is_(None), latest),
+            (latest.is_(None), column),
+            (column > latest, column),
+            else_=latest,
+        )
+    return latest
+
+
+def first_survey_statement(session_id: ColumnElement) -> Select:
+    """Id of the session's first survey: earliest ``created_at`` (NULLs first), then lowest id."""
+    return (
+        select(Survey.id)
+        .where(Survey.session_id == session_id)
+        .order_by(Survey.created_at.asc().nulls_first(), Survey.id)
+        .limit(1)
+    )
+
+
+def _first_survey(survey_id: int) -> ColumnElement:
+    """``first_survey_id`` after adding ``survey_id``: whichever of it and the stored one comes first."""
+    stored = SessionStats.first_survey_id
+    # Spelled out so the subquery is not given its own FROM session_stats
+    # (upserts have no enclosing SELECT to correlate with)
+    stored_at = select(Survey.created_at).where(Survey.id == literal_column("session_stats.first_survey_id")).scalar_subquery()
+    new_at = select(Survey.created_at).where(Survey.id == survey_id).scalar_subquery()
+    new_first = or_(
+        and_(new_at.is_(None), stored_at.isnot(None)),
+        new_at < stored_at,
+        and_(new_at.is_not_distinct_from(stored_at), survey_id < stored),
+    )
+    return case((stored.is_(None), survey_id), (new_first, survey_id), else_=stored)
+
+
+def _upsert(
+    db: Union[Session, AsyncSession],
+    session_id: int,
+    recordings: int = 0,
+    surveys: int = 0,
+    duration: float = 0.0,
+    first_survey_id: Optional[int] = None,
+    last_activity: Optional[ColumnElement] = None,
+) -> Insert:
+    dialect = db.get_bind().dialect.name
+    if dialect not in _UPSERTS:
+        raise NotImplementedError(f"session_stats upserts are not supported on {dialect}")
+    statement = _UPSERTS[dialect](SessionStats).values(
+        session_id=session_id,
+        recordings_count=recordings,
+        surveys_count=surveys,
+        first_survey_id=first_survey_id,
+        total_duration=duration,
+        last_activity=last_activity,
+    )
+    new = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[SessionStats.session_id],
+        set_={
+            "recordings_count": SessionStats.recordings_count + new.recordings_count,
+            "surveys_count": SessionStats.surveys_count + new.surveys_count,
+            "first_survey_id": (
+                _first_survey(first_survey_id) if first_survey_id is not None else SessionStats.first_survey_id
+            ),
+            "total_duration": SessionStats.total_duration + new.total_duration,
+            "last_activity": _latest(SessionStats.last_activity, new.last_activity),
+        },
+    )
+
+
+# The builders below return the upsert; callers execute it in their own
+# transaction (``db.execute(...)`` or ``await db.execute(...)``), after a
+# flush so the new row has its id.
+
+def session_created(db: Union[Session, AsyncSession], session_id: int) -> Insert:
+    created_at = select(SessionModel.created_at).where(SessionModel.id == session_id).scalar_subquery()
+    return _upsert(db, session_id, last_activity=created_at)
+
+
+def recording_added(db: Union[Session, AsyncSession], recording: Recording) -> Insert:
+    created_at = select(Recording.created_at).where(Recording.id == recording.id).scalar_subquery()
+    return _upsert(
+        db,
+        recording.session_id,
+        recordings=1,
+        duration=recording.duracion_segundos or 0.0,
+        last_activity=created_at,
+    )
+
+
+def survey_added(db: Union[Session, AsyncSession], survey: Survey) -> Insert:
+    created_at = select(Survey.created_at).where(Survey.id == survey.id).scalar_subquery()
+    return _upsert(db, survey.session_id, surveys=1, first_survey_id=survey.id, last_activity=created_at)
+
+
+def duration_changed(db: Union[Session, AsyncSession], session_id: int, delta: float) -> Insert:
+    return _upsert(db, session_id, duration=delta)
+
+
+def expected_stats_statement() -> Select:
+    """``session_stats`` rows recomputed from sessions, recordings and surveys."""
+    recordings = (
+        select(
+            Recording.session_id,
+            func.count(Recording.id).label("recordings_count"),
+            func.coalesce(func.sum(Recording.duracion_segundos), 0.0).label("total_duration"),
+            func.max(Recording.created_at).label("last_recording"),
+        )
+        .group_by(Recording.session_id)
+        .subquery()
+    )
+    surveys = (
+        select(
+            Survey.session_id,
+            func.count(Survey.id).label("surveys_count"),
+            func.max(Survey.created_at).label("last_survey"),
+        )
+        .group_by(Survey.session_id)
+        .subquery()
+    )
+    return (
+        select(
+            SessionModel.id.label("session_id"),
+            func.coalesce(recordings.c.recordings_count, 0).label("recordings_count"),
+            func.coalesce(surveys.c.surveys_count, 0).label("surveys_count"),
+            first_survey_statement(SessionModel.id).scalar_subquery().label("first_survey_id"),
+            func.coalesce(recordings.c.total_duration, 0.0).label("total_duration"),
+            _latest(SessionModel.created_at, recordings.c.last_recording, surveys.c.last_survey).label("last_activity"),
+        )
+        .outerjoin(recordings, recordings.c.session_id == SessionModel.id)
+        .outerjoin(surveys, surveys.c.session_id == SessionModel.id)
+    )
+
+
+def rebuild_session_stats(db: Session) -> int:
+    """Replace every ``session_stats`` row with recomputed values; returns the row count.
+
+    Runs in one transaction. Writes that land while it runs are counted by
+    the recomputation or by their own upsert, but run it off-peak anyway:
+    on Postgres the delete holds row locks until the commit.
+    """
+    without_statement_timeout(db)
+    db.execute(delete(SessionStats))
+    db.execute(SessionStats.__table__.insert().from_select(STATS_COLUMNS, expected_stats_statement()))
+    count = db.execute(select(func.count()).select_from(SessionStats)).scalar() or 0
+    db.commit()
+    return count
+
+
+def verify_session_stats(db: Session) -> List[int]:
+    """Ids of sessions whose stored stats are missing or differ from the source rows."""
+    without_statement_timeout(db)
+    expected = expected_stats_statement().subquery()
+    stored = SessionStats
+    drifted = (
+        select(expected.c.session_id)
+        .outerjoin(stored, stored.session_id == expected.c.session_id)
+        .where(
+            stored.session_id.is_(None)
+            | stored.recordings_count.is_distinct_from(expected.c.recordings_count)
+            | stored.surveys_count.is_distinct_from(expected.c.surveys_count)
+            | stored.first_survey_id.is_distinct_from(expected.c.first_survey_id)
+            | (func.abs(stored.total_duration - expected.c.total_duration) > DURATION_TOLERANCE)
+            | stored.last_activity.is_distinct_from(expected.c.last_activity)
+        )
+        .order_by(expected.c.session_id)
+    )
+    return list(db.execute(drifted).scalars())
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild or verify the session_stats summary table.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            print(f"Rebuilt session_stats for {rebuild_session_stats(db)} sessions")
+            return
+        drifted = verify_session_stats(db)
+    finally:
+        db.close()
+
+    if drifted:
+        shown = ", ".join(str(session_id) for session_id in drifted[:20])
+        print(f"session_stats differs for {len(drifted)} sessions: {shown}{' ...' if len(drifted) > 20 else ''}")
+        sys.exit(1)
+    print("session_stats is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Single-pass surveys CSV writer for the dataset export.
+
+Surveys are consumed once, in id order, and written straight into spooled
+files for the requested layout:
+
+- ``wide``: one row per survey, one column per question key
+- ``long``: one ``question_key``/``answer_value`` row per answer
+- ``both``: ``surveys_wide.csv`` and ``surveys_long.csv`` from the same pass
+- ``auto``: wide when every survey has the same keys (or a schema is
+  declared), long otherwise
+
+Question keys are discovered with an ordered set while rows are written, and
+each survey's sorted key set is compared with the first one to know whether
+the keys are uniform, so nothing about earlier surveys is kept in memory. A
+survey definition (``SURVEY_SCHEMA_FILE``) fixes the wide columns up front;
+answers to undeclared keys are then only present in the long layout.
+Nested answers (objects, lists) are written as JSON text.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import IO, Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import csv
+import io
+import json
+
+from ..core.config import settings
+from ..core.time import to_local_iso
+from ..core.zip_stream import CHUNK_SIZE
+
+SURVEY_BASE_HEADER = ["survey_id", "session_id", "session_code", "created_at"]
+SURVEY_LONG_HEADER = [*SURVEY_BASE_HEADER, "question_key", "answer_value"]
+
+# Rows re-serialized per chunk when padding a wide CSV whose columns grew mid-export.
+PAD_BATCH_ROWS = 1000
+
+
+class SurveyLayout(str, Enum):
+    """surveys.csv layouts the export can produce."""
+    AUTO = "auto"
+    WIDE = "wide"
+    LONG = "long"
+    BOTH = "both"
+
+
+def load_declared_keys(path: Optional[str] = None) -> Optional[List[str]]:
+    """Question keys from a survey definition file, in declared order.
+
+    The file is ``{"questions": [{"key": "claridad", ...}, ...]}`` (plain
+    strings are accepted in place of the question objects). Returns None when
+    no definition is configured.
+    """
+    path = settings.SURVEY_SCHEMA_FILE if path is None else path
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as handle:
+        definition = json.load(handle)
+    questions = definition.get("questions", []) if isinstance(definition, dict) else definition
+    keys = [str(question["key"]) if isinstance(question, dict) else str(question) for question in questions]
+    return list(dict.fromkeys(keys))
+
+
+class SurveySchema:
+    """Question keys seen so far, in discovery order, and whether all surveys share one key set."""
+
+    def __init__(self, declared_keys: Optional[Sequence[str]] = None) -> None:
+        self.declared = declared_keys is not None
+        self.columns: List[str] = list(dict.fromkeys(declared_keys or ()))
+        self._known = set(self.columns)
+        self.undeclared: Dict[str, None] = {}  # Ordered set
+        self.uniform = True
+        self.surveys = 0
+        self._fingerprint: Optional[Tuple[str, ...]] = None
+
+    def observe(self, responses: Optional[Mapping[str, Any]]) -> None:
+        """Account for one survey's answers (O(k log k) in its number of keys)."""
+        keys = tuple(sorted(responses)) if responses else ()
+        if self._fingerprint is None:
+            self._fingerprint = keys
+        elif self.uniform and keys != self._fingerprint:
+            self.uniform = False
+        self.surveys += 1
+
+        for key in keys:
+            if key in self._known:
+                continue
+            if self.declared:
+                self.undeclared[key] = None
+            else:
+                self.columns.append(key)
+                self._known.add(key)
+
+    def auto_layout(self) -> SurveyLayout:
+        if self.declared or (self.surveys and self.uniform):
+            return SurveyLayout.WIDE
+        return SurveyLayout.LONG
+
+
+class SurveyCsvWriter:
+    """Writes surveys into the spools of the requested layout in a single pass.
+
+    Call ``write`` once per survey (in id order), then ``files`` to get the
+    ``(archive name, byte chunks)`` pairs, and ``close`` to release the spools.
+    """
+
+    compress_type: Optional[int] = None  # Archive default (deflate)
+
+    def __init__(
+        self,
+        spool_factory: Callable[[], IO[str]],
+        layout: SurveyLayout | str = SurveyLayout.AUTO,
+        declared_keys: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.layout = SurveyLayout(layout)
+        self.schema = SurveySchema(declared_keys)
+        self._wide: Optional[IO[str]] = None
+        self._long: Optional[IO[str]] = None
+        if self.layout != SurveyLayout.LONG:
+            self._wide = spool_factory()
+        if self.layout in (SurveyLayout.LONG, SurveyLayout.BOTH) or (
+            self.layout == SurveyLayout.AUTO and not self.schema.declared
+        ):
+            self._long = spool_factory()
+            csv.writer(self._long).writerow(SURVEY_LONG_HEADER)
+        self._wide_writer = csv.writer(self._wide) if self._wide is not None else None
+        self._long_writer = csv.writer(self._long) if self._long is not None else None
+
+    def write(
+        self,
+        survey_id: int,
+        session_id: int,
+        session_code: str,
+        created_at: Optional[datetime],
+        responses: Optional[Mapping[str, Any]],
+    ) -> None:
+        base = [survey_id, session_id, session_code, to_local_iso(created_at) or ""]
+        self.schema.observe(responses)
+        responses = responses or {}
+
+        if self._wide_writer is not None:
+            if self.layout == SurveyLayout.AUTO and not self.schema.uniform and not self.schema.declared:
+                # Keys differ between surveys: auto resolves to long, stop writing wide rows
+                self._wide.close()
+                self._wide = self._wide_writer = None
+            else:
+                self._wide_writer.writerow([*base, *(_answer(responses.get(key, "")) for key in self.schema.columns)])
+
+        if self._long_writer is not None:
+            if not responses:
+                self._long_writer.writerow([*base, "", ""])
+            for key, value in responses.items():
+                self._long_writer.writerow([*base, key, _answer(value)])
+
+    def resolved_layout(self) -> SurveyLayout:
+        if self.layout == SurveyLayout.AUTO:
+            return self.schema.auto_layout()
+        return self.layout
+
+    def files(self) -> List[Tuple[str, Iterator[bytes]]]:
+        """Archive entries for the resolved layout."""
+        layout = self.resolved_layout()
+        if layout == SurveyLayout.BOTH:
+            return [("surveys_wide.csv", self._iter_wide()), ("surveys_long.csv", _iter_spooled_bytes(self._long))]
+        if layout == SurveyLayout.WIDE:
+            return [("surveys.csv", self._iter_wide())]
+        return [("surveys.csv", _iter_spooled_bytes(self._long))]
+
+    def manifest(self) -> Dict[str, Any]:
+        return {
+            "survey_layout": self.resolved_layout().value,
+            "survey_schema": "declared" if self.schema.declared else "discovered",
+            "undeclared_survey_keys": list(self.schema.undeclared),
+        }
+
+    def close(self) -> None:
+        for spool in (self._wide, self._long):
+            if spool is not None:
+                spool.close()
+
+    def _iter_wide(self) -> Iterator[bytes]:
+        header = [*SURVEY_BASE_HEADER, *self.schema.columns]
+        yield _csv_line(header).encode("utf-8")
+        if self.schema.declared or self.schema.uniform:
+            # Every row already has one value per column
+            yield from _iter_spooled_bytes(self._wide)
+            return
+
+        # Columns were added after some rows were written: pad those rows to the header width
+        self._wide.seek(0)
+        width = len(header)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for count, row in enumerate(csv.reader(self._wide), start=1):
+            writer.writerow(row + [""] * (width - len(row)))
+            if count % PAD_BATCH_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+
+def _answer(value: Any) -> Any:
+    # JSON rather than Python repr, as stored (and as the COPY export copies it)
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def _csv_line(row: List[Any]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
+
+
+def _iter_spooled_bytes(spool: IO[str]) -> Iterator[bytes]:
+    spool.seek(0)
+    for chunk in iter(lambda: spool.read(CHUNK_SIZE), ""):
+        yield chunk.encode("utf-8")
@@ -3,6 +3,7 @@ from typing import Tuple
 from sqlalchemy.orm import Session
 from ..models.user import User
 from ..core.security import get_password_hash
+from ..core.principal_cache import principal_cache
 
 ALLOWED_ROLES = {"IMPULSADOR", "ANALISTA"}
 
@@ -48,4 +49,5 @@ def reset_user_password(db: Session, user: User) -> str:
     user.must_change_password = True
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return temporary_password
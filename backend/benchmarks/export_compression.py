@@ -0,0 +1,104 @@
+"""Benchmark: export archive CPU time with and without the audio compression policy.
+
+Builds a synthetic export of 1,000 recordings (incompressible payloads, like
+real webm/ogg audio) from an in-memory object store and reports process CPU
+time and throughput for two policies:
+
+- ``deflate-all``: every entry deflated (previous behaviour)
+- ``per-entry``: compressed audio STORED, CSVs deflated
+
+Run from ``backend/``::
+
+    python -m benchmarks.export_compression [--recordings 1000] [--size-kb 256]
+"""
+from __future__ import annotations
+
+import argparse
+from contextlib import nullcontext
+import os
+import time
+import zipfile
+from unittest import mock
+
+from app.core.config import settings
+from app.models.session import Session as SessionModel
+from app.models.recording import Recording
+from app.services import dataset_export
+from app.services.dataset_export import DatasetExport, iter_dataset_zip
+
+
+class _Body:
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+
+    def iter_chunks(self, chunk_size: int):
+        for i in range(0, len(self._data), chunk_size):
+            yield self._data[i:i + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+
+class _MemoryS3:
+    def __init__(self, payload: bytes) -> None:
+        self._payload = payload
+
+    def get_object(self, Bucket: str, Key: str):
+        return {"Body": _Body(self._payload)}
+
+
+def build_export(recordings: int, per_session: int = 2) -> DatasetExport:
+    sessions = []
+    recording_rows = []
+    for session_id in range(1, recordings // per_session + 1):
+        session = SessionModel(
+            id=session_id,
+            datos_participante={"nombre": f"P{session_id}"},
+            texto_seleccionado={"Id": "bench"},
+            estado="completed",
+        )
+        sessions.append(session)
+        for n in range(per_session):
+            recording_id = (session_id - 1) * per_session + n + 1
+            recording_rows.append(Recording(
+                id=recording_id,
+                session_id=session_id,
+                storage_key=f"recordings/session_{session_id}/{recording_id}.webm",
+                formato="audio/webm",
+            ))
+    return DatasetExport(sessions=sessions, recordings=recording_rows, surveys=[])
+
+
+def run(export: DatasetExport, s3_client, store_audio: bool) -> tuple[float, float, int]:
+    # An export can be archived once: pass a freshly built one to every run
+    patch = (
+        nullcontext() if store_audio
+        else mock.patch.object(dataset_export, "audio_compress_type", lambda formato: zipfile.ZIP_DEFLATED)
+    )
+    with patch:
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        total = sum(len(chunk) for chunk in iter_dataset_zip(export, s3_client))
+        return time.process_time() - cpu_start, time.perf_counter() - wall_start, total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", type=int, default=1000)
+    parser.add_argument("--size-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    settings.R2_BUCKET = settings.R2_BUCKET or "bench"
+    s3_client = _MemoryS3(os.urandom(args.size_kb * 1024))
+    input_mb = args.recordings * args.size_kb / 1024
+
+    print(f"{args.recordings} recordings x {args.size_kb} KiB ({input_mb:.0f} MiB of audio)")
+    for label, store_audio in (("deflate-all", False), ("per-entry", True)):
+        cpu, wall, size = run(build_export(args.recordings), s3_client, store_audio)
+        print(
+            f"{label:12s} cpu={cpu:6.2f}s wall={wall:6.2f}s "
+            f"throughput={input_mb / wall:7.1f} MiB/s archive={size / 1024 / 1024:.0f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
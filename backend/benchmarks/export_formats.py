@@ -0,0 +1,116 @@
+"""Benchmark: CSV vs Parquet metadata export (archive size and analyst load time).
+
+Builds a synthetic metadata-only export (``include_audio=False``) of
+``--sessions`` sessions with two recordings and one survey each, in both
+formats, and reports build time, archive size and the time to load the
+tables back (best of three): with pandas (``read_csv`` vs ``read_parquet``)
+when installed, otherwise with pyarrow's CSV and Parquet readers.
+
+Run from ``backend/``::
+
+    python -m benchmarks.export_formats [--sessions 50000]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.models.survey import Survey
+from app.services.dataset_export import DatasetExport, iter_dataset_zip
+
+# Loads are timed best-of-N so reader start-up costs do not dominate.
+LOAD_REPEATS = 3
+
+
+def build_export(sessions: int, export_format: str) -> DatasetExport:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    session_rows, recording_rows, survey_rows = [], [], []
+    for session_id in range(1, sessions + 1):
+        created_at = start + timedelta(minutes=session_id)
+        session_rows.append(SessionModel(
+            id=session_id,
+            session_code=f"code-{session_id}",
+            datos_participante={},
+            texto_seleccionado={"Id": "bench"},
+            estado="completed",
+            created_at=created_at,
+        ))
+        for n in range(2):
+            recording_id = (session_id - 1) * 2 + n + 1
+            recording_rows.append(Recording(
+                id=recording_id,
+                session_id=session_id,
+                storage_key=f"recordings/session_{session_id}/{recording_id}.webm",
+                formato="audio/webm",
+                duracion_segundos=30.0 + n,
+                created_at=created_at,
+            ))
+        survey_rows.append(Survey(
+            id=session_id,
+            session_id=session_id,
+            respuestas_json={"claridad": session_id % 5, "comodidad": 4, "repetiria": True, "comentario": "ok"},
+            created_at=created_at,
+        ))
+    return DatasetExport(
+        sessions=session_rows,
+        recordings=recording_rows,
+        surveys=survey_rows,
+        export_format=export_format,
+    )
+
+
+def _readers() -> Dict[str, Callable[[bytes], object]]:
+    try:
+        import pandas as pd
+    except ImportError:
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+        return {
+            ".csv": lambda data: pa_csv.read_csv(io.BytesIO(data)),
+            ".parquet": lambda data: pq.read_table(io.BytesIO(data)),
+        }
+    return {
+        ".csv": lambda data: pd.read_csv(io.BytesIO(data)),
+        ".parquet": lambda data: pd.read_parquet(io.BytesIO(data)),
+    }
+
+
+def _timed_load(readers: Dict[str, Callable[[bytes], object]], files: Dict[str, bytes]) -> float:
+    started = time.perf_counter()
+    for name, data in files.items():
+        readers[name[name.rindex("."):]](data)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50_000)
+    args = parser.parse_args()
+    readers = _readers()
+
+    print(f"{args.sessions} sessions, {args.sessions * 2} recordings, {args.sessions} surveys")
+    for export_format in ("csv", "parquet"):
+        started = time.perf_counter()
+        export = build_export(args.sessions, export_format)
+        archive = b"".join(iter_dataset_zip(export, None, include_audio=False))
+        build = time.perf_counter() - started
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            files = {name: zf.read(name) for name in zf.namelist() if name.endswith((".csv", ".parquet"))}
+        load = min(_timed_load(readers, files) for _ in range(LOAD_REPEATS))
+
+        raw = sum(len(data) for data in files.values())
+        print(
+            f"{export_format:8s} build={build:6.2f}s archive={len(archive) / 1024 / 1024:6.1f} MiB "
+            f"tables={raw / 1024 / 1024:6.1f} MiB load={load * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Load test: many concurrent VR clients running the session flow.
+
+Each simulated client creates a session, polls it by code (as the headset
+does while waiting to start), registers a recording and submits a survey.
+Reports throughput, latency percentiles and errors per endpoint.
+
+Run it against a server backed by Postgres, once per database path::
+
+    DB_ASYNC_ENABLED=false uvicorn app.main:app --workers 1 --port 8000
+    python -m benchmarks.load_vr_clients --base-url http://localhost:8000 --clients 500
+
+    DB_ASYNC_ENABLED=true uvicorn app.main:app --workers 1 --port 8000
+    python -m benchmarks.load_vr_clients --base-url http://localhost:8000 --clients 500
+
+With the sync path, requests queue behind the threadpool (40 threads by
+default); with the async path they wait on the connection pool instead, so
+compare throughput together with ``/internal/metrics`` pool waits. Reference
+results are in ``docs/api_design.md`` (``DB_ASYNC_ENABLED``).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+API = "/api/v1"
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, started: float, ok: bool) -> None:
+        self.latencies[name].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[name] += 1
+
+
+async def _call(client: httpx.AsyncClient, stats: Stats, name: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.record(name, started, ok=False)
+        return None
+    stats.record(name, started, ok=response.status_code < 400)
+    return response
+
+
+async def run_client(client: httpx.AsyncClient, stats: Stats, text_id: str, polls: int) -> None:
+    created = await _call(
+        client, stats, "create_session", "POST", f"{API}/sessions",
+        json={"datos_participante": {"nombre": "Load"}, "texto_seleccionado_id": text_id},
+    )
+    if created is None or created.status_code != 201:
+        return
+    session = created.json()
+
+    etag = None
+    for _ in range(polls):
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await _call(
+            client, stats, "get_session_by_code", "GET",
+            f"{API}/sessions/by-code/{session['session_code']}", headers=headers,
+        )
+        if response is not None:
+            etag = response.headers.get("etag", etag)
+
+    await _call(
+        client, stats, "create_recording", "POST", f"{API}/sessions/{session['id']}/recording",
+        json={"storage_key": f"load/{session['id']}.wav", "duracion_segundos": 30.0},
+    )
+    await _call(
+        client, stats, "create_survey", "POST", f"{API}/sessions/{session['id']}/survey",
+        json={"respuestas_json": {"claridad": 4}},
+    )
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        texts = (await client.get(f"{API}/texts")).json()
+        text_id = texts["texts"][0]["Id"]
+
+        stats = Stats()
+        started = time.perf_counter()
+        await asyncio.gather(*(run_client(client, stats, text_id, args.polls) for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(v) for v in stats.latencies.values())
+    print(f"{args.clients} clients, {total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+    print(f"{'endpoint':<22}{'count':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, values in stats.latencies.items():
+        print(
+            f"{name:<22}{len(values):>7}{stats.errors[name]:>8}"
+            f"{statistics.median(values) * 1000:>9.1f}"
+            f"{_percentile(values, 0.95) * 1000:>9.1f}"
+            f"{_percentile(values, 0.99) * 1000:>9.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent VR clients")
+    parser.add_argument("--polls", type=int, default=5, help="get_session_by_code calls per client")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Shared fixtures: an in-memory SQLite database wired into the FastAPI app."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.db.session import get_db
+from app.core.security import get_current_user_role
+from app.models.base import Base
+from app.models import session as _session_model  # noqa: F401
+from app.models import recording as _recording_model  # noqa: F401
+from app.models import survey as _survey_model  # noqa: F401
+from app.models import user as _user_model  # noqa: F401
+from app.models import export_job as _export_job_model  # noqa: F401
+from app.models import resumable_upload as _resumable_upload_model  # noqa: F401
+from app.models import session_stats as _session_stats_model  # noqa: F401
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def analyst_client(db):
+    def override_get_db():
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user_role] = lambda: "ANALISTA"
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,105 @@
+"""Tests for the async database path of the hot endpoints."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.v1 import dataset, recordings, sessions, surveys, texts
+from app.core.principal_cache import principal_cache
+from app.core.security import create_access_token, get_current_user_role_async
+from app.db.async_session import async_database_url, get_async_db
+from app.models.base import Base
+from app.models.user import User
+
+
+@pytest.fixture
+def async_client(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    engine = create_async_engine(async_database_url(url))
+    factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+
+    async def override_get_async_db():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    for router in (sessions.async_router, recordings.async_router, surveys.async_router, dataset.async_router):
+        app.include_router(router, prefix="/api/v1")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user_role_async] = lambda: "ANALISTA"
+    with TestClient(app) as client:
+        yield client
+
+
+def test_async_database_url():
+    assert async_database_url("postgresql://u:p@db:5432/toast") == "postgresql+asyncpg://u:p@db:5432/toast"
+    assert async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_vr_session_flow_on_async_path(async_client):
+    text_id = texts.text_catalog.all()[0]["Id"]
+    created = async_client.post(
+        "/api/v1/sessions",
+        json={"datos_participante": {"nombre": "Ana"}, "texto_seleccionado_id": text_id},
+    )
+    assert created.status_code == 201
+    session = created.json()
+    assert session["texto_seleccionado"]["Id"] == text_id
+
+    fetched = async_client.get(f"/api/v1/sessions/by-code/{session['session_code']}")
+    assert fetched.status_code == 200 and fetched.json()["id"] == session["id"]
+    etag = fetched.headers["etag"]
+    assert async_client.get(
+        f"/api/v1/sessions/by-code/{session['session_code']}", headers={"If-None-Match": etag}
+    ).status_code == 304
+    assert async_client.get("/api/v1/sessions/by-code/nope").status_code == 404
+
+    recording = async_client.post(
+        f"/api/v1/sessions/{session['id']}/recording", json={"storage_key": "recordings/x.wav"}
+    )
+    assert recording.status_code == 201
+    survey = async_client.post(f"/api/v1/sessions/{session['id']}/survey", json={"respuestas_json": {"q1": 4}})
+    assert survey.status_code == 201
+    assert async_client.post("/api/v1/sessions/999/survey", json={"respuestas_json": {}}).status_code == 404
+
+    page = async_client.get("/api/v1/dataset").json()
+    assert page["total_sessions"] == 1
+    entry = page["dataset"][0]
+    assert (entry["recordings_count"], entry["survey_responses"]) == (1, [{"q1": 4}])
+
+    summary = async_client.get("/api/v1/dataset", params={"summary": "true"}).json()["dataset"][0]
+    assert (summary["recordings_count"], summary["surveys_count"]) == (1, 1)
+    assert summary["first_survey_id"] == survey.json()["id"]
+
+
+def test_async_dataset_checks_role_on_async_session(async_client, tmp_path):
+    del async_client.app.dependency_overrides[get_current_user_role_async]
+    principal_cache.clear()
+    engine = create_engine(f"sqlite:///{tmp_path / 'async.db'}")
+    with Session(engine) as db:
+        users = [
+            User(email="a@toastclub.com", password_hash="x", rol="ANALISTA"),
+            User(email="i@toastclub.com", password_hash="x", rol="IMPULSADOR"),
+            User(email="n@toastclub.com", password_hash="x", rol="ANALISTA", must_change_password=True),
+        ]
+        db.add_all(users)
+        db.commit()
+        headers = [{"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"} for user in users]
+    engine.dispose()
+
+    try:
+        assert async_client.get("/api/v1/dataset", headers=headers[0]).status_code == 200
+        assert principal_cache.get(users[0].id).rol == "ANALISTA"
+        assert async_client.get("/api/v1/dataset", headers=headers[1]).status_code == 403
+        response = async_client.get("/api/v1/dataset", headers=headers[2])
+        assert response.status_code == 403 and response.json()["detail"] == "PASSWORD_CHANGE_REQUIRED"
+        assert async_client.get("/api/v1/dataset").status_code in (401, 403)
+    finally:
+        principal_cache.clear()
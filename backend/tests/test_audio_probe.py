@@ -0,0 +1,162 @@
+"""Tests for container header probing and the recording backfill."""
+
+import io
+import struct
+import wave
+
+import pytest
+
+from app.core import storage_r2
+from app.core.audio_probe import TAIL_BYTES, probe_audio
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.services.recording_probe import backfill_recordings, probe_fileobj
+
+
+def _wav(seconds, rate=16000, channels=2):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\0" * 2 * channels * int(rate * seconds))
+    return buf.getvalue()
+
+
+def _ogg_page(granule, payload, serial=7, seq=0):
+    lacing = [255] * (len(payload) // 255) + [len(payload) % 255]
+    header = struct.pack("<4sBBqIIIB", b"OggS", 0, 0, granule, serial, seq, 0, len(lacing))
+    return header + bytes(lacing) + payload
+
+
+def _opus(seconds, pre_skip=312):
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HI", pre_skip, 16000) + b"\0\0\0"
+    pages = [_ogg_page(0, head)]
+    # Enough audio pages that the last one is only reachable with a tail read
+    for seq in range(1, 80):
+        pages.append(_ogg_page(seq * 960, b"\x55" * 2000, seq=seq))
+    pages.append(_ogg_page(int(seconds * 48000) + pre_skip, b"\x55" * 100, seq=80))
+    return b"".join(pages)
+
+
+def _el(element_id, data):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    return id_bytes + b"\x01" + len(data).to_bytes(7, "big") + data
+
+
+def _webm(duration_ms=None):
+    info = _el(0x2AD7B1, (1_000_000).to_bytes(3, "big"))
+    if duration_ms is not None:
+        info += _el(0x4489, struct.pack(">d", duration_ms))
+    audio = _el(0xB5, struct.pack(">f", 48000.0)) + _el(0x9F, b"\x01")
+    track = _el(0x83, b"\x02") + _el(0x86, b"A_OPUS") + _el(0xE1, audio)
+    unknown = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+    clusters = b""
+    for cluster_ms in (0, 1000, 2000):
+        blocks = b"".join(
+            _el(0xA3, b"\x81" + struct.pack(">h", rel) + b"\x80" + b"\x55" * 40)
+            for rel in range(0, 1000 if cluster_ms < 2000 else 500, 20)
+        )
+        clusters += b"\x1f\x43\xb6\x75" + unknown + _el(0xE7, cluster_ms.to_bytes(2, "big")) + blocks
+    return (
+        _el(0x1A45DFA3, _el(0x4282, b"webm"))
+        + b"\x18\x53\x80\x67" + unknown
+        + _el(0x1549A966, info)
+        + _el(0x1654AE6B, _el(0xAE, track))
+        + clusters
+    )
+
+
+def _probe(data):
+    calls = []
+
+    def read_range(start, length):
+        calls.append((start, length))
+        return data[start:start + length]
+
+    return probe_audio(read_range, len(data)), calls
+
+
+def test_wav_header():
+    info, calls = _probe(_wav(3.0))
+    assert info == ("wav", "pcm_s16le", 3.0, 16000, 2)
+    assert len(calls) == 1
+
+
+def test_wav_with_unknown_data_size_uses_object_size():
+    data = bytearray(_wav(1.5, channels=1))
+    data[40:44] = b"\xff\xff\xff\xff"  # data chunk size left open by a streaming writer
+    info, _ = _probe(bytes(data))
+    assert info.duration_seconds == 1.5
+
+
+def test_ogg_opus_reads_last_granule_from_tail():
+    data = _opus(5.0)
+    assert len(data) > 2 * TAIL_BYTES
+    info, calls = _probe(data)
+    assert info == ("ogg", "opus", 5.0, 16000, 1)
+    assert sum(length for _, length in calls) < len(data)
+
+
+def test_webm_duration_from_info():
+    info, _ = _probe(_webm(duration_ms=2520.0))
+    assert info == ("webm", "opus", 2.52, 48000, 1)
+
+
+def test_webm_without_duration_uses_last_block():
+    info, _ = _probe(_webm())
+    assert info.duration_seconds == pytest.approx(2.48)
+    assert (info.codec, info.sample_rate) == ("opus", 48000)
+
+
+def test_unknown_size_ebml_header_is_malformed():
+    data = bytes.fromhex("1A45DFA3") + b"\xff" * 40
+    with pytest.raises(ValueError):
+        _probe(data)
+    assert probe_fileobj(io.BytesIO(data), len(data)) is None
+
+
+def test_unknown_format():
+    assert _probe(b"ID3" + b"\0" * 100)[0] is None
+
+
+class RangedS3:
+    def __init__(self, objects):
+        self.objects = objects
+        self.bytes_read = 0
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = (int(v) for v in Range[len("bytes="):].split("-"))
+        data = self.objects[Key][start:end + 1]
+        self.bytes_read += len(data)
+        return {"Body": io.BytesIO(data)}
+
+
+def test_backfill_probes_unprobed_recordings(db, session_factory, monkeypatch):
+    objects = {"a.wav": _wav(2.0), "b.ogg": _opus(5.0), "c.bin": b"\0" * 10}
+    client = RangedS3(objects)
+    monkeypatch.setattr(storage_r2, "get_s3_client", lambda: client)
+
+    session = SessionModel(datos_participante={}, texto_seleccionado={}, estado="completed")
+    db.add(session)
+    db.commit()
+    for key in objects:
+        db.add(Recording(session_id=session.id, storage_key=key))
+    db.add(Recording(session_id=session.id, storage_key="missing.wav"))
+    db.commit()
+
+    assert backfill_recordings(session_factory, concurrency=2) == (3, 1)
+    by_key = {r.storage_key: r for r in db.query(Recording).all()}
+    for r in by_key.values():
+        db.refresh(r)
+    assert by_key["a.wav"].duracion_segundos == 2.0
+    assert (by_key["b.ogg"].codec, by_key["b.ogg"].duracion_segundos) == ("opus", 5.0)
+    assert by_key["c.bin"].probed_at is not None and by_key["c.bin"].codec is None
+    assert by_key["missing.wav"].probed_at is None
+    assert client.bytes_read < sum(len(v) for v in objects.values())
+
+    # Already probed rows are skipped; the missing object is retried
+    assert backfill_recordings(session_factory) == (0, 1)
@@ -0,0 +1,60 @@
+"""Tests for the paginated dataset endpoint."""
+
+from app.models.session import Session as SessionModel
+from app.models.recording import Recording
+from app.models.survey import Survey
+
+
+def _seed(db, count=5):
+    sessions = []
+    for i in range(count):
+        session = SessionModel(
+            datos_participante={"nombre": f"P{i}"},
+            texto_seleccionado={"Id": "t1"},
+            estado="completed" if i % 2 == 0 else "created",
+        )
+        db.add(session)
+        sessions.append(session)
+    db.flush()
+    for session in sessions:
+        db.add(Recording(session_id=session.id, storage_key=f"k/{session.id}.wav"))
+        db.add(Recording(session_id=session.id, storage_key=f"k/{session.id}b.wav"))
+        db.add(Survey(session_id=session.id, respuestas_json={"q": "a"}))
+    db.commit()
+    return sessions
+
+
+def test_dataset_keyset_pagination(analyst_client, db):
+    _seed(db, count=5)
+
+    first = analyst_client.get("/api/v1/dataset", params={"limit": 2}).json()
+    assert first["total_sessions"] == 5
+    assert len(first["dataset"]) == 2
+    assert first["dataset"][0]["recordings_count"] == 2
+    assert first["dataset"][0]["surveys_count"] == 1
+
+    seen = [entry["session_id"] for entry in first["dataset"]]
+    after_id = first["next_after_id"]
+    while after_id is not None:
+        page = analyst_client.get(
+            "/api/v1/dataset", params={"limit": 2, "after_id": after_id}
+        ).json()
+        seen.extend(entry["session_id"] for entry in page["dataset"])
+        after_id = page["next_after_id"]
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+
+
+def test_dataset_filters_by_estado(analyst_client, db):
+    _seed(db, count=5)
+
+    data = analyst_client.get("/api/v1/dataset", params={"estado": "completed"}).json()
+    assert data["total_sessions"] == 3
+    assert all(entry["estado"] == "completed" for entry in data["dataset"])
+    assert data["next_after_id"] is None
+
+
+def test_dataset_rejects_invalid_estado(analyst_client):
+    response = analyst_client.get("/api/v1/dataset", params={"estado": "bogus"})
+    assert response.status_code == 422
@@ -0,0 +1,214 @@
+"""Tests for the streaming dataset export archive."""
+
+import csv
+import io
+import zipfile
+
+import pytest
+
+from app.core.zip_stream import ZipStream
+from app.models.session import Session as SessionModel
+from app.models.recording import Recording
+from app.models.survey import Survey
+from app.services.dataset_export import DatasetExport, iter_dataset_zip
+
+
+class _FakeBody:
+    def __init__(self, data):
+        self._data = data
+
+    def iter_chunks(self, chunk_size):
+        for i in range(0, len(self._data), chunk_size):
+            yield self._data[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        return {"Body": _FakeBody(self.objects[Key])}
+
+
+def test_zip_stream_yields_valid_archive_incrementally():
+    stream = ZipStream()
+    parts = []
+    parts.extend(stream.write_chunks("a.bin", [b"x" * 10, b"y" * 10]))
+    # The local header and body are emitted before the archive is closed
+    assert parts
+    parts.extend(stream.write_bytes("b.txt", b"hello"))
+    parts.extend(stream.close())
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(parts))) as archive:
+        assert archive.read("a.bin") == b"x" * 10 + b"y" * 10
+        assert archive.read("b.txt") == b"hello"
+
+
+def test_dataset_zip_streams_audio_and_writes_csvs_last(db, monkeypatch):
+    monkeypatch.setattr("app.services.dataset_export.settings.R2_BUCKET", "bucket")
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="rec/ok.webm", formato="audio/webm"))
+    db.add(Recording(session_id=session.id, storage_key="rec/missing.webm", formato="audio/webm"))
+    db.add(Survey(session_id=session.id, respuestas_json={"q1": "a", "q2": "b"}))
+    db.commit()
+
+    s3 = FakeS3({"rec/ok.webm": b"\x1a\x45\xdf\xa3" * 1000})
+    data = b"".join(iter_dataset_zip(DatasetExport.load(db), s3))
+
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        names = archive.namelist()
+        assert names[-3:] == ["dataset.csv", "surveys.csv", "manifest.json"]
+        audio_names = [name for name in names if name.startswith("audios/")]
+        assert len(audio_names) == 1
+        assert archive.read(audio_names[0]) == s3.objects["rec/ok.webm"]
+        # Already-compressed audio is stored, CSVs are deflated
+        assert archive.getinfo(audio_names[0]).compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo("dataset.csv").compress_type == zipfile.ZIP_DEFLATED
+
+        rows = list(csv.DictReader(io.StringIO(archive.read("dataset.csv").decode("utf-8"))))
+        assert [row["audio_missing"] for row in rows] == ["False", "True"]
+
+        surveys = list(csv.DictReader(io.StringIO(archive.read("surveys.csv").decode("utf-8"))))
+        assert surveys[0]["q1"] == "a"
+
+
+def test_prefetch_preserves_order_and_reports_failures():
+    import time
+    from app.services.dataset_export import iter_prefetched
+
+    def fetch(key):
+        # Later keys finish first; results must still come back in key order
+        time.sleep(0.01 * (5 - int(key)))
+        if key == "3":
+            raise RuntimeError("boom")
+        return io.BytesIO(key.encode())
+
+    results = []
+    for future in iter_prefetched(fetch, ["1", "2", "3", "4"], concurrency=3):
+        try:
+            results.append(future.result().read())
+        except RuntimeError:
+            results.append(None)
+
+    assert results == [b"1", b"2", None, b"4"]
+
+
+def test_audio_compress_type_policy():
+    from app.services.dataset_export import audio_compress_type
+
+    assert audio_compress_type("webm") == zipfile.ZIP_STORED
+    assert audio_compress_type("webm;codecs=opus") == zipfile.ZIP_STORED
+    assert audio_compress_type("MP3") == zipfile.ZIP_STORED
+    assert audio_compress_type("wav") == zipfile.ZIP_DEFLATED
+
+
+def test_delta_export_only_includes_changes_after_watermark(db, monkeypatch):
+    import json
+    from datetime import datetime, timezone
+
+    monkeypatch.setattr("app.services.dataset_export.settings.R2_BUCKET", "bucket")
+    old_time = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    new_time = datetime(2026, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+    old_session = SessionModel(datos_participante={"nombre": "Old"}, texto_seleccionado={}, created_at=old_time)
+    new_session = SessionModel(datos_participante={"nombre": "New"}, texto_seleccionado={}, created_at=old_time)
+    db.add_all([old_session, new_session])
+    db.flush()
+    db.add(Recording(session_id=old_session.id, storage_key="rec/old.wav", created_at=old_time))
+    db.add(Recording(session_id=new_session.id, storage_key="rec/new.wav", created_at=new_time))
+    db.commit()
+
+    full = DatasetExport.load(db)
+    assert full.manifest()["mode"] == "full"
+    assert full.recording_count == 2
+
+    delta = DatasetExport.load(db, since=datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc))
+    assert [session.id for session in delta.sessions] == [new_session.id]
+    assert delta.recording_count == 1
+
+    s3 = FakeS3({"rec/new.wav": b"RIFF"})
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_dataset_zip(delta, s3)))) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["mode"] == "delta"
+    assert datetime.fromisoformat(manifest["next_since"]) == new_time
+
+
+def test_delta_export_emits_full_rows_for_sessions_in_scope(db, monkeypatch):
+    import json
+    from datetime import datetime, timezone
+
+    monkeypatch.setattr("app.services.dataset_export.settings.R2_BUCKET", "bucket")
+    old_time = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    new_time = datetime(2026, 1, 2, 10, 0, tzinfo=timezone.utc)
+
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={}, created_at=old_time)
+    db.add(session)
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="rec/old.wav", created_at=old_time))
+    db.add(Recording(session_id=session.id, storage_key="rec/new.wav", created_at=new_time))
+    first = Survey(session_id=session.id, respuestas_json={"q": 1}, created_at=old_time)
+    db.add(first)
+    db.commit()
+
+    delta = DatasetExport.load(db, since=datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc))
+    assert delta.recording_count == 2
+    assert delta.first_survey(session.id).id == first.id
+
+    s3 = FakeS3({"rec/new.wav": b"RIFF"})
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_dataset_zip(delta, s3)))) as archive:
+        rows = list(csv.DictReader(io.StringIO(archive.read("dataset.csv").decode("utf-8"))))
+        names = archive.namelist()
+        manifest = json.loads(archive.read("manifest.json"))
+
+    # Unchanged recordings keep their row (and the path of the archive that has their audio)
+    assert [row["audio_missing"] for row in rows] == ["False", "False"]
+    assert all(row["survey_id"] == str(first.id) for row in rows)
+    assert [name for name in names if name.startswith("audios/")] == [rows[1]["audio_file"]]
+    assert manifest["surveys"] == 0
+
+
+def test_delta_watermark_lags_behind_recent_changes(db, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    monkeypatch.setattr("app.services.dataset_export.settings.EXPORT_DELTA_OVERLAP_SECONDS", 300)
+    since = datetime.now(timezone.utc) - timedelta(hours=1)
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={})
+    db.add(session)
+    db.commit()
+
+    before = datetime.now(timezone.utc)
+    delta = DatasetExport.load(db, since=since)
+    assert [row.id for row in delta.sessions] == [session.id]
+    # A row stamped just before the export but committed after it is still ahead of next_since
+    assert since < delta.next_since <= before - timedelta(seconds=300) + timedelta(seconds=1)
+    assert delta.manifest()["overlap_seconds"] == 300
+
+
+def test_metadata_only_export_skips_audio_downloads(db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="rec/a.wav"))
+    db.add(Recording(session_id=session.id, storage_key=""))
+    db.commit()
+
+    export = DatasetExport.load(db)
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_dataset_zip(export, None, include_audio=False)))) as archive:
+        assert sorted(archive.namelist()) == ["dataset.csv", "manifest.json", "surveys.csv"]
+        rows = list(csv.DictReader(io.StringIO(archive.read("dataset.csv").decode("utf-8"))))
+    assert [row["audio_file"] for row in rows] == [f"audios/{session.session_code}__1.wav", ""]
+    assert [row["audio_missing"] for row in rows] == ["False", "True"]
+
+
+def test_export_can_only_be_archived_once(db):
+    export = DatasetExport.load(db)
+    b"".join(iter_dataset_zip(export, None, include_audio=False))
+    with pytest.raises(RuntimeError, match="already archived"):
+        b"".join(iter_dataset_zip(export, None, include_audio=False))
@@ -0,0 +1,116 @@
+"""Checks that the COPY-based metadata export matches the ORM export byte for byte.
+
+The parity checks need a real Postgres, so they are skipped unless
+``TEST_POSTGRES_URL`` is set (see ``test_query_plans.py``).
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.models.survey import Survey
+from app.models import export_job as _export_job_model  # noqa: F401
+from app.models import resumable_upload as _resumable_upload_model  # noqa: F401
+from app.models import user as _user_model  # noqa: F401
+from app.services.dataset_export import DatasetExport, iter_dataset_zip
+from app.services.dataset_export_sql import SqlDatasetExport, _CrlfWriter, iter_sql_dataset_zip
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+SCHEMA = "dataset_copy_checks"
+
+requires_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+
+
+def test_copy_output_gets_csv_writer_line_endings():
+    expected = io.StringIO()
+    rows = [["1", 'multi\nline "quoted"', "x"], ["2", "", "a,b"], ["3", "\n", ""]]
+    csv.writer(expected).writerows(rows)
+    # COPY's rendering of the same rows, split at awkward points
+    copy_output = b'1,"multi\nline ""quoted""",x\n2,,"a,b"\n3,"\n",\n'
+    spool = io.BytesIO()
+    writer = _CrlfWriter(spool)
+    for start in range(0, len(copy_output), 5):
+        writer.write(copy_output[start:start + 5])
+    assert spool.getvalue() == expected.getvalue().encode("utf-8")
+
+
+@pytest.fixture
+def pg_db():
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
+
+
+def _read(chunks):
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        return {
+            name: archive.read(name).decode("utf-8")
+            for name in archive.namelist()
+        }
+
+
+def _seed(db, surveys):
+    old = datetime(2026, 1, 1, 10, 0, 0, 250000, tzinfo=timezone.utc)
+    new = datetime(2026, 1, 2, 10, 0, tzinfo=timezone.utc)
+    with_audio = SessionModel(datos_participante={}, texto_seleccionado={}, created_at=old)
+    without_audio = SessionModel(datos_participante={}, texto_seleccionado={}, created_at=new)
+    db.add_all([with_audio, without_audio])
+    db.flush()
+    db.add_all([
+        Recording(session_id=with_audio.id, storage_key="rec/a.wav", duracion_segundos=12.5, created_at=old),
+        Recording(session_id=with_audio.id, storage_key="rec/b", formato="audio/webm;codecs=opus", duracion_segundos=12.0, created_at=new),
+        Recording(session_id=with_audio.id, storage_key="", formato=".ogg", created_at=new),
+    ])
+    for session_id, answers, created_at in surveys(with_audio.id, without_audio.id, old, new):
+        db.add(Survey(session_id=session_id, respuestas_json=answers, created_at=created_at))
+    db.commit()
+
+
+@requires_postgres
+@pytest.mark.parametrize("since", [None, datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)])
+@pytest.mark.parametrize("uniform", [True, False])
+@pytest.mark.parametrize("survey_layout", ["auto", "both"])
+def test_copy_export_matches_orm_export(pg_db, since, uniform, survey_layout):
+    def surveys(first, second, old, new):
+        yield first, {"q2": "b", "q1": "a, quoted \"x\"\nsecond line"}, new
+        yield first, {"q1": True, "q2": None}, old
+        yield first, {"q1": 3, "q2": 2.5}, old
+        yield first, {"q1": {"nested": [1, "é"]}, "q2": ""}, new
+        yield second, ({"q1": False, "q2": 1e16} if uniform else {"q3": "g", "q0": ["h"]}), new
+
+    _seed(pg_db, surveys)
+
+    orm_export = DatasetExport.load(pg_db, since=since, survey_layout=survey_layout)
+    orm = _read(iter_dataset_zip(orm_export, None, include_audio=False))
+    sql = _read(iter_sql_dataset_zip(SqlDatasetExport.load(pg_db, since=since, survey_layout=survey_layout)))
+
+    assert sorted(sql) == sorted(orm)
+    for name in orm:
+        if name.endswith(".csv"):
+            assert sql[name] == orm[name], name
+    orm_manifest, sql_manifest = json.loads(orm["manifest.json"]), json.loads(sql["manifest.json"])
+    for manifest in (orm_manifest, sql_manifest):
+        manifest.pop("generated_at")
+    assert sql_manifest == orm_manifest
@@ -0,0 +1,118 @@
+"""Tests for the typed Parquet dataset export."""
+
+import io
+import json
+import zipfile
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.models.survey import Survey
+from app.services.dataset_export import DatasetExport, iter_dataset_zip
+from app.services.dataset_parquet import column_type, flatten_responses
+from tests.test_dataset_export import FakeS3
+
+
+def _tables(chunks):
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        names = archive.namelist()
+        tables = {
+            name: pq.read_table(io.BytesIO(archive.read(name)))
+            for name in names if name.endswith(".parquet")
+        }
+        manifest = json.loads(archive.read("manifest.json"))
+        stored = {info.filename: info.compress_type for info in archive.infolist()}
+    return names, tables, manifest, stored
+
+
+def test_column_types_follow_answer_values():
+    assert column_type({"bool"}) == pa.bool_()
+    assert column_type({"int"}) == pa.int64()
+    assert column_type({"int", "float"}) == pa.float64()
+    assert column_type({"int", "string"}) == pa.string()
+    assert column_type(set()) == pa.string()
+    assert flatten_responses({"a": {"b": 1, "c": {"d": 2}}, "e": {}}) == {"a.b": 1, "a.c.d": 2, "e": {}}
+
+
+def test_parquet_export_writes_typed_tables(db, monkeypatch):
+    monkeypatch.setattr("app.services.dataset_export.settings.R2_BUCKET", "bucket")
+    created = datetime(2026, 1, 1, 15, 0, tzinfo=timezone.utc)
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"}, created_at=created)
+    empty = SessionModel(datos_participante={"nombre": "Eva"}, texto_seleccionado={"Id": "t2"}, created_at=created)
+    db.add_all([session, empty])
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="rec/ok.wav", duracion_segundos=12.5, sample_rate=48000, channels=1, created_at=created))
+    db.add(Recording(session_id=session.id, storage_key="rec/missing.webm", formato="audio/webm", created_at=created))
+    db.add(Survey(session_id=session.id, respuestas_json={"claridad": 4, "util": True, "nota": {"texto": "ok"}}, created_at=created))
+    db.add(Survey(session_id=empty.id, respuestas_json={"claridad": 3.5, "util": False, "extra": [1, 2]}, created_at=created))
+    db.commit()
+
+    export = DatasetExport.load(db, export_format="parquet")
+    names, tables, manifest, stored = _tables(iter_dataset_zip(export, FakeS3({"rec/ok.wav": b"RIFF"})))
+
+    assert f"audios/{session.session_code}__1.wav" in names
+    assert "dataset.csv" not in names and "surveys.csv" not in names
+    assert stored["recordings.parquet"] == zipfile.ZIP_STORED
+    assert (manifest["format"], manifest["surveys"]) == ("parquet", 2)
+
+    recordings = tables["recordings.parquet"]
+    assert recordings.schema.field("duration_seconds").type == pa.float64()
+    assert recordings.schema.field("audio_missing").type == pa.bool_()
+    assert recordings.schema.field("uploaded_at").type == pa.timestamp("us", tz="America/Lima")
+    assert recordings.column("duration_seconds").to_pylist() == [12.5, None]
+    assert recordings.column("audio_missing").to_pylist() == [False, True]
+    assert recordings.column("sample_rate").to_pylist() == [48000, None]
+    assert recordings.column("uploaded_at").to_pylist()[0] == created
+
+    sessions = tables["sessions.parquet"]
+    assert sessions.column("session_id").to_pylist() == [session.id, empty.id]
+    assert sessions.column("texto_id").to_pylist() == ["t1", "t2"]
+    assert sessions.column("survey_id").to_pylist() == [1, 2]
+
+    surveys = tables["survey_responses.parquet"]
+    assert surveys.schema.names == ["survey_id", "session_id", "session_code", "created_at", "claridad", "nota.texto", "util", "extra"]
+    assert surveys.schema.field("claridad").type == pa.float64()
+    assert surveys.schema.field("util").type == pa.bool_()
+    assert surveys.column("claridad").to_pylist() == [4.0, 3.5]
+    assert surveys.column("nota.texto").to_pylist() == ["ok", None]
+    assert surveys.column("extra").to_pylist() == [None, "[1, 2]"]
+
+
+def test_question_keys_named_like_base_columns_are_prefixed(db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    answers = {"created_at": "ayer", "session_id": 7, "answer_session_id": "x", "claridad": 4}
+    db.add(Survey(session_id=session.id, respuestas_json=answers))
+    db.commit()
+
+    export = DatasetExport.load(db, export_format="parquet")
+    _, tables, manifest, _ = _tables(iter_dataset_zip(export, FakeS3({}), include_audio=False))
+
+    surveys = tables["survey_responses.parquet"]
+    # Discovery order is sorted within a survey; "answer_session_id" is a real question
+    assert surveys.schema.names == [
+        "survey_id", "session_id", "session_code", "created_at",
+        "answer_session_id", "claridad", "answer_created_at", "answer_answer_session_id",
+    ]
+    assert surveys.column("answer_created_at").to_pylist() == ["ayer"]
+    assert surveys.column("answer_answer_session_id").to_pylist() == [7]
+    assert surveys.column("answer_session_id").to_pylist() == ["x"]
+    assert surveys.column("session_id").to_pylist() == [session.id]
+    assert manifest["renamed_survey_keys"] == {"created_at": "answer_created_at", "session_id": "answer_answer_session_id"}
+
+
+def test_export_endpoint_accepts_parquet_format(analyst_client, db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.commit()
+
+    response = analyst_client.get("/api/v1/dataset/export?include_audio=false&format=parquet")
+    assert response.status_code == 200
+    names, tables, manifest, _ = _tables([response.content])
+    assert sorted(names) == ["manifest.json", "recordings.parquet", "sessions.parquet", "survey_responses.parquet"]
+    assert tables["sessions.parquet"].num_rows == 1
+    assert analyst_client.get("/api/v1/dataset/export?format=xlsx").status_code == 422
@@ -0,0 +1,92 @@
+"""Tests for the aggregate /dataset/stats endpoint."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.services.dataset_stats import build_funnel, stats_cache
+from app.services.session_stats import rebuild_session_stats
+
+
+@pytest.fixture(autouse=True)
+def empty_stats_cache():
+    stats_cache.invalidate()
+    yield
+    stats_cache.invalidate()
+
+
+def _seed(db):
+    rows = [
+        ("t1", "completed", datetime(2026, 3, 1, 15, tzinfo=timezone.utc), [1.0, 2.0]),
+        ("t1", "survey_pending", datetime(2026, 3, 1, 16, tzinfo=timezone.utc), [3.0, None]),
+        ("t2", "running", datetime(2026, 3, 2, 15, tzinfo=timezone.utc), [4.0, 5.0]),
+        ("t2", "created", datetime(2026, 3, 2, 16, tzinfo=timezone.utc), []),
+    ]
+    for texto_id, estado, created_at, durations in rows:
+        session = SessionModel(
+            datos_participante={"nombre": "P"},
+            texto_seleccionado={"Id": texto_id},
+            estado=estado,
+            created_at=created_at,
+        )
+        db.add(session)
+        db.flush()
+        for n, duration in enumerate(durations):
+            db.add(Recording(session_id=session.id, storage_key=f"k/{session.id}-{n}.wav", duracion_segundos=duration))
+    db.commit()
+    rebuild_session_stats(db)
+
+
+def test_build_funnel_counts_sessions_that_reached_each_state():
+    funnel = build_funnel({"created": 4, "running": 3, "completed": 2})
+    assert [step["estado"] for step in funnel][:2] == ["created", "ready_to_start"]
+    assert [step["reached"] for step in funnel] == [9, 5, 5, 2, 2, 2]
+    assert funnel[0]["sessions"] == 4
+
+
+def test_dataset_stats_aggregates(analyst_client, db):
+    _seed(db)
+
+    stats = analyst_client.get("/api/v1/dataset/stats").json()
+    assert stats["total_sessions"] == 4
+    assert stats["sessions_by_estado"] == {"completed": 1, "survey_pending": 1, "running": 1, "created": 1}
+    assert [step["reached"] for step in stats["funnel"]] == [4, 3, 3, 2, 2, 1]
+    assert stats["sessions_per_day"] == [
+        {"date": "2026-03-01", "sessions": 2, "completed": 1},
+        {"date": "2026-03-02", "sessions": 2, "completed": 0},
+    ]
+    assert stats["sessions_per_text"] == [
+        {"texto_id": "t1", "sessions": 2, "completed": 1},
+        {"texto_id": "t2", "sessions": 2, "completed": 0},
+    ]
+    recordings = stats["recordings"]
+    assert (recordings["total"], recordings["with_duration"]) == (6, 5)
+    assert recordings["total_duration_seconds"] == 15.0
+    assert recordings["average_duration_seconds"] == 3.0
+    assert recordings["duration_percentiles"] == {"p50": 3.0, "p90": pytest.approx(4.6), "p95": pytest.approx(4.8), "p99": pytest.approx(4.96)}
+
+    march_2 = analyst_client.get(
+        "/api/v1/dataset/stats", params={"created_from": "2026-03-02T00:00:00Z"}
+    ).json()
+    assert march_2["total_sessions"] == 2
+    assert march_2["recordings"]["duration_percentiles"]["p50"] == 4.5
+
+
+def test_dataset_stats_cache_is_invalidated_on_writes(analyst_client, db):
+    _seed(db)
+    assert analyst_client.get("/api/v1/dataset/stats").json()["total_sessions"] == 4
+
+    # Rows written outside the API are only seen once the entry expires
+    db.add(SessionModel(datos_participante={}, texto_seleccionado={"Id": "t3"}, estado="created"))
+    db.commit()
+    assert analyst_client.get("/api/v1/dataset/stats").json()["total_sessions"] == 4
+
+    session_id = analyst_client.get("/api/v1/dataset").json()["dataset"][0]["session_id"]
+    assert analyst_client.post(
+        f"/api/v1/sessions/{session_id}/survey", json={"respuestas_json": {"q": 1}}
+    ).status_code == 201
+    stats = analyst_client.get("/api/v1/dataset/stats").json()
+    assert stats["total_sessions"] == 5
+    assert stats["surveys"]["total"] == 1
@@ -0,0 +1,84 @@
+"""Tests for pool instrumentation and the internal metrics endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc as sa_exc, text
+
+from app.db.pool_metrics import InstrumentedQueuePool, pool_stats
+from app.main import app
+
+
+@pytest.fixture
+def pooled_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def test_pool_records_checkouts_and_timeouts(pooled_engine):
+    with pooled_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        stats = pool_stats(pooled_engine)
+        assert (stats["checked_out"], stats["size"]) == (1, 1)
+
+        with pytest.raises(sa_exc.TimeoutError):
+            pooled_engine.connect()
+
+    stats = pool_stats(pooled_engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts_total"] == 1
+    assert stats["timeouts_total"] == 1
+    assert stats["wait_ms_buckets"]["+Inf"] == 1
+
+
+def test_metrics_endpoint_requires_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr("app.api.v1.metrics.settings.METRICS_TOKEN", "")
+    assert client.get("/api/v1/internal/metrics").status_code == 404
+
+    monkeypatch.setattr("app.api.v1.metrics.settings.METRICS_TOKEN", "s3cret")
+    assert client.get("/api/v1/internal/metrics", headers={"X-Metrics-Token": "nope"}).status_code == 403
+    response = client.get("/api/v1/internal/metrics", headers={"X-Metrics-Token": "s3cret"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["db_pool"]["pool_class"] == "InstrumentedQueuePool"
+    assert "checked_out" in body["db_pool"] and "running" in body["password_hashing"]
+
+
+
+class _FakeSession:
+    def __init__(self, dialect):
+        self.dialect = dialect
+        self.executed = []
+
+    def get_bind(self):
+        return type("Bind", (), {"dialect": type("Dialect", (), {"name": self.dialect})})()
+
+    def execute(self, statement):
+        self.executed.append(str(statement))
+
+
+def test_statement_timeout_is_lifted_for_long_transactions(monkeypatch):
+    from app.db import session as db_session
+
+    monkeypatch.setattr(db_session.settings, "DB_STATEMENT_TIMEOUT_MS", 60000)
+    postgres = _FakeSession("postgresql")
+    db_session.without_statement_timeout(postgres)
+    assert postgres.executed == ["SET LOCAL statement_timeout = 0"]
+
+    sqlite = _FakeSession("sqlite")
+    db_session.without_statement_timeout(sqlite)
+    assert sqlite.executed == []
+
+    monkeypatch.setattr(db_session.settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    disabled = _FakeSession("postgresql")
+    db_session.without_statement_timeout(disabled)
+    assert disabled.executed == []
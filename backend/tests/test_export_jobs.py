@@ -0,0 +1,185 @@
+"""Tests for background export jobs and artifact reuse."""
+
+import io
+import zipfile
+
+from app.models.export_job import ExportJob
+from app.models.session import Session as SessionModel
+from app.models.recording import Recording
+from app.services import export_jobs
+from app.services.export_jobs import ExportJobStatus, create_export_job, run_export_job
+
+from .test_dataset_export import FakeS3
+
+
+def _configure_storage(monkeypatch, objects):
+    uploads = {}
+
+    def fake_upload(fileobj, bucket, key, content_type=None):
+        uploads[key] = fileobj.read()
+
+    monkeypatch.setattr("app.services.dataset_export.settings.R2_BUCKET", "bucket")
+    monkeypatch.setattr(export_jobs, "get_s3_client", lambda: FakeS3(objects))
+    monkeypatch.setattr(export_jobs, "upload_fileobj", fake_upload)
+    return uploads
+
+
+def _seed_session(db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="rec/a.webm", formato="audio/webm"))
+    db.commit()
+    return session
+
+
+def test_export_job_builds_and_uploads_archive(db, session_factory, monkeypatch):
+    uploads = _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    _seed_session(db)
+
+    job, reused = create_export_job(db, compression_level=None)
+    assert not reused
+    run_export_job(job.id, session_factory=session_factory)
+
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    assert job.status == ExportJobStatus.COMPLETED.value
+    assert job.progress == job.total == 1
+    archive = zipfile.ZipFile(io.BytesIO(uploads[job.storage_key]))
+    assert "dataset.csv" in archive.namelist()
+
+
+def test_identical_request_reuses_artifact_until_data_changes(db, session_factory, monkeypatch):
+    _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    session = _seed_session(db)
+
+    job, _ = create_export_job(db, compression_level=None)
+    run_export_job(job.id, session_factory=session_factory)
+    db.expire_all()
+
+    again, reused = create_export_job(db, compression_level=None)
+    assert reused and again.id == job.id
+
+    db.add(Recording(session_id=session.id, storage_key="rec/b.webm"))
+    db.commit()
+    fresh, reused = create_export_job(db, compression_level=None)
+    assert not reused and fresh.id != job.id
+
+
+def test_probed_recording_invalidates_cached_artifact(db, session_factory, monkeypatch):
+    from app.core.audio_probe import AudioInfo
+    from app.services.recording_probe import apply_probe
+
+    _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    # Client-reported duration: the probe only changes values, not counts
+    db.add(Recording(session_id=session.id, storage_key="rec/a.webm", formato="audio/webm", duracion_segundos=12.0))
+    db.commit()
+
+    job, _ = create_export_job(db, compression_level=None)
+    run_export_job(job.id, session_factory=session_factory)
+    db.expire_all()
+
+    recording = db.query(Recording).one()
+    apply_probe(recording, AudioInfo("webm", "opus", 12.5, 48000, 1))
+    db.commit()
+    fresh, reused = create_export_job(db, compression_level=None)
+    assert not reused and fresh.id != job.id
+
+
+def test_failed_job_records_error(db, session_factory, monkeypatch):
+    _configure_storage(monkeypatch, {})
+
+    def broken_client():
+        raise RuntimeError("R2 credentials are not configured")
+
+    monkeypatch.setattr(export_jobs, "get_s3_client", broken_client)
+    job, _ = create_export_job(db, compression_level=None)
+    run_export_job(job.id, session_factory=session_factory)
+
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    assert job.status == ExportJobStatus.FAILED.value
+    assert "credentials" in job.error
+
+
+def test_job_taken_over_while_running_does_not_complete(db, session_factory, monkeypatch):
+    uploads = _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    _seed_session(db)
+    job, _ = create_export_job(db, compression_level=None)
+    load = export_jobs.DatasetExport.load
+
+    def load_then_taken_over(data_db, since=None):
+        export = load(data_db, since=since)
+        # Another worker declared this job stale meanwhile
+        other = session_factory()
+        other.get(ExportJob, job.id).status = ExportJobStatus.FAILED.value
+        other.commit()
+        other.close()
+        return export
+
+    monkeypatch.setattr(export_jobs.DatasetExport, "load", load_then_taken_over)
+    run_export_job(job.id, session_factory=session_factory)
+
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    assert job.status == ExportJobStatus.FAILED.value
+    assert job.storage_key is None and job.completed_at is None
+    assert uploads == {}
+
+
+def test_heartbeat_refreshes_job_while_loading(db, session_factory, monkeypatch):
+    import threading
+
+    _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    monkeypatch.setattr(export_jobs.settings, "EXPORT_JOB_HEARTBEAT_SECONDS", 0.01)
+    _seed_session(db)
+    job, _ = create_export_job(db, compression_level=None)
+    touched = threading.Event()
+    touch = export_jobs._touch
+
+    def record_touch(job_id, factory):
+        touch(job_id, factory)
+        touched.set()
+
+    monkeypatch.setattr(export_jobs, "_touch", record_touch)
+    load = export_jobs.DatasetExport.load
+
+    def slow_load(data_db, since=None):
+        assert touched.wait(5)
+        return load(data_db, since=since)
+
+    monkeypatch.setattr(export_jobs.DatasetExport, "load", slow_load)
+    run_export_job(job.id, session_factory=session_factory)
+
+    db.expire_all()
+    assert db.get(ExportJob, job.id).status == ExportJobStatus.COMPLETED.value
+
+
+def test_old_artifacts_are_not_reused_and_get_deleted(db, session_factory, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    _configure_storage(monkeypatch, {"rec/a.webm": b"audio"})
+    deleted = []
+    monkeypatch.setattr(export_jobs, "delete_object", lambda bucket, key: deleted.append(key))
+    _seed_session(db)
+    job, _ = create_export_job(db, compression_level=None)
+    run_export_job(job.id, session_factory=session_factory)
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    storage_key = job.storage_key
+
+    assert export_jobs.expire_old_artifacts(session_factory) == 0
+    job.completed_at = datetime.now(timezone.utc) - timedelta(seconds=export_jobs.settings.EXPORT_ARTIFACT_TTL_SECONDS + 1)
+    db.commit()
+
+    fresh, reused = create_export_job(db, compression_level=None)
+    assert not reused and fresh.id != job.id
+
+    assert export_jobs.expire_old_artifacts(session_factory) == 1
+    assert deleted == [storage_key]
+    db.expire_all()
+    job = db.get(ExportJob, job.id)
+    assert job.status == ExportJobStatus.EXPIRED.value and job.storage_key is None
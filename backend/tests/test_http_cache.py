@@ -0,0 +1,50 @@
+"""Tests for ETag / conditional GET handling."""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.http_cache import etag_matches
+from app.models.session import Session as SessionModel
+
+
+client = TestClient(app)
+
+
+def test_text_etag_round_trip():
+    text_id = client.get("/api/v1/texts").json()["texts"][0]["Id"]
+
+    first = client.get(f"/api/v1/texts/{text_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "max-age" in first.headers["cache-control"]
+
+    second = client.get(f"/api/v1/texts/{text_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    stale = client.get(f"/api/v1/texts/{text_id}", headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_session_by_code_etag_changes_with_state(analyst_client, db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.commit()
+    url = f"/api/v1/sessions/by-code/{session.session_code}"
+
+    etag = analyst_client.get(url).headers["etag"]
+    assert analyst_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    session.estado = "ready_to_start"
+    db.commit()
+    changed = analyst_client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["estado"] == "ready_to_start"
+
+
+def test_etag_matches_lists_and_weak_tags():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"')
+    assert not etag_matches('"a"', '"b"')
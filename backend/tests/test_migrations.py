@@ -0,0 +1,80 @@
+"""Alembic migration history: the revisions alone must build the whole schema.
+
+The offline check renders ``alembic upgrade head --sql`` and runs anywhere;
+the upgrade against a real database is skipped unless ``TEST_POSTGRES_URL``
+is set (see ``test_query_plans.py``).
+"""
+
+import io
+import os
+import re
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.init_db import ALEMBIC_INI, run_migrations
+from app.models.base import Base
+from app.models import session as _session_model  # noqa: F401
+from app.models import recording as _recording_model  # noqa: F401
+from app.models import survey as _survey_model  # noqa: F401
+from app.models import user as _user_model  # noqa: F401
+from app.models import export_job as _export_job_model  # noqa: F401
+from app.models import resumable_upload as _resumable_upload_model  # noqa: F401
+from app.models import session_stats as _session_stats_model  # noqa: F401
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+SCHEMA = "migration_checks"
+
+
+def _config(**kwargs) -> Config:
+    config = Config(str(ALEMBIC_INI), **kwargs)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def test_revisions_form_a_single_chain():
+    script = ScriptDirectory.from_config(_config())
+    assert len(script.get_heads()) == 1
+    revisions = list(script.walk_revisions())
+    assert revisions[-1].down_revision is None
+    assert len(revisions) == len({revision.revision for revision in revisions})
+
+
+def test_offline_upgrade_creates_every_table():
+    output = io.StringIO()
+    command.upgrade(_config(output_buffer=output), "head", sql=True)
+    created = re.findall(r"CREATE TABLE IF NOT EXISTS (\w+)", output.getvalue())
+
+    assert set(created) == set(Base.metadata.tables)
+    # Referenced tables are created first
+    for table in Base.metadata.sorted_tables:
+        for key in table.foreign_keys:
+            assert created.index(key.column.table.name) < created.index(table.name)
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+def test_upgrade_head_on_empty_database_matches_models():
+    admin = create_engine(POSTGRES_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_engine(POSTGRES_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    try:
+        run_migrations(engine)
+        # A second run (already at head) is a no-op
+        run_migrations(engine)
+
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            columns = {column["name"] for column in inspector.get_columns(table.name, schema=SCHEMA)}
+            assert columns == set(table.columns.keys()), table.name
+            indexes = {index["name"] for index in inspector.get_indexes(table.name, schema=SCHEMA)}
+            assert {index.name for index in table.indexes} <= indexes, table.name
+    finally:
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
@@ -0,0 +1,94 @@
+"""Tests for the bounded password hashing pool and rehash-on-login."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.session import get_db
+from app.core import security
+from app.core.password_hashing import PasswordHashExecutor, PasswordHasherBusy
+from app.models.user import User
+
+
+def test_executor_rejects_when_queue_is_full():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=0, retry_after=3)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    worker = threading.Thread(target=executor.run, args=(slow,))
+    worker.start()
+    started.wait(5)
+    try:
+        assert executor.stats()["running"] == 1
+        with pytest.raises(PasswordHasherBusy) as exc_info:
+            executor.run(lambda: "never")
+        assert exc_info.value.retry_after == 3
+        assert executor.stats()["rejected_total"] == 1
+    finally:
+        release.set()
+        worker.join()
+    assert executor.run(lambda: "ok") == "ok"
+
+
+def test_async_callers_wait_without_holding_threads():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=2, retry_after=1)
+    release = threading.Event()
+
+    async def burst():
+        waiting = [asyncio.ensure_future(executor.run_async(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        with pytest.raises(PasswordHasherBusy):
+            await executor.run_async(lambda: "never")
+        release.set()
+        return stats, await asyncio.gather(*waiting)
+
+    # All three callers share this thread's event loop while they wait
+    stats, results = asyncio.run(burst())
+    assert (stats["running"], stats["queued"]) == (1, 2)
+    assert results == [True, True, True]
+    assert executor.stats()["queued"] == 0
+
+
+def test_login_returns_429_when_hashing_is_saturated(db, monkeypatch):
+    async def busy(*args):
+        raise PasswordHasherBusy(retry_after=2)
+
+    monkeypatch.setattr(security.password_hasher, "run_async", busy)
+    db.add(User(email="a@toastclub.com", password_hash="x", rol="ANALISTA"))
+    db.commit()
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).post(
+            "/api/v1/auth/login", json={"email": "a@toastclub.com", "password": "secret"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "2"
+
+
+def test_login_rehashes_outdated_cost(db):
+    weak_hash = security.pwd_context.handler("bcrypt").using(rounds=4, relaxed=True).hash("secret123")
+    user = User(email="b@toastclub.com", password_hash=weak_hash, rol="IMPULSADOR")
+    db.add(user)
+    db.commit()
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).post(
+            "/api/v1/auth/login", json={"email": "b@toastclub.com", "password": "secret123"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    db.refresh(user)
+    assert user.password_hash != weak_hash
+    assert security.pwd_context.verify("secret123", user.password_hash)
+    assert not security.pwd_context.needs_update(user.password_hash)
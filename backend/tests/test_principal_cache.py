@@ -0,0 +1,48 @@
+"""Tests for the authenticated principal cache."""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.db.session import get_db
+from app.core.principal_cache import Principal, PrincipalCache, principal_cache
+from app.core.security import create_access_token, get_password_hash
+from app.models.user import User
+from app.services.users import reset_user_password
+
+
+def test_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.principal_cache.time.monotonic", lambda: now[0])
+    cache = PrincipalCache(ttl_seconds=10, max_entries=2)
+
+    for user_id in (1, 2, 3):
+        cache.put(Principal(id=user_id, rol="ANALISTA", is_active=True, must_change_password=False))
+    assert cache.get(1) is None  # evicted, oldest
+    assert cache.get(3).rol == "ANALISTA"
+
+    now[0] += 11
+    assert cache.get(3) is None
+
+
+def test_protected_request_uses_cache_and_reset_invalidates(db):
+    principal_cache.clear()
+    user = User(email="a@toastclub.com", password_hash=get_password_hash("x"), rol="ANALISTA")
+    db.add(user)
+    db.commit()
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+        assert client.get("/api/v1/admin/users", headers=headers).status_code == 200
+        assert principal_cache.get(user.id) is not None
+
+        reset_user_password(db, user)
+        assert principal_cache.get(user.id) is None
+        response = client.get("/api/v1/admin/users", headers=headers)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "PASSWORD_CHANGE_REQUIRED"
+    finally:
+        app.dependency_overrides.clear()
+        principal_cache.clear()
@@ -0,0 +1,117 @@
+"""Tests for the incrementally maintained session_stats summary."""
+
+from app.api.v1 import texts
+from app.core.audio_probe import AudioInfo
+from app.models.recording import Recording
+from app.models.session import Session as SessionModel
+from app.models.session_stats import SessionStats
+from app.models.survey import Survey
+from app.services import recording_probe
+from app.services.session_stats import main, rebuild_session_stats, verify_session_stats
+
+
+def _create_session(client):
+    text_id = texts.text_catalog.all()[0]["Id"]
+    response = client.post(
+        "/api/v1/sessions",
+        json={"datos_participante": {"nombre": "Ana"}, "texto_seleccionado_id": text_id},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_write_paths_keep_stats_current(analyst_client, db):
+    session = _create_session(analyst_client)
+    other = _create_session(analyst_client)
+    url = f"/api/v1/sessions/{session['id']}"
+    for key, duration in (("recordings/a.wav", 12.5), ("recordings/b.wav", None), ("recordings/c.wav", 3.0)):
+        payload = {"storage_key": key, "duracion_segundos": duration}
+        assert analyst_client.post(f"{url}/recording", json=payload).status_code == 201
+    first = analyst_client.post(f"{url}/survey", json={"respuestas_json": {"q": 1}}).json()
+    analyst_client.post(f"{url}/survey", json={"respuestas_json": {"q": 2}})
+
+    stats = db.get(SessionStats, session["id"])
+    assert (stats.recordings_count, stats.surveys_count, stats.first_survey_id) == (3, 2, first["id"])
+    assert stats.total_duration == 15.5
+    assert stats.last_activity is not None
+    empty = db.get(SessionStats, other["id"])
+    assert (empty.recordings_count, empty.surveys_count, empty.first_survey_id) == (0, 0, None)
+    assert verify_session_stats(db) == []
+
+    page = analyst_client.get("/api/v1/dataset", params={"summary": "true"}).json()
+    assert page["total_sessions"] == 2
+    entry = page["dataset"][0]
+    assert entry["session_id"] == session["id"]
+    assert entry["texto_seleccionado"] == session["texto_seleccionado"]["Id"]
+    assert (entry["recordings_count"], entry["surveys_count"], entry["first_survey_id"]) == (3, 2, first["id"])
+    assert entry["total_duration_seconds"] == 15.5
+    assert "recordings" not in entry and "survey_responses" not in entry
+
+
+def test_probe_updates_total_duration(analyst_client, db, session_factory, monkeypatch):
+    session = _create_session(analyst_client)
+    recording = analyst_client.post(
+        f"/api/v1/sessions/{session['id']}/recording",
+        json={"storage_key": "recordings/a.wav", "duracion_segundos": 10.0},
+    ).json()
+    monkeypatch.setattr(recording_probe, "_probe_key", lambda key: AudioInfo("wav", "pcm_s16le", 12.25, 16000, 1))
+
+    assert recording_probe.probe_recording(recording["id"], session_factory=session_factory)
+    db.expire_all()
+    assert db.get(SessionStats, session["id"]).total_duration == 12.25
+    assert verify_session_stats(db) == []
+
+
+def test_verify_reports_drift_and_rebuild_fixes_it(analyst_client, db, monkeypatch, capsys):
+    # Rows written behind the write paths' back have no stats yet
+    session = SessionModel(datos_participante={"nombre": "P"}, texto_seleccionado={"Id": "t1"}, estado="completed")
+    db.add(session)
+    db.flush()
+    db.add(Recording(session_id=session.id, storage_key="k/1.wav", duracion_segundos=2.0))
+    db.add(Survey(session_id=session.id, respuestas_json={"q": "a"}))
+    db.commit()
+
+    summary = analyst_client.get("/api/v1/dataset", params={"summary": "true"}).json()["dataset"][0]
+    assert (summary["recordings_count"], summary["surveys_count"]) == (0, 0)
+    assert verify_session_stats(db) == [session.id]
+
+    assert rebuild_session_stats(db) == 1
+    assert verify_session_stats(db) == []
+    summary = analyst_client.get("/api/v1/dataset", params={"summary": "true"}).json()["dataset"][0]
+    assert (summary["recordings_count"], summary["surveys_count"], summary["total_duration_seconds"]) == (1, 1, 2.0)
+
+    monkeypatch.setattr("app.services.session_stats.SessionLocal", lambda: db)
+    main(["verify"])
+    assert "up to date" in capsys.readouterr().out
+
+
+def test_first_survey_matches_the_export_definition(db):
+    from datetime import datetime, timezone
+
+    from sqlalchemy import update
+
+    from app.services import session_stats
+    from app.services.dataset_export import DatasetExport
+
+    session = SessionModel(datos_participante={"nombre": "P"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    db.execute(session_stats.session_created(db, session.id))
+    # Inserted out of created_at order; the untimestamped one sorts first
+    later = Survey(session_id=session.id, respuestas_json={}, created_at=datetime(2026, 1, 2, tzinfo=timezone.utc))
+    earlier = Survey(session_id=session.id, respuestas_json={}, created_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+    untimestamped = Survey(session_id=session.id, respuestas_json={}, created_at=None)
+    for survey in (later, earlier, untimestamped):
+        db.add(survey)
+        db.flush()
+        if survey is untimestamped:
+            db.execute(update(Survey).where(Survey.id == survey.id).values(created_at=None))
+        db.execute(session_stats.survey_added(db, survey))
+        db.refresh(survey)
+        expected = DatasetExport.load(db).first_survey(session.id).id
+        db.expire_all()
+        assert db.get(SessionStats, session.id).first_survey_id == expected
+    db.commit()
+
+    assert expected == untimestamped.id
+    assert verify_session_stats(db) == []
@@ -0,0 +1,94 @@
+"""Tests for the shared R2 client."""
+
+import threading
+
+import pytest
+
+from app.core import storage_r2
+
+
+@pytest.fixture
+def r2_settings(monkeypatch):
+    monkeypatch.setattr(storage_r2.settings, "R2_ENDPOINT_URL", "https://example.r2.cloudflarestorage.com")
+    monkeypatch.setattr(storage_r2.settings, "R2_ACCESS_KEY_ID", "key")
+    monkeypatch.setattr(storage_r2.settings, "R2_SECRET_ACCESS_KEY", "secret")
+    storage_r2.reset_s3_client()
+    yield
+    storage_r2.reset_s3_client()
+
+
+def test_client_is_built_once_and_shared(r2_settings):
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(storage_r2.get_s3_client())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    assert clients[0].meta.config.max_pool_connections == storage_r2.settings.R2_MAX_POOL_CONNECTIONS
+
+
+def test_presign_reuses_shared_client(r2_settings):
+    url = storage_r2.presign_get_url("bucket", "recordings/a.wav")
+    assert "recordings/a.wav" in url
+    assert storage_r2.get_s3_client() is storage_r2.get_s3_client()
+
+
+def test_missing_configuration_is_not_cached(monkeypatch):
+    storage_r2.reset_s3_client()
+    monkeypatch.setattr(storage_r2.settings, "R2_ENDPOINT_URL", "")
+    with pytest.raises(RuntimeError):
+        storage_r2.get_s3_client()
+    assert storage_r2._client is None
+
+
+def test_presign_cache_reuses_url_until_half_lifetime(monkeypatch):
+    now = [1_000_000.0]
+    signed = []
+    monkeypatch.setattr(storage_r2.time, "time", lambda: now[0])
+    monkeypatch.setattr(
+        storage_r2,
+        "presign_get_url",
+        lambda bucket, key, expires_seconds: signed.append(key) or f"https://signed/{key}/{len(signed)}",
+    )
+    storage_r2._presign_cache.clear()
+
+    url, remaining = storage_r2.presign_get_url_cached("bucket", "a.wav", expires_seconds=600)
+    assert remaining == 600
+
+    now[0] += 100
+    again, remaining = storage_r2.presign_get_url_cached("bucket", "a.wav", expires_seconds=600)
+    assert again == url and remaining == 500
+
+    now[0] += 300  # next 300s bucket
+    fresh, remaining = storage_r2.presign_get_url_cached("bucket", "a.wav", expires_seconds=600)
+    assert fresh != url and remaining == 600
+    assert signed == ["a.wav", "a.wav"]
+
+
+def test_batch_download_urls(analyst_client, db, monkeypatch):
+    from app.models.session import Session as SessionModel
+    from app.models.recording import Recording
+
+    monkeypatch.setattr(
+        "app.api.v1.recordings.presign_get_url_cached",
+        lambda bucket, key, expires_seconds: (f"https://signed/{key}", expires_seconds),
+    )
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={})
+    db.add(session)
+    db.flush()
+    recordings = [Recording(session_id=session.id, storage_key=f"rec/{i}.wav") for i in range(3)]
+    db.add_all(recordings)
+    db.commit()
+
+    ids = [recording.id for recording in recordings]
+    response = analyst_client.post(
+        "/api/v1/recordings/download-urls",
+        json={"recording_ids": ids + [9999], "expires_seconds": 300},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["recording_id"] for item in data["urls"]] == ids
+    assert data["urls"][0]["download_url"] == "https://signed/rec/0.wav"
+    assert data["missing"] == [9999]
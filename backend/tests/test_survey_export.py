@@ -0,0 +1,116 @@
+"""Tests for the single-pass surveys CSV writer."""
+
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from datetime import datetime, timezone
+
+from app.models.session import Session as SessionModel
+from app.models.survey import Survey
+from app.services.survey_export import SurveyCsvWriter, load_declared_keys
+
+CREATED_AT = datetime(2026, 1, 1, 15, 0, tzinfo=timezone.utc)
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(mode="w+", newline="", encoding="utf-8")
+
+
+def _write(layout, answers, declared_keys=None):
+    writer = SurveyCsvWriter(_spool, layout, declared_keys)
+    for index, responses in enumerate(answers, start=1):
+        writer.write(index, 10 + index, f"code-{index}", CREATED_AT, responses)
+    files = {
+        name: list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+        for name, chunks in writer.files()
+    }
+    manifest = writer.manifest()
+    writer.close()
+    return files, manifest
+
+
+def test_auto_layout_is_wide_when_every_survey_has_the_same_keys():
+    files, manifest = _write("auto", [{"q2": "b", "q1": "a"}, {"q1": "c", "q2": "d"}])
+    assert manifest["survey_layout"] == "wide"
+    assert files["surveys.csv"] == [
+        ["survey_id", "session_id", "session_code", "created_at", "q1", "q2"],
+        ["1", "11", "code-1", "2026-01-01T10:00:00-05:00", "a", "b"],
+        ["2", "12", "code-2", "2026-01-01T10:00:00-05:00", "c", "d"],
+    ]
+
+
+def test_auto_layout_falls_back_to_long_when_keys_differ():
+    files, manifest = _write("auto", [{"q1": "a"}, {"q2": "b", "q3": "c"}, {}])
+    assert manifest["survey_layout"] == "long"
+    assert files["surveys.csv"][0][-2:] == ["question_key", "answer_value"]
+    assert [row[-2:] for row in files["surveys.csv"][1:]] == [["q1", "a"], ["q2", "b"], ["q3", "c"], ["", ""]]
+
+
+def test_auto_layout_without_surveys_is_long():
+    files, manifest = _write("auto", [])
+    assert manifest["survey_layout"] == "long"
+    assert files["surveys.csv"] == [["survey_id", "session_id", "session_code", "created_at", "question_key", "answer_value"]]
+
+
+def test_wide_layout_pads_rows_written_before_a_key_was_discovered():
+    files, _ = _write("wide", [{"q2": "b"}, {"q1": "a", "q3": "c"}])
+    header, *rows = files["surveys.csv"]
+    # Discovery order: first survey's keys, then new keys of later surveys (sorted within a survey)
+    assert header[4:] == ["q2", "q1", "q3"]
+    assert [row[4:] for row in rows] == [["b", "", ""], ["", "a", "c"]]
+
+
+def test_both_layouts_come_from_one_pass():
+    files, manifest = _write("both", [{"q1": "a"}, {"q2": "b"}])
+    assert sorted(files) == ["surveys_long.csv", "surveys_wide.csv"]
+    assert files["surveys_wide.csv"][0][4:] == ["q1", "q2"]
+    assert len(files["surveys_long.csv"]) == 3
+    assert manifest["survey_layout"] == "both"
+
+
+def test_many_distinct_keys():
+    answers = [{f"q{index}": index} for index in range(500)]
+    files, _ = _write("wide", answers)
+    assert len(files["surveys.csv"][0]) == 4 + 500
+    assert files["surveys.csv"][-1][-1] == "499"
+
+
+def test_answers_render_like_their_stored_json():
+    answers = [{"q1": {"a": [1, "é"]}, "q2": True, "q3": None, "q4": 2.0}]
+    files, _ = _write("both", answers)
+    assert files["surveys_wide.csv"][1][4:] == ['{"a": [1, "\\u00e9"]}', "True", "", "2.0"]
+    assert [row[-1] for row in files["surveys_long.csv"][1:]] == ['{"a": [1, "\\u00e9"]}', "True", "", "2.0"]
+
+
+def test_declared_schema_fixes_wide_columns(tmp_path):
+    definition = tmp_path / "survey.json"
+    definition.write_text(json.dumps({"questions": [{"key": "claridad"}, {"key": "comodidad"}, "claridad"]}))
+    declared = load_declared_keys(str(definition))
+    assert declared == ["claridad", "comodidad"]
+    assert load_declared_keys("") is None
+
+    files, manifest = _write("auto", [{"comodidad": 5}, {"claridad": 4, "extra": "x"}], declared)
+    assert manifest["survey_layout"] == "wide"
+    assert manifest["survey_schema"] == "declared"
+    assert manifest["undeclared_survey_keys"] == ["extra"]
+    assert [row[4:] for row in files["surveys.csv"]] == [["claridad", "comodidad"], ["", "5"], ["4", ""]]
+
+
+def test_export_endpoint_accepts_survey_layout(analyst_client, db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={"Id": "t1"})
+    db.add(session)
+    db.flush()
+    db.add(Survey(session_id=session.id, respuestas_json={"q1": "a"}))
+    db.add(Survey(session_id=session.id, respuestas_json={"q2": "b"}))
+    db.commit()
+
+    response = analyst_client.get("/api/v1/dataset/export?include_audio=false&survey_layout=both")
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert {"surveys_wide.csv", "surveys_long.csv"} <= set(archive.namelist())
+        manifest = json.loads(archive.read("manifest.json"))
+    assert (manifest["surveys"], manifest["survey_layout"]) == (2, "both")
+
+    assert analyst_client.get("/api/v1/dataset/export?include_audio=false&survey_layout=nope").status_code == 422
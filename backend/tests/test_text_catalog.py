@@ -0,0 +1,60 @@
+"""Tests for the indexed text catalog."""
+
+import json
+import os
+
+from app.core.text_catalog import TextCatalog
+
+
+def _write(path, texts, mtime):
+    path.write_text(json.dumps({"texts": texts}), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_catalog_indexes_ids_and_tags(tmp_path):
+    path = tmp_path / "texts.json"
+    _write(path, [
+        {"Id": "a", "Title": "A", "Pages": [], "Tags": {"tema": "Salud", "tono": "Calmo"}},
+        {"Id": "b", "Title": "B", "Pages": [], "Tags": {"tema": " salud ", "tono": "Combativo"}},
+        {"Id": "c", "Title": "C", "Pages": [], "Tags": {"tema": "Deporte"}},
+    ], mtime=1_000_000_000)
+    catalog = TextCatalog(path)
+
+    assert catalog.get("b")["Title"] == "B"
+    assert catalog.get("zzz") is None
+    assert [t["Id"] for t in catalog.filter_by_tags({"tema": "salud"})] == ["a", "b"]
+    assert [t["Id"] for t in catalog.filter_by_tags({"tema": "salud", "tono": "calmo"})] == ["a"]
+    assert catalog.filter_by_tags({"missing": "x"}) == []
+    assert catalog.tag_labels()["tema"] == {"salud": "Salud", "deporte": "Deporte"}
+
+
+def test_catalog_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "texts.json"
+    _write(path, [{"Id": "a", "Title": "Old", "Pages": [], "Tags": {}}], mtime=1_000_000_000)
+    catalog = TextCatalog(path)
+    assert catalog.get("a")["Title"] == "Old"
+
+    _write(path, [{"Id": "a", "Title": "New", "Pages": [], "Tags": {}}], mtime=2_000_000_000)
+    assert catalog.get("a")["Title"] == "New"
+
+
+def test_reload_during_filter_keeps_one_snapshot(tmp_path):
+    path = tmp_path / "texts.json"
+    _write(path, [
+        {"Id": "a", "Title": "A", "Pages": [], "Tags": {"tema": "Salud"}},
+        {"Id": "b", "Title": "B", "Pages": [], "Tags": {"tema": "Salud"}},
+    ], mtime=1_000_000_000)
+    catalog = TextCatalog(path)
+    catalog.refresh()
+
+    class ReloadOnLookup(dict):
+        def get(self, *args):
+            # Another request reloads a catalog with different ids mid-lookup
+            _write(path, [{"Id": "x", "Title": "X", "Pages": [], "Tags": {"tema": "Salud"}}], mtime=2_000_000_000)
+            catalog.refresh()
+            return super().get(*args)
+
+    catalog._snapshot = catalog._snapshot._replace(tag_index=ReloadOnLookup(catalog._snapshot.tag_index))
+
+    assert [t["Id"] for t in catalog.filter_by_tags({"tema": "salud"})] == ["a", "b"]
+    assert [t["Id"] for t in catalog.filter_by_tags({"tema": "salud"})] == ["x"]
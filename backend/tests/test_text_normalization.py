@@ -25,4 +25,32 @@ def test_normalized_pages_line_limits():
         for page in normalized_pages[2:]:
             assert len(page) <= 8
             for line in page:
-                assert len(line) <= 39
\ No newline at end of file
+                assert len(line) <= 39
+
+def test_normalization_is_idempotent():
+    """Normalizing already-normalized pages returns them unchanged."""
+    texts = load_texts()
+    for text in texts:
+        normalized_pages = normalize_pages(text.get("Pages", []), start_page_index=2)
+        assert normalize_pages(normalized_pages, start_page_index=2) == normalized_pages
+
+
+def test_normalized_text_is_not_rewrapped(monkeypatch):
+    """Re-normalizing stored session text is served from the cache."""
+    from app.core import text_normalization
+
+    text_normalization.clear_normalization_cache()
+    text = load_texts()[0]
+    stored = text_normalization.normalize_text_object(text)
+
+    calls = []
+    original = text_normalization._normalize_pages_uncached
+    monkeypatch.setattr(
+        text_normalization,
+        "_normalize_pages_uncached",
+        lambda *args: calls.append(args) or original(*args),
+    )
+
+    assert text_normalization.normalize_text_object(stored) == stored
+    assert text_normalization.normalize_text_object(text) == stored
+    assert calls == []
@@ -0,0 +1,309 @@
+"""Tests for streamed uploads and upload size limits."""
+
+from datetime import datetime, timedelta, timezone
+import hashlib
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import storage_r2
+from app.core.storage_r2 import UploadTooLarge, upload_stream
+from app.core.upload_limits import MaxUploadSizeMiddleware
+from app.models.resumable_upload import ResumableUpload
+from app.services import recording_probe, resumable_uploads
+from app.services.resumable_uploads import expire_stale_uploads
+from app.models.session import Session as SessionModel
+from app.models.recording import Recording
+
+
+class FakeMultipartClient:
+    def __init__(self):
+        self.objects = {}
+        self.parts = {}
+        self.aborted = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = bytes(Body)
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.parts["u1"] = []
+        return {"UploadId": "u1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.parts[UploadId].append(bytes(Body))
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        assert [p["PartNumber"] for p in MultipartUpload["Parts"]] == list(range(1, len(self.parts[UploadId]) + 1))
+        self.objects[Key] = b"".join(self.parts.pop(UploadId))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://r2.test/{operation}/{Params['Key']}?part={Params.get('PartNumber', '')}"
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            return None
+        return {"ContentLength": len(self.objects[Key]), "ContentType": "audio/webm", "ETag": '"abc"'}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = FakeMultipartClient()
+    monkeypatch.setattr(storage_r2, "get_s3_client", lambda: client)
+    monkeypatch.setattr(storage_r2, "MULTIPART_PART_SIZE", 10)
+    monkeypatch.setattr(storage_r2, "READ_CHUNK_SIZE", 4)
+    return client
+
+
+def test_small_upload_uses_single_put(fake_client):
+    size, sha256 = upload_stream(io.BytesIO(b"abc"), "bucket", "k")
+    assert fake_client.objects["k"] == b"abc"
+    assert (size, sha256) == (3, hashlib.sha256(b"abc").hexdigest())
+
+
+def test_large_upload_is_multipart_with_checksum(fake_client):
+    data = bytes(range(256)) * 2
+    size, sha256 = upload_stream(io.BytesIO(data), "bucket", "k", max_bytes=1000)
+    assert fake_client.objects["k"] == data
+    assert size == len(data)
+    assert sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_oversized_upload_aborts_multipart(fake_client):
+    with pytest.raises(UploadTooLarge):
+        upload_stream(io.BytesIO(b"x" * 100), "bucket", "k", max_bytes=25)
+    assert fake_client.aborted == ["u1"]
+    assert "k" not in fake_client.objects
+
+
+def test_upload_endpoint_records_size_and_checksum(analyst_client, db, fake_client, monkeypatch):
+    monkeypatch.setattr("app.api.v1.recordings.upload_stream", upload_stream)
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={}, estado="running")
+    db.add(session)
+    db.commit()
+
+    response = analyst_client.post(
+        f"/api/v1/sessions/{session.id}/upload",
+        files={"file": ("take.webm", b"0123456789abcdef", "audio/webm")},
+    )
+    assert response.status_code == 200
+    recording = db.get(Recording, response.json()["id"])
+    assert recording.metadata_carga["size_bytes"] == 16
+    assert recording.metadata_carga["sha256"] == hashlib.sha256(b"0123456789abcdef").hexdigest()
+    db.refresh(session)
+    assert session.estado == "audio_uploaded"
+
+
+def test_upload_with_unparseable_headers_is_registered(analyst_client, db, fake_client, monkeypatch):
+    monkeypatch.setattr("app.api.v1.recordings.upload_stream", upload_stream)
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={}, estado="running")
+    db.add(session)
+    db.commit()
+
+    body = bytes.fromhex("1A45DFA3") + b"\xff" * 40
+    response = analyst_client.post(
+        f"/api/v1/sessions/{session.id}/upload",
+        files={"file": ("take.webm", body, "audio/webm")},
+    )
+    assert response.status_code == 200
+    recording = db.get(Recording, response.json()["id"])
+    assert recording.probed_at is not None and recording.duracion_segundos is None
+
+
+@pytest.fixture
+def direct_upload_client(analyst_client, fake_client, monkeypatch):
+    for name in ("presign_put_url", "create_multipart_upload", "presign_upload_part_url", "complete_multipart_upload"):
+        monkeypatch.setattr(f"app.api.v1.recordings.{name}", getattr(storage_r2, name))
+    monkeypatch.setattr("app.api.v1.recordings.head_object", lambda bucket, key: fake_client.head_object(bucket, key))
+    monkeypatch.setattr("app.api.v1.recordings.delete_object", lambda bucket, key: fake_client.delete_object(bucket, key))
+    monkeypatch.setattr(recording_probe, "probe_recording", lambda recording_id: None)
+    return analyst_client
+
+
+def _running_session(db):
+    session = SessionModel(datos_participante={"nombre": "Ana"}, texto_seleccionado={}, estado="running")
+    db.add(session)
+    db.commit()
+    return session
+
+
+def test_direct_upload_single_put(direct_upload_client, db, fake_client):
+    session = _running_session(db)
+    response = direct_upload_client.post(
+        f"/api/v1/sessions/{session.id}/upload-url",
+        json={"filename": "take.webm", "content_type": "audio/webm"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    key = body["storage_key"]
+    assert key.startswith(f"recordings/session_{session.id}/") and key.endswith(".webm")
+    assert body["upload_url"].startswith("https://r2.test/put_object/")
+    assert body["headers"] == {"Content-Type": "audio/webm"}
+
+    fake_client.objects[key] = b"0123456789"
+    complete = {"storage_key": key, "filename": "take.webm"}
+    response = direct_upload_client.post(f"/api/v1/sessions/{session.id}/upload-complete", json=complete)
+    assert response.status_code == 201
+    recording = db.get(Recording, response.json()["id"])
+    assert recording.formato == "audio/webm"
+    assert recording.metadata_carga["size_bytes"] == 10
+    assert recording.metadata_carga["upload"] == "direct"
+    db.refresh(session)
+    assert session.estado == "audio_uploaded"
+
+    # A retried completion returns the same recording
+    again = direct_upload_client.post(f"/api/v1/sessions/{session.id}/upload-complete", json=complete)
+    assert again.json()["id"] == recording.id
+    assert db.query(Recording).count() == 1
+
+
+def test_direct_upload_multipart(direct_upload_client, db, fake_client):
+    session = _running_session(db)
+    body = direct_upload_client.post(f"/api/v1/sessions/{session.id}/upload-url", json={"parts": 2}).json()
+    assert body["upload_id"] == "u1"
+    assert [p["part_number"] for p in body["part_urls"]] == [1, 2]
+
+    fake_client.parts["u1"] = [b"abc", b"def"]
+    response = direct_upload_client.post(
+        f"/api/v1/sessions/{session.id}/upload-complete",
+        json={
+            "storage_key": body["storage_key"],
+            "upload_id": "u1",
+            "parts": [{"part_number": 2, "etag": "2"}, {"part_number": 1, "etag": "1"}],
+        },
+    )
+    assert response.status_code == 201
+    assert fake_client.objects[body["storage_key"]] == b"abcdef"
+
+
+def test_direct_upload_complete_rejects_missing_foreign_and_oversized(direct_upload_client, db, fake_client, monkeypatch):
+    session = _running_session(db)
+    url = f"/api/v1/sessions/{session.id}/upload-complete"
+
+    assert direct_upload_client.post(url, json={"storage_key": "recordings/session_999/x.wav"}).status_code == 400
+    key = f"recordings/session_{session.id}/x.wav"
+    assert direct_upload_client.post(url, json={"storage_key": key}).status_code == 409
+
+    monkeypatch.setattr("app.api.v1.recordings.settings.MAX_AUDIO_SIZE_MB", 0)
+    fake_client.objects[key] = b"too big"
+    assert direct_upload_client.post(url, json={"storage_key": key}).status_code == 413
+    assert key not in fake_client.objects
+    assert db.query(Recording).count() == 0
+
+
+@pytest.fixture
+def resumable_client(analyst_client, fake_client, monkeypatch):
+    monkeypatch.setattr("app.api.v1.recordings.settings.RESUMABLE_UPLOAD_PART_SIZE_MB", 1)
+    monkeypatch.setattr(resumable_uploads, "expire_stale_uploads", lambda: 0)
+    monkeypatch.setattr(recording_probe, "probe_recording", lambda recording_id: None)
+    return analyst_client
+
+
+def _put_part(client, token, number, data):
+    return client.put(
+        f"/api/v1/resumable-uploads/{token}/parts/{number}",
+        content=data,
+        headers={"content-type": "application/octet-stream"},
+    )
+
+
+def test_resumable_upload_resumes_after_missing_part(resumable_client, db, fake_client):
+    mib = 1024 * 1024
+    data = bytes(range(256)) * (mib * 5 // 2 // 256)  # 2.5 MiB -> 3 parts
+    session = _running_session(db)
+
+    created = resumable_client.post(
+        f"/api/v1/sessions/{session.id}/resumable-uploads",
+        json={"total_size": len(data), "filename": "take.wav"},
+    )
+    assert created.status_code == 201
+    state = created.json()
+    token = state["upload_token"]
+    assert (state["part_size"], state["part_count"], state["missing_parts"]) == (mib, 3, [1, 2, 3])
+
+    assert _put_part(resumable_client, token, 1, data[:mib]).status_code == 200
+    state = _put_part(resumable_client, token, 3, data[2 * mib:]).json()
+    assert state["offset"] == mib
+    assert state["received_ranges"] == [[0, mib], [2 * mib, len(data)]]
+    assert state["missing_parts"] == [2]
+
+    # Completing with a gap is refused, the client asks what is missing and resumes
+    assert resumable_client.post(f"/api/v1/resumable-uploads/{token}/complete").status_code == 409
+    assert resumable_client.get(f"/api/v1/resumable-uploads/{token}").json()["missing_parts"] == [2]
+    assert _put_part(resumable_client, token, 2, data[mib:2 * mib - 1]).status_code == 400
+    assert _put_part(resumable_client, token, 2, data[mib:2 * mib]).json()["offset"] == len(data)
+
+    completed = resumable_client.post(f"/api/v1/resumable-uploads/{token}/complete")
+    assert completed.status_code == 201
+    recording = db.get(Recording, completed.json()["id"])
+    assert fake_client.objects[recording.storage_key] == data
+    assert recording.metadata_carga["upload"] == "resumable"
+    again = resumable_client.post(f"/api/v1/resumable-uploads/{token}/complete")
+    assert again.json()["id"] == recording.id
+    db.refresh(session)
+    assert session.estado == "audio_uploaded"
+
+
+def test_completed_resumable_upload_is_linked_to_its_recording_in_one_commit(resumable_client, db, fake_client, monkeypatch):
+    session = _running_session(db)
+    token = resumable_client.post(
+        f"/api/v1/sessions/{session.id}/resumable-uploads", json={"total_size": 10}
+    ).json()["upload_token"]
+    assert _put_part(resumable_client, token, 1, b"x" * 10).status_code == 200
+
+    # A failure right after the commit must not leave a completed upload without its recording
+    def fail():
+        raise RuntimeError("after commit")
+
+    monkeypatch.setattr("app.api.v1.recordings.stats_cache.invalidate", fail)
+    with pytest.raises(RuntimeError):
+        resumable_client.post(f"/api/v1/resumable-uploads/{token}/complete")
+
+    db.expire_all()
+    upload = db.get(ResumableUpload, token)
+    assert upload.status == "completed"
+    assert upload.recording_id == db.query(Recording).one().id
+
+
+def test_stale_resumable_uploads_are_aborted(resumable_client, db, session_factory, fake_client):
+    session = _running_session(db)
+    token = resumable_client.post(
+        f"/api/v1/sessions/{session.id}/resumable-uploads", json={"total_size": 10}
+    ).json()["upload_token"]
+    upload = db.get(ResumableUpload, token)
+    upload.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+
+    assert _put_part(resumable_client, token, 1, b"x" * 10).status_code == 410
+    assert expire_stale_uploads(session_factory) == 1
+    assert fake_client.aborted == ["u1"]
+    db.refresh(upload)
+    assert upload.status == "expired"
+    assert resumable_client.get(f"/api/v1/resumable-uploads/{token}").json()["status"] == "expired"
+
+
+def test_middleware_rejects_oversized_bodies():
+    inner = FastAPI()
+
+    @inner.post("/upload")
+    async def upload(request_body: dict):
+        return {"ok": True}
+
+    inner.add_middleware(MaxUploadSizeMiddleware, max_bytes=10, path_pattern=r"^/upload$")
+    client = TestClient(inner)
+
+    assert client.post("/upload", content=b"x" * 50, headers={"content-type": "application/json"}).status_code == 413
+
+    def chunked():
+        yield b"x" * 8
+        yield b"x" * 8
+
+    assert client.post("/upload", content=chunked(), headers={"content-type": "application/json"}).status_code == 413
@@ -89,8 +89,18 @@ export const sessionsAPI = {
 export const datasetAPI = {
   /** @returns {Promise<{dataset: import('./types').Session[], total_sessions: number}>} */
   getDataset: async () => {
-    const response = await apiClient.get(`${API_V1}/dataset`)
-    return response.data
+    const dataset = []
+    let afterId = null
+    let totalSessions = 0
+    do {
+      const params = { limit: 1000 }
+      if (afterId !== null) params.after_id = afterId
+      const response = await apiClient.get(`${API_V1}/dataset`, { params })
+      dataset.push(...response.data.dataset)
+      totalSessions = response.data.total_sessions
+      afterId = response.data.next_after_id
+    } while (afterId !== null && afterId !== undefined)
+    return { dataset, total_sessions: totalSessions }
   },
   
   exportDataset: async () => {